@@ -0,0 +1,153 @@
+"""
+Measure the latency of title suggestions (``/api/events/autocomplete/``)
+for a user with many events.
+
+The benchmark user gets ``--events`` events (kept between runs) whose
+titles combine words of a small vocabulary, so titles repeat the way real
+calendars do. Suggestions are then requested for random prefixes and
+misspellings of those words, and for a word followed by the prefix of
+another, bypassing the cache unless ``--cached``, and
+the latency percentiles are reported. Needs Postgres with the migrations
+applied:
+
+    DATABASE_URL=postgres://... python benchmarks/autocomplete.py --events 100000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from event_scheduler.events.models import Event  # noqa: E402
+from event_scheduler.events.search import remember_titles  # noqa: E402
+from event_scheduler.events.search import title_suggestions  # noqa: E402
+from event_scheduler.users.models import User  # noqa: E402
+
+WORDS = [
+    "standup",
+    "planning",
+    "review",
+    "retro",
+    "sync",
+    "lunch",
+    "dentist",
+    "gym",
+    "yoga",
+    "design",
+    "roadmap",
+    "budget",
+    "interview",
+    "onboarding",
+    "demo",
+    "release",
+    "hiring",
+    "payroll",
+    "audit",
+    "workshop",
+    "training",
+    "offsite",
+    "board",
+    "quarterly",
+    "weekly",
+    "monthly",
+    "team",
+    "product",
+    "marketing",
+    "sales",
+    "support",
+    "customer",
+    "partner",
+    "vendor",
+    "legal",
+    "finance",
+    "doctor",
+    "school",
+    "pickup",
+    "birthday",
+    "dinner",
+    "flight",
+    "hotel",
+    "conference",
+    "webinar",
+]
+
+
+def populate(user, count, rng):
+    existing = Event.objects.filter(user=user).count()
+    now = timezone.now()
+    batch = []
+    for index in range(existing, count):
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 3))).capitalize()
+        start = now - timedelta(hours=index)
+        batch.append(
+            Event(user=user, title=title, start=start, end=start + timedelta(hours=1)),
+        )
+        if len(batch) == 5000:  # noqa: PLR2004
+            remember_titles(Event.objects.bulk_create(batch))
+            batch = []
+    remember_titles(Event.objects.bulk_create(batch))
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE events_event")
+        cursor.execute("ANALYZE events_eventtitle")
+
+
+def query(rng):
+    word = rng.choice(WORDS)
+    if rng.random() < 0.2 and len(word) > 4:  # noqa: PLR2004
+        # Swap two letters
+        i = rng.randrange(1, len(word) - 2)
+        return word[:i] + word[i + 1] + word[i] + word[i + 2 :]
+    if rng.random() < 0.2:  # noqa: PLR2004
+        # Typing the second word of a title
+        second = rng.choice(WORDS)
+        return f"{word} {second[: rng.randint(1, len(second))]}"
+    return word[: rng.randint(2, len(word))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--cached", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)  # noqa: S311
+
+    user, _ = User.objects.get_or_create(email="autocomplete-benchmark@example.com")
+    populate(user, args.events, rng)
+    if not args.cached:
+        settings.EVENTS_AUTOCOMPLETE_CACHE_TIMEOUT = 0
+
+    timings = []
+    for _ in range(args.queries):
+        text = query(rng)
+        started = time.perf_counter()
+        title_suggestions(user, text, args.limit)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    percentiles = statistics.quantiles(timings, n=100)
+    print(  # noqa: T201
+        f"{args.queries} queries over {args.events:,} events: "
+        f"p50 {percentiles[49]:.1f} ms, p95 {percentiles[94]:.1f} ms, "
+        f"p99 {percentiles[98]:.1f} ms, max {max(timings):.1f} ms",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Compare connection churn and latency of the database connection modes.
+
+Threads stand in for the workers of a deployment and run a loop of
+simulated requests, each going through Django's request signals (which
+close expired connections) and running a few queries:
+
+- ``per-request``: ``CONN_MAX_AGE=0``, the ASGI default;
+- ``persistent``: ``CONN_MAX_AGE=--conn-max-age``, the WSGI default;
+- ``pool``: the psycopg pool of ``DJANGO_DATABASE_POOL``.
+
+The report shows throughput, latency percentiles, the physical connections
+opened and, for the pool, how long requests waited for a connection. Use
+a short ``--conn-max-age`` to see expiries within the run, and as many
+threads as gunicorn workers x threads. Needs Postgres and psycopg[pool]:
+
+    DATABASE_URL=postgres://... python benchmarks/db_pool.py --threads 16
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.signals import request_finished  # noqa: E402
+from django.core.signals import request_started  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+
+from event_scheduler.utils.db_pool import pool_metrics  # noqa: E402
+
+MODES = ("per-request", "persistent", "pool")
+
+
+class ConnectionCounter:
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            self.count += 1
+
+
+def configure(mode, args):
+    database = settings.DATABASES["default"]
+    database["ATOMIC_REQUESTS"] = False
+    options = database.setdefault("OPTIONS", {})
+    options.pop("pool", None)
+    if mode == "pool":
+        database["CONN_MAX_AGE"] = 0
+        # Django passes the pool its connection check, as in production
+        database["CONN_HEALTH_CHECKS"] = True
+        options["pool"] = {"min_size": args.pool_min, "max_size": args.pool_max}
+    else:
+        database["CONN_MAX_AGE"] = 0 if mode == "per-request" else args.conn_max_age
+
+
+def simulate(deadline, queries, think, latencies):
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        request_started.send(sender=None)
+        try:
+            with connection.cursor() as cursor:
+                for _ in range(queries):
+                    cursor.execute("SELECT 1")
+                    cursor.fetchone()
+        finally:
+            request_finished.send(sender=None)
+        latencies.append(time.perf_counter() - started)
+        time.sleep(think)
+    connection.close()
+
+
+def run(mode, args):
+    configure(mode, args)
+    counter = ConnectionCounter()
+    connection_created.connect(counter)
+    latencies = []
+    deadline = time.monotonic() + args.duration
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        futures = [
+            pool.submit(
+                simulate,
+                deadline,
+                args.queries,
+                args.think_ms / 1000,
+                latencies,
+            )
+            for _ in range(args.threads)
+        ]
+        # Re-raise the first error of a worker, e.g. an unreachable database
+        for future in futures:
+            future.result()
+    elapsed = time.monotonic() - started
+    connection_created.disconnect(counter)
+
+    opened = counter.count
+    waits = ""
+    if mode == "pool":
+        metrics = pool_metrics()["default"]
+        # connection_created fires on every checkout from the pool
+        opened = metrics["connections_opened"]
+        waits = (
+            f", {metrics['queued']:,} waited for a connection "
+            f"({metrics['mean_wait_ms']:.1f}ms mean), "
+            f"{metrics['timeouts']} timed out"
+        )
+        connections["default"].close_pool()
+
+    latencies.sort()
+    print(  # noqa: T201
+        f"{mode:>11}: {len(latencies) / elapsed:,.0f} req/s, "
+        f"p50 {statistics.median(latencies) * 1000:.2f}ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}ms, "
+        f"{opened:,} connections opened "
+        f"({opened / len(latencies):.2%} of requests){waits}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--queries", type=int, default=3, help="per request")
+    parser.add_argument("--think-ms", type=float, default=5, help="between requests")
+    parser.add_argument("--conn-max-age", type=int, default=10)
+    parser.add_argument("--pool-min", type=int, default=2)
+    parser.add_argument("--pool-max", type=int, default=8)
+    args = parser.parse_args()
+
+    if connection.vendor != "postgresql":
+        parser.error("needs a Postgres DATABASE_URL")
+    for mode in args.modes:
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Find the batch size above which offloading recurrence expansion pays off.
+
+Compares in-process expansion with ``ExpansionExecutor``'s process pool for
+batches of synthetic series of growing estimated cost and suggests a value
+for ``DJANGO_EVENTS_EXPANSION_POOL_THRESHOLD``:
+
+    python benchmarks/expansion_pool.py --workers 4
+
+Besides raw latency, the pool frees the calling worker's GIL for the whole
+expansion, which matters more for gthread workers than the speed-up itself.
+"""
+
+import argparse
+import sys
+import time
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from event_scheduler.events.expansion import ExpansionExecutor
+from event_scheduler.events.expansion import estimate_cost
+from event_scheduler.events.expansion import run_expansion_job
+
+RULES = (
+    "RRULE:FREQ=DAILY;INTERVAL=1",
+    "RRULE:FREQ=WEEKLY;INTERVAL=1;BYDAY=MO,WE,FR",
+    "RRULE:FREQ=MONTHLY;INTERVAL=1;BYDAY=2TU",
+)
+
+
+def make_jobs(series, years_back, window_days):
+    window_start = datetime(2025, 1, 1, tzinfo=UTC)
+    window_end = window_start + timedelta(days=window_days)
+    dtstart = window_start - timedelta(days=365 * years_back)
+    return [
+        (
+            RULES[i % len(RULES)],
+            dtstart,
+            timedelta(hours=1),
+            [],
+            window_start,
+            window_end,
+        )
+        for i in range(series)
+    ]
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--window-days", type=int, default=31)
+    parser.add_argument("--speedup", type=float, default=1.2)
+    args = parser.parse_args()
+
+    executor = ExpansionExecutor(workers=args.workers, threshold=0)
+    executor.warm()
+    executor.run(make_jobs(args.workers * 4, 1, 1))  # make sure workers are up
+
+    print(f"{'series':>7} {'years':>5} {'cost':>9} {'inline ms':>10} {'pool ms':>9}")  # noqa: T201
+    suggestion = None
+    for series, years_back in ((4, 1), (10, 2), (20, 3), (50, 5), (100, 5), (200, 10)):
+        jobs = make_jobs(series, years_back, args.window_days)
+        cost = sum(estimate_cost(job) for job in jobs)
+        inline = best_of(
+            lambda jobs=jobs: [run_expansion_job(j) for j in jobs],
+            args.repeat,
+        )
+        pooled = best_of(lambda jobs=jobs: executor.run(jobs), args.repeat)
+        print(  # noqa: T201
+            f"{series:>7} {years_back:>5} {cost:>9} "
+            f"{inline * 1000:>10.1f} {pooled * 1000:>9.1f}",
+        )
+        if suggestion is None and inline >= pooled * args.speedup:
+            suggestion = cost
+    executor.shutdown()
+
+    if suggestion is None:
+        print("The pool never won; keep it disabled on this machine.")  # noqa: T201
+    else:
+        print(f"DJANGO_EVENTS_EXPANSION_POOL_THRESHOLD={suggestion}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
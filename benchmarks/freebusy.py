@@ -0,0 +1,108 @@
+"""
+Measure ``/api/freebusy/`` for a meeting planner asking about many people.
+
+``--users`` users (kept between runs) get ``--events`` one-off events each
+over a year, plus a few daily and weekly series. The busy intervals of all
+of them over one week are then computed with a cold cache (every calendar
+queried and expanded) and a warm one (every calendar cached at its events
+version), and the latency percentiles are reported. Needs Postgres with
+the migrations applied:
+
+    DATABASE_URL=postgres://... python benchmarks/freebusy.py --users 50
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+
+from event_scheduler.events.freebusy import busy_intervals  # noqa: E402
+from event_scheduler.events.models import Event  # noqa: E402
+from event_scheduler.users.models import User  # noqa: E402
+
+YEAR_START = datetime(2024, 1, 1, tzinfo=UTC)
+RULES = ("RRULE:FREQ=DAILY", "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR")
+
+
+def populate(count, events, rng):
+    users = []
+    for index in range(count):
+        user, created = User.objects.get_or_create(
+            email=f"freebusy-benchmark-{index}@example.com",
+        )
+        users.append(user)
+        if not created:
+            continue
+        batch = []
+        for _ in range(events):
+            start = YEAR_START + timedelta(minutes=30 * rng.randrange(365 * 48))
+            end = start + timedelta(minutes=30 * rng.randint(1, 4))
+            batch.append(Event(user=user, title="Busy", start=start, end=end))
+        for rule in RULES:
+            start = YEAR_START + timedelta(hours=rng.randint(8, 17))
+            batch.append(
+                Event(
+                    user=user,
+                    title="Series",
+                    start=start,
+                    end=start + timedelta(minutes=30),
+                    is_recurring=True,
+                    recurrence_rule=rule,
+                ),
+            )
+        Event.objects.bulk_create(batch)
+    return [user.pk for user in users]
+
+
+def measure(user_ids, rng, runs, *, cold):
+    timings = []
+    for _ in range(runs):
+        start_dt = YEAR_START + timedelta(weeks=rng.randrange(50))
+        end_dt = start_dt + timedelta(weeks=1)
+        if cold:
+            cache.clear()
+        else:
+            busy_intervals(user_ids, start_dt, end_dt)
+        started = time.perf_counter()
+        busy_intervals(user_ids, start_dt, end_dt)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)  # noqa: S311
+
+    user_ids = populate(args.users, args.events, rng)
+    for label, cold in (("cold", True), ("warm", False)):
+        timings = measure(user_ids, rng, args.runs, cold=cold)
+        percentiles = statistics.quantiles(timings, n=100)
+        print(  # noqa: T201
+            f"{label}: {args.users} users, one week: "
+            f"p50 {percentiles[49]:.1f} ms, p95 {percentiles[94]:.1f} ms, "
+            f"p99 {percentiles[98]:.1f} ms",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Load test comparing the WSGI and ASGI deployments of the calendar views.
+
+Start the stack once per mode with the same WEB_CONCURRENCY, e.g.
+
+    DJANGO_SERVER_MODE=wsgi docker compose -f docker-compose.production.yml up
+    DJANGO_SERVER_MODE=asgi docker compose -f docker-compose.production.yml up
+
+then run against each of them with the same settings:
+
+    python benchmarks/loadtest_views.py https://example.com \\
+        --cookie auth_session=<access token> --workers 4 --concurrency 64
+
+The report shows throughput, latency percentiles and the number of requests
+in flight per worker (Little's law: throughput x mean latency / workers).
+Only the standard library is used so it runs from any machine.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+PATHS = ("/api/calendar/", "/api/upcoming/")
+
+
+def _worker(opener, base_url, deadline, latencies, errors):
+    i = 0
+    while time.monotonic() < deadline:
+        url = base_url + PATHS[i % len(PATHS)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            with opener.open(url, timeout=30) as response:
+                response.read()
+        except Exception:  # noqa: BLE001
+            errors.append(url)
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def run(base_url, cookie, concurrency, duration):
+    opener = urllib.request.build_opener()
+    if cookie:
+        opener.addheaders = [("Cookie", cookie)]
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(_worker, opener, base_url, deadline, latencies, errors)
+    return latencies, errors, time.monotonic() - started
+
+
+def report(latencies, errors, elapsed, workers):
+    if not latencies:
+        print(f"no successful requests, {len(errors)} errors")  # noqa: T201
+        return
+    latencies.sort()
+    throughput = len(latencies) / elapsed
+    mean = statistics.fmean(latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"requests:        {len(latencies)} ok, {len(errors)} errors")  # noqa: T201
+    print(f"throughput:      {throughput:.1f} req/s")  # noqa: T201
+    print(  # noqa: T201
+        f"latency ms:      p50={quantiles[49] * 1000:.1f} "
+        f"p95={quantiles[94] * 1000:.1f} p99={quantiles[98] * 1000:.1f}",
+    )
+    print(f"in flight/worker {throughput * mean / workers:.1f}")  # noqa: T201
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("base_url")
+    parser.add_argument("--cookie", default="", help="e.g. auth_session=<token>")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=4, help="WEB_CONCURRENCY")
+    args = parser.parse_args()
+
+    threading.stack_size(256 * 1024)
+    latencies, errors, elapsed = run(
+        args.base_url.rstrip("/"),
+        args.cookie,
+        args.concurrency,
+        args.duration,
+    )
+    report(latencies, errors, elapsed, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Check that the reminder scheduler keeps up with a million active series.
+
+Builds synthetic series (mostly daily and weekly rules started years ago,
+plus one-off events), then measures what ``run_reminders`` does with them:
+
+- loading one window into the heap, which has to finish well within half a
+  window since the next window is loaded while the current one runs out;
+- firing every reminder of the window second by second, including the
+  worst burst (many series share the same time of day), which bounds the
+  lateness of a reminder;
+- applying edits as change notifications would.
+
+Rows are built in memory: add the time to stream them from Postgres
+(``load_chunks``) for a full picture. Enqueueing the fired reminders is not
+included either.
+
+    DATABASE_URL=... python benchmarks/reminders.py --series 1000000
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from event_scheduler.events.reminders import ReminderScheduler  # noqa: E402
+from event_scheduler.events.reminders import Series  # noqa: E402
+
+NOW = datetime(2025, 1, 6, 0, 0, tzinfo=UTC)
+RULES = (
+    (0.70, "RRULE:FREQ=DAILY"),
+    (0.20, "RRULE:FREQ=WEEKLY;BYDAY=MO,WE,FR"),
+    (0.05, "RRULE:FREQ=MONTHLY;BYDAY=1MO"),
+    (0.05, None),
+)
+
+
+def make_series(count, seed=0):
+    rng = random.Random(seed)  # noqa: S311
+    weights = [weight for weight, _rule in RULES]
+    rules = rng.choices([rule for _weight, rule in RULES], weights, k=count)
+    series = []
+    for pk, rule in enumerate(rules, 1):
+        # Meetings start on the quarter hour, which makes for large bursts
+        time_of_day = timedelta(minutes=15 * rng.randrange(7 * 4, 20 * 4))
+        if rule is None:
+            start = NOW + timedelta(days=rng.randrange(0, 2)) + time_of_day
+        else:
+            start = NOW - timedelta(days=rng.randrange(30, 3 * 365)) + time_of_day
+        end = start + timedelta(hours=1)
+        series.append(Series(pk, pk % 50_000, start, end, bool(rule), rule, []))
+    return series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--series", type=int, default=1_000_000)
+    parser.add_argument("--window-hours", type=float, default=6)
+    parser.add_argument("--lead-minutes", type=float, default=10)
+    parser.add_argument("--edits", type=int, default=10_000)
+    args = parser.parse_args()
+
+    window = timedelta(hours=args.window_hours)
+    # The busiest part of the day
+    start = NOW + timedelta(hours=8)
+    end = start + window
+
+    started = time.perf_counter()
+    series = make_series(args.series)
+    print(f"built {len(series):,} series in {time.perf_counter() - started:.1f}s")  # noqa: T201
+
+    scheduler = ReminderScheduler(timedelta(minutes=args.lead_minutes))
+    started = time.perf_counter()
+    for row in series:
+        scheduler.add(row, start, end)
+    load = time.perf_counter() - started
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(  # noqa: T201
+        f"loaded {len(scheduler):,} reminders in {load:.1f}s "
+        f"({len(series) / load:,.0f} series/s), peak RSS {rss_mb:,.0f} MB",
+    )
+
+    rng = random.Random(1)  # noqa: S311
+    edited = rng.sample(series, min(args.edits, len(series)))
+    started = time.perf_counter()
+    for row in edited:
+        moved = row._replace(start=row.start + timedelta(minutes=30))
+        scheduler.replace(moved, start, end)
+    edits = time.perf_counter() - started
+    print(f"applied {len(edited):,} edits, {edits / len(edited) * 1e6:.0f}us each")  # noqa: T201
+
+    fired = 0
+    worst_burst = worst_burst_size = 0
+    firing = 0
+    now = start.timestamp()
+    while scheduler.next_at() is not None:
+        now = max(now + 1, scheduler.next_at())
+        started = time.perf_counter()
+        due = scheduler.pop_due(now)
+        elapsed = time.perf_counter() - started
+        firing += elapsed
+        fired += len(due)
+        if elapsed > worst_burst:
+            worst_burst, worst_burst_size = elapsed, len(due)
+    print(  # noqa: T201
+        f"fired {fired:,} reminders in {firing:.1f}s of CPU, worst burst "
+        f"{worst_burst_size:,} reminders in {worst_burst * 1000:.0f}ms",
+    )
+
+    budget = window.total_seconds() / 2
+    keeps_up = load + firing < budget
+    print(  # noqa: T201
+        f"load + firing take {(load + firing) / budget:.1%} of the half window: "
+        f"{'keeps up' if keeps_up else 'does NOT keep up'}",
+    )
+
+
+if __name__ == "__main__":
+    main()
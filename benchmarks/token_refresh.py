@@ -0,0 +1,130 @@
+"""
+Measure token refresh throughput with the refresh token blacklist.
+
+Runs the refresh serializer's work (decode and verify the refresh token,
+check it against the blacklist, blacklist it, sign the new pair) in a loop,
+without HTTP, for each blacklist store:
+
+- ``none``: rotation without any blacklist, the upper bound;
+- ``memory``: ``MemoryBlacklistStore``;
+- ``redis``: ``RedisBlacklistStore``, the bloom filter answering the checks;
+- ``redis-exists``: the same store checking every token in Redis, i.e. what
+  the bloom filter saves.
+
+The Redis stores need ``--redis-url``; the blacklist is filled with
+``--blacklisted`` entries first so the bloom filter is realistically loaded.
+
+    python benchmarks/token_refresh.py --redis-url redis://localhost:6379/15
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+
+from event_scheduler.users import blacklist  # noqa: E402
+from event_scheduler.users.api.tokens import BlacklistRefreshToken  # noqa: E402
+
+
+class ExistsBlacklistStore(blacklist.RedisBlacklistStore):
+    def contains(self, jti):
+        return bool(self.client.exists(f"{self.prefix}:{jti}"))
+
+
+class PlainRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
+
+
+class BlacklistRefreshSerializer(TokenRefreshSerializer):
+    token_class = BlacklistRefreshToken
+
+
+def make_tokens(count):
+    tokens = []
+    for user_id in range(count):
+        token = RefreshToken()
+        token["user_id"] = user_id
+        tokens.append(str(token))
+    return tokens
+
+
+def fill(store, count):
+    exp = time.time() + 3600
+    if isinstance(store, blacklist.RedisBlacklistStore):
+        now = time.time()
+        with store.client.pipeline(transaction=False) as pipe:
+            for _ in range(count):
+                jti = uuid.uuid4().hex
+                pipe.set(f"{store.prefix}:{jti}", 1, ex=3600)
+                pipe.zadd(f"{store.prefix}:log", {jti: now})
+            pipe.execute()
+    else:
+        for _ in range(count):
+            store.add(uuid.uuid4().hex, exp)
+
+
+def make_store(name, args):
+    if name == "memory":
+        return blacklist.MemoryBlacklistStore()
+    if name == "redis-exists":
+        store_class = ExistsBlacklistStore
+    else:
+        store_class = blacklist.RedisBlacklistStore
+    store = store_class(
+        args.redis_url,
+        lifetime=7 * 24 * 3600,
+        prefix=f"bench:{uuid.uuid4().hex[:8]}",
+        capacity=max(args.blacklisted + args.refreshes, 1000),
+    )
+    store.client.ping()
+    return store
+
+
+def run(serializer_class, tokens):
+    started = time.perf_counter()
+    for raw in tokens:
+        serializer = serializer_class(data={"refresh": raw})
+        serializer.is_valid(raise_exception=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--refreshes", type=int, default=5000)
+    parser.add_argument("--blacklisted", type=int, default=100_000)
+    parser.add_argument("--redis-url")
+    args = parser.parse_args()
+
+    stores = ["none", "memory"]
+    if args.redis_url:
+        stores += ["redis", "redis-exists"]
+
+    for name in stores:
+        tokens = make_tokens(args.refreshes)
+        if name == "none":
+            elapsed = run(PlainRefreshSerializer, tokens)
+        else:
+            store = make_store(name, args)
+            fill(store, args.blacklisted)
+            blacklist._store = store  # noqa: SLF001
+            elapsed = run(BlacklistRefreshSerializer, tokens)
+        print(  # noqa: T201
+            f"{name:>12}: {args.refreshes / elapsed:,.0f} refreshes/s, "
+            f"{elapsed / args.refreshes * 1e6:.0f}us each",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 from django.urls import include
 from django.urls import path
 
+from event_scheduler.utils.views import DatabasePoolView
+
 urlpatterns = [
     path("", include("event_scheduler.users.api.urls")),
     # Your stuff: custom urls includes go here
     path("", include("event_scheduler.events.api.urls")),
+    path("health/db-pool/", DatabasePoolView.as_view(), name="db-pool"),
 ]
@@ -0,0 +1,40 @@
+"""
+ASGI config for Event Scheduler project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Production runs it with gunicorn and uvicorn workers when
+``DJANGO_SERVER_MODE=asgi`` (see ``compose/production/django/start``).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/dev/howto/deployment/asgi/
+
+"""
+
+import os
+import sys
+from pathlib import Path
+
+from django.core.asgi import get_asgi_application
+
+# This allows easy placement of apps within the interior
+# event_scheduler directory.
+BASE_DIR = Path(__file__).resolve(strict=True).parent.parent
+sys.path.append(str(BASE_DIR / "event_scheduler"))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
+
+# This application object is used by any ASGI server configured to use this file.
+application = get_asgi_application()
+
+# Static files are served here rather than by the sync-only
+# WhiteNoiseMiddleware, which is left out of MIDDLEWARE in asgi mode.
+from event_scheduler.utils.static import StaticFilesApp  # noqa: E402
+
+application = StaticFilesApp(application)
+
+# Start the recurrence expansion pool before the first request needs it.
+from django.conf import settings  # noqa: E402
+
+if settings.EVENTS_EXPANSION_POOL_WORKERS:
+    from event_scheduler.events.expansion import get_executor
+
+    get_executor().warm()
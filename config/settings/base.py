@@ -53,6 +53,17 @@ LOCALE_PATHS = [str(BASE_DIR / "locale")]
 # https://docs.djangoproject.com/en/dev/ref/settings/#databases
 DATABASES = {"default": env.db("DATABASE_URL")}
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# Optional read replicas, comma-separated database URLs. Safe-method API
+# requests read from them, see event_scheduler.utils.replicas.
+for _index, _url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[])):
+    DATABASES[f"replica_{_index}"] = {
+        **env.db_url_config(_url),
+        "TEST": {"MIRROR": "default"},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["event_scheduler.utils.replicas.ReplicaRouter"]
+# Seconds a client reads from the primary after writing, to cover the lag
+DATABASE_REPLICA_PIN_SECONDS = env.int("DATABASE_REPLICA_PIN_SECONDS", default=5)
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -62,6 +73,12 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 ROOT_URLCONF = "config.urls"
 # https://docs.djangoproject.com/en/dev/ref/settings/#wsgi-application
 WSGI_APPLICATION = "config.wsgi.application"
+# https://docs.djangoproject.com/en/dev/ref/settings/#asgi-application
+ASGI_APPLICATION = "config.asgi.application"
+# "wsgi" (sync gunicorn workers) or "asgi" (gunicorn + uvicorn workers)
+SERVER_MODE = env("DJANGO_SERVER_MODE", default="wsgi")
+# Route /api/calendar/ and /api/upcoming/ to their async views
+ASYNC_EVENT_VIEWS = env.bool("DJANGO_ASYNC_EVENT_VIEWS", default=SERVER_MODE == "asgi")
 
 # APPS
 # ------------------------------------------------------------------------------
@@ -74,6 +91,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -139,6 +157,9 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "event_scheduler.utils.middleware.SlowRequestMiddleware",
+    "event_scheduler.utils.middleware.RateLimitHeadersMiddleware",
+    "event_scheduler.utils.middleware.ReplicaRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -151,6 +172,10 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
 ]
+if SERVER_MODE == "asgi":
+    # Sync-only, it would make Django run every request's middleware chain in
+    # a thread; config.asgi serves static files instead
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
 
 # STATIC
 # ------------------------------------------------------------------------------
@@ -336,6 +361,7 @@ THIRD_PARTY_APPS_MORE = [
 
 LOCAL_APPS_MORE = [
     "event_scheduler.events",
+    "event_scheduler.tasks",
     # Add more local apps here
 ]
 
@@ -415,11 +441,37 @@ REST_FRAMEWORK = {
         # "rest_framework.authentication.SessionAuthentication",  # Session Based Authentication
         # "rest_framework.authentication.TokenAuthentication",  # Token Based Authentication
         # "rest_framework_simplejwt.authentication.JWTAuthentication",  # JWT Authentication
-        "dj_rest_auth.jwt_auth.JWTCookieAuthentication",  # JWT Cookie Authenticatio(comment out not to use cookies and use Authorization header)
+        # "dj_rest_auth.jwt_auth.JWTCookieAuthentication",  # JWT Cookie Authenticatio(comment out not to use cookies and use Authorization header)
+        "event_scheduler.users.api.authentication.CachedJWTCookieAuthentication",  # JWTCookieAuthentication with cached users
     ),
     "DEFAULT_PERMISSION_CLASSES": (),  # Override the above setting to allow unauthenticated access
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "EXCEPTION_HANDLER": "event_scheduler.utils.exceptions.custom_exception_handler",
+    # Only views with a throttle_scope having a rate below are throttled
+    "DEFAULT_THROTTLE_CLASSES": (
+        "event_scheduler.utils.throttling.UserTokenBucketThrottle",
+        "event_scheduler.utils.throttling.IPTokenBucketThrottle",
+    ),
+    # Proxies in front of the app, each appending to X-Forwarded-For: the
+    # client IP of the per-IP throttles is the one the outermost of them
+    # saw. Unset, DRF would trust the whole header, which clients can spoof
+    "NUM_PROXIES": env.int("DJANGO_NUM_PROXIES", default=0),
+    # "<scope>" per user, "<scope>_ip" per client IP; see
+    # event_scheduler.utils.throttling
+    "DEFAULT_THROTTLE_RATES": {
+        # One token per month of calendar range expanded
+        "calendar": "120/min",
+        "calendar_ip": "600/min",
+        # One token per attempt
+        "login_ip": "10/min",
+        # One token per month of range of /api/freebusy/, which has the
+        # occurrence budget of one calendar request
+        "freebusy": "120/min",
+        "freebusy_ip": "600/min",
+        # One token per connection to /api/stream/
+        "stream": "30/min",
+        "stream_ip": "120/min",
+    },
 }
 
 # Simple JWT Configuration
@@ -495,3 +547,232 @@ SPECTACULAR_SETTINGS = {
 
 # Storage settings
 USE_S3 = env.bool("DJANGO_USE_S3", default=False)
+
+# Sampling profiler
+# ------------------------------------------------------------------------------
+# Optional always-on stack sampler started from config/wsgi.py.
+# See event_scheduler.utils.profiling for details.
+SAMPLING_PROFILER_ENABLED = env.bool("DJANGO_SAMPLING_PROFILER", default=False)
+# Seconds between two samples (the sampler backs off on its own when needed)
+SAMPLING_PROFILER_INTERVAL = env.float(
+    "DJANGO_SAMPLING_PROFILER_INTERVAL",
+    default=0.01,
+)
+# Seconds covered by one collapsed-stack file per worker
+SAMPLING_PROFILER_ROTATE_SECONDS = env.int(
+    "DJANGO_SAMPLING_PROFILER_ROTATE_SECONDS",
+    default=300,
+)
+# Maximum share of wall-clock time the sampler may spend sampling
+SAMPLING_PROFILER_MAX_OVERHEAD = env.float(
+    "DJANGO_SAMPLING_PROFILER_MAX_OVERHEAD",
+    default=0.01,
+)
+SAMPLING_PROFILER_OUTPUT_DIR = env(
+    "DJANGO_SAMPLING_PROFILER_OUTPUT_DIR",
+    default=str(BASE_DIR / "profiles"),
+)
+
+# Slow-request log
+# ------------------------------------------------------------------------------
+# Requests slower than this emit a structured record on the
+# "event_scheduler.slow_requests" logger (0 disables the middleware).
+SLOW_REQUEST_THRESHOLD_MS = env.int("DJANGO_SLOW_REQUEST_THRESHOLD_MS", default=0)
+# Number of slowest recurrence rule expansions included in the record
+SLOW_REQUEST_TOP_RULES = env.int("DJANGO_SLOW_REQUEST_TOP_RULES", default=5)
+
+# Recurrence expansion pool
+# ------------------------------------------------------------------------------
+# Worker processes expanding large batches of recurring events off the request
+# thread (0 expands in-process). See event_scheduler.events.expansion and
+# benchmarks/expansion_pool.py for tuning.
+EVENTS_EXPANSION_POOL_WORKERS = env.int(
+    "DJANGO_EVENTS_EXPANSION_POOL_WORKERS",
+    default=0,
+)
+# Estimated occurrences iterated per request above which the pool is used
+EVENTS_EXPANSION_POOL_THRESHOLD = env.int(
+    "DJANGO_EVENTS_EXPANSION_POOL_THRESHOLD",
+    default=20_000,
+)
+EVENTS_EXPANSION_POOL_CHUNKS_PER_WORKER = env.int(
+    "DJANGO_EVENTS_EXPANSION_POOL_CHUNKS_PER_WORKER",
+    default=4,
+)
+
+# Task queue
+# ------------------------------------------------------------------------------
+# Background jobs run by `manage.py run_worker`. See event_scheduler.tasks.
+# "redis", "memory" (tests) or the dotted path of a backend class
+TASKS_BACKEND = env("DJANGO_TASKS_BACKEND", default="redis")
+TASKS_REDIS_URL = env("DJANGO_TASKS_REDIS_URL", default=REDIS_URL)
+TASKS_PREFIX = "tasks"
+# Threads per worker process
+TASKS_CONCURRENCY = env.int("DJANGO_TASKS_CONCURRENCY", default=4)
+# Run tasks in-process when enqueued instead of going through the queue
+TASKS_EAGER = env.bool("DJANGO_TASKS_EAGER", default=False)
+
+# Event change notifications
+# ------------------------------------------------------------------------------
+# Committed event edits are published on a Redis pub/sub channel for the
+# reminder scheduler. See event_scheduler.events.changes.
+EVENTS_CHANGES_ENABLED = env.bool("DJANGO_EVENTS_CHANGES_ENABLED", default=True)
+EVENTS_CHANGES_REDIS_URL = env("DJANGO_EVENTS_CHANGES_REDIS_URL", default=REDIS_URL)
+EVENTS_CHANGES_CHANNEL = "events:changes"
+
+# Reminders
+# ------------------------------------------------------------------------------
+# Run by `manage.py run_reminders`. See event_scheduler.events.reminders and
+# benchmarks/reminders.py for sizing.
+# How long before an occurrence its reminder is sent
+REMINDERS_LEAD_SECONDS = env.int("DJANGO_REMINDERS_LEAD_SECONDS", default=600)
+# Reminders are loaded this far ahead, one window at a time
+REMINDERS_WINDOW_SECONDS = env.int("DJANGO_REMINDERS_WINDOW_SECONDS", default=6 * 3600)
+REMINDERS_LOAD_CHUNK_SIZE = env.int("DJANGO_REMINDERS_LOAD_CHUNK_SIZE", default=2000)
+# Firing later than this logs a warning
+REMINDERS_MAX_LATENESS_SECONDS = env.int(
+    "DJANGO_REMINDERS_MAX_LATENESS_SECONDS",
+    default=5,
+)
+# How far back a new leader sends the reminders missed while nobody led
+REMINDERS_CATCH_UP_SECONDS = env.int("DJANGO_REMINDERS_CATCH_UP_SECONDS", default=300)
+# Postgres advisory lock held by the leading instance
+REMINDERS_LOCK_ID = env.int("DJANGO_REMINDERS_LOCK_ID", default=0x52454D49)
+
+# Authenticated user cache
+# ------------------------------------------------------------------------------
+# Users resolved from JWTs are cached in the default cache and in process
+# memory. See event_scheduler.users.cache.
+USER_CACHE_TIMEOUT = env.int("DJANGO_USER_CACHE_TIMEOUT", default=300)
+# Bounds how long another process may serve a user after it changed
+USER_CACHE_LOCAL_TIMEOUT = env.float("DJANGO_USER_CACHE_LOCAL_TIMEOUT", default=5)
+
+# Refresh token blacklist
+# ------------------------------------------------------------------------------
+# Rotated and logged out refresh tokens. "redis", "memory" or the dotted path
+# of a store class. See event_scheduler.users.blacklist.
+JWT_BLACKLIST_BACKEND = env("DJANGO_JWT_BLACKLIST_BACKEND", default="redis")
+JWT_BLACKLIST_REDIS_URL = env("DJANGO_JWT_BLACKLIST_REDIS_URL", default=REDIS_URL)
+# Bounds how long a token blacklisted by another process can still be used
+JWT_BLACKLIST_SYNC_INTERVAL = env.float("DJANGO_JWT_BLACKLIST_SYNC_INTERVAL", default=1)
+# Tokens blacklisted per REFRESH_TOKEN_LIFETIME the bloom filter is sized for
+JWT_BLACKLIST_BLOOM_CAPACITY = env.int(
+    "DJANGO_JWT_BLACKLIST_BLOOM_CAPACITY",
+    default=1_000_000,
+)
+JWT_BLACKLIST_BLOOM_ERROR_RATE = env.float(
+    "DJANGO_JWT_BLACKLIST_BLOOM_ERROR_RATE",
+    default=0.001,
+)
+
+# Throttling
+# ------------------------------------------------------------------------------
+# Token buckets of the DRF throttles, "redis" or "memory". Requests are let
+# through when Redis is unreachable. See event_scheduler.utils.throttling.
+THROTTLE_BACKEND = env("DJANGO_THROTTLE_BACKEND", default="redis")
+THROTTLE_REDIS_URL = env("DJANGO_THROTTLE_REDIS_URL", default=REDIS_URL)
+# Seconds; bounds the latency a Redis outage adds to throttled requests
+THROTTLE_REDIS_TIMEOUT = env.float("DJANGO_THROTTLE_REDIS_TIMEOUT", default=0.1)
+
+# Recurrence limits
+# ------------------------------------------------------------------------------
+# Bound the expansion work one request can cause. See
+# event_scheduler.events.occurrences and events.expansion.check_rule_cost.
+# Widest calendar range the API expands
+EVENTS_MAX_RANGE_DAYS = env.int("DJANGO_EVENTS_MAX_RANGE_DAYS", default=366)
+# Occurrences (estimated, then actual) one request may expand
+EVENTS_OCCURRENCE_BUDGET = env.int("DJANGO_EVENTS_OCCURRENCE_BUDGET", default=50_000)
+# Rules denser or longer than this are rejected when saved
+EVENTS_MAX_OCCURRENCES_PER_YEAR = env.int(
+    "DJANGO_EVENTS_MAX_OCCURRENCES_PER_YEAR",
+    default=366,
+)
+EVENTS_MAX_RECURRENCE_COUNT = env.int(
+    "DJANGO_EVENTS_MAX_RECURRENCE_COUNT",
+    default=5000,
+)
+
+# Bulk API
+# ------------------------------------------------------------------------------
+# Operations accepted by one /api/events/bulk/ request
+EVENTS_BULK_MAX_OPERATIONS = env.int("DJANGO_EVENTS_BULK_MAX_OPERATIONS", default=500)
+
+# Calendar imports
+# ------------------------------------------------------------------------------
+# .ics uploads to /api/imports/, imported by a job on the "imports" queue
+EVENTS_IMPORT_MAX_BYTES = env.int(
+    "DJANGO_EVENTS_IMPORT_MAX_BYTES",
+    default=200 * 1024 * 1024,
+)
+# Events per bulk_create, and between progress updates
+EVENTS_IMPORT_BATCH_SIZE = env.int("DJANGO_EVENTS_IMPORT_BATCH_SIZE", default=1000)
+
+# Calendar feeds
+# ------------------------------------------------------------------------------
+# Rows fetched per round trip by the server-side cursor of /api/feed/<token>.ics
+EVENTS_FEED_CHUNK_SIZE = env.int("DJANGO_EVENTS_FEED_CHUNK_SIZE", default=2000)
+# Feeds up to this size are cached, keyed by the events version
+EVENTS_FEED_CACHE_MAX_BYTES = env.int(
+    "DJANGO_EVENTS_FEED_CACHE_MAX_BYTES",
+    default=2 * 1024 * 1024,
+)
+EVENTS_FEED_CACHE_TIMEOUT = env.int("DJANGO_EVENTS_FEED_CACHE_TIMEOUT", default=86400)
+
+# Delta sync
+# ------------------------------------------------------------------------------
+# /api/events/sync/, see event_scheduler.events.sync
+# Events (and deleted ids) per response
+EVENTS_SYNC_PAGE_SIZE = env.int("DJANGO_EVENTS_SYNC_PAGE_SIZE", default=500)
+# Changes of the last seconds are sent again, to cover transactions that
+# commit after a later one
+EVENTS_SYNC_OVERLAP_SECONDS = env.int("DJANGO_EVENTS_SYNC_OVERLAP_SECONDS", default=60)
+# Sync tokens expire, forcing a full resync, and tombstones are purged
+# (purge_sync_tombstones) after this
+EVENTS_SYNC_TOKEN_MAX_AGE_DAYS = env.int(
+    "DJANGO_EVENTS_SYNC_TOKEN_MAX_AGE_DAYS",
+    default=30,
+)
+
+# Change streams
+# ------------------------------------------------------------------------------
+# Server-sent events at /api/stream/, fed by the change channel. See
+# event_scheduler.events.stream.
+EVENTS_STREAM_ENABLED = env.bool(
+    "DJANGO_EVENTS_STREAM_ENABLED",
+    default=SERVER_MODE == "asgi" and EVENTS_CHANGES_ENABLED,
+)
+# Comment lines sent on idle streams so proxies don't time them out
+EVENTS_STREAM_HEARTBEAT_SECONDS = env.int(
+    "DJANGO_EVENTS_STREAM_HEARTBEAT_SECONDS",
+    default=15,
+)
+# Streams are closed after this and reopened by the client
+EVENTS_STREAM_MAX_SECONDS = env.int("DJANGO_EVENTS_STREAM_MAX_SECONDS", default=3600)
+# Milliseconds browsers wait before reconnecting
+EVENTS_STREAM_RETRY_MS = env.int("DJANGO_EVENTS_STREAM_RETRY_MS", default=3000)
+# Changes waiting to be sent to one stream before it's resynced instead
+EVENTS_STREAM_QUEUE_SIZE = env.int("DJANGO_EVENTS_STREAM_QUEUE_SIZE", default=100)
+# Changes replayed on reconnection; clients with more missed reload instead
+EVENTS_STREAM_REPLAY_LIMIT = env.int("DJANGO_EVENTS_STREAM_REPLAY_LIMIT", default=500)
+
+# Search
+# ------------------------------------------------------------------------------
+# /api/events/search/, see event_scheduler.events.search
+EVENTS_SEARCH_PAGE_SIZE = env.int("DJANGO_EVENTS_SEARCH_PAGE_SIZE", default=20)
+# Matches examined per request when a date range filters them after the query
+EVENTS_SEARCH_SCAN_LIMIT = env.int("DJANGO_EVENTS_SEARCH_SCAN_LIMIT", default=1000)
+# Title suggestions of /api/events/autocomplete/, cached per prefix
+EVENTS_AUTOCOMPLETE_CACHE_TIMEOUT = env.int(
+    "DJANGO_EVENTS_AUTOCOMPLETE_CACHE_TIMEOUT",
+    default=60,
+)
+
+# Free/busy
+# ------------------------------------------------------------------------------
+# /api/freebusy/, see event_scheduler.events.freebusy
+EVENTS_FREEBUSY_MAX_USERS = env.int("DJANGO_EVENTS_FREEBUSY_MAX_USERS", default=50)
+# Busy intervals are cached per user, keyed by their events version
+EVENTS_FREEBUSY_CACHE_TIMEOUT = env.int(
+    "DJANGO_EVENTS_FREEBUSY_CACHE_TIMEOUT",
+    default=3600,
+)
@@ -71,6 +71,11 @@ INSTALLED_APPS += ["django_extensions"]
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# The local stack has no Redis: run background tasks in the request
+TASKS_EAGER = env.bool("DJANGO_TASKS_EAGER", default=True)
+EVENTS_CHANGES_ENABLED = env.bool("DJANGO_EVENTS_CHANGES_ENABLED", default=False)
+JWT_BLACKLIST_BACKEND = env("DJANGO_JWT_BLACKLIST_BACKEND", default="memory")
+THROTTLE_BACKEND = env("DJANGO_THROTTLE_BACKEND", default="memory")
 
 
 # My stuff
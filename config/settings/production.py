@@ -3,6 +3,8 @@ from .base import *  # noqa: F403
 from .base import DATABASES
 from .base import INSTALLED_APPS
 from .base import REDIS_URL
+from .base import REST_FRAMEWORK
+from .base import SERVER_MODE
 from .base import SPECTACULAR_SETTINGS
 from .base import env
 
@@ -15,7 +17,39 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["example.com"])
 
 # DATABASES
 # ------------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+# Either a psycopg connection pool per worker process, shared by its threads
+# (the async ORM's included), or persistent connections. Persistent
+# connections are per thread, and the async ORM runs queries in short-lived
+# threads, so they are off by default under ASGI.
+# Pool metrics: /api/health/db-pool/ and the slow request records.
+DATABASE_POOL = env.bool("DJANGO_DATABASE_POOL", default=False)
+for _database in DATABASES.values():
+    if DATABASE_POOL:
+        # The pool replaces persistent connections
+        _database["CONN_MAX_AGE"] = 0
+        _database.setdefault("OPTIONS", {})["pool"] = {
+            # Per worker: workers x max_size must stay below max_connections
+            "min_size": env.int("DJANGO_DATABASE_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DJANGO_DATABASE_POOL_MAX_SIZE", default=10),
+            # Seconds a request waits for a connection before failing
+            "timeout": env.float("DJANGO_DATABASE_POOL_TIMEOUT", default=10),
+            # Seconds before idle connections above min_size are closed
+            "max_idle": env.float("DJANGO_DATABASE_POOL_MAX_IDLE", default=600),
+            # Connections are recycled after max_lifetime
+            "max_lifetime": env.float(
+                "DJANGO_DATABASE_POOL_MAX_LIFETIME",
+                default=3600,
+            ),
+        }
+        # Django passes ConnectionPool.check_connection to the pool, so
+        # connections are checked on checkout and a restarted database
+        # doesn't hand out dead ones
+        _database["CONN_HEALTH_CHECKS"] = True
+    else:
+        _database["CONN_MAX_AGE"] = env.int(
+            "CONN_MAX_AGE",
+            default=0 if SERVER_MODE == "asgi" else 60,
+        )
 
 # CACHES
 # ------------------------------------------------------------------------------
@@ -182,6 +216,8 @@ LOGGING = {
 
 # django-rest-framework
 # -------------------------------------------------------------------------------
+# Behind Traefik, which appends the client IP to X-Forwarded-For
+REST_FRAMEWORK["NUM_PROXIES"] = env.int("DJANGO_NUM_PROXIES", default=1)
 # Tools that generate code samples can use SERVERS to point to the correct domain
 SPECTACULAR_SETTINGS["SERVERS"] = [
     {"url": "https://example.com", "description": "Production server"},
@@ -36,3 +36,7 @@ TEMPLATES[0]["OPTIONS"]["debug"] = True  # type: ignore[index]
 MEDIA_URL = "http://media.testserver/"
 # Your stuff...
 # ------------------------------------------------------------------------------
+TASKS_BACKEND = "memory"
+EVENTS_CHANGES_ENABLED = False
+JWT_BLACKLIST_BACKEND = "memory"
+THROTTLE_BACKEND = "memory"
@@ -30,3 +30,18 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.production")
 # file. This includes Django's development server, if the WSGI_APPLICATION
 # setting points here.
 application = get_wsgi_application()
+
+# Optionally sample the stacks of request threads into collapsed-stack files.
+# See event_scheduler.utils.profiling.
+from django.conf import settings  # noqa: E402
+
+if settings.SAMPLING_PROFILER_ENABLED:
+    from event_scheduler.utils.profiling import StackSampler
+
+    application = StackSampler.from_settings().track(application)
+
+# Start the recurrence expansion pool before the first request needs it.
+if settings.EVENTS_EXPANSION_POOL_WORKERS:
+    from event_scheduler.events.expansion import get_executor
+
+    get_executor().warm()
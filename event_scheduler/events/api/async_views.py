@@ -0,0 +1,165 @@
+"""
+Async counterparts of ``CalendarView`` and ``UpcomingEventsView``, and the
+server-sent events stream of event changes.
+
+DRF views are sync-only, so under an ASGI server these plain Django async
+views serve the same payloads without tying up a worker while Postgres
+answers. They are routed instead of the DRF views when
+``ASYNC_EVENT_VIEWS`` is enabled (see ``event_scheduler.events.api.urls``).
+"""
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import JsonResponse
+from django.http import StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from event_scheduler.events.occurrences import RangeError
+from event_scheduler.events.occurrences import calendar_events
+from event_scheduler.events.occurrences import expand_events
+from event_scheduler.events.occurrences import parse_calendar_range
+from event_scheduler.events.occurrences import range_cost
+from event_scheduler.events.occurrences import range_error_message
+from event_scheduler.events.occurrences import upcoming_events
+from event_scheduler.events.occurrences import upcoming_range
+from event_scheduler.events.stream import change_stream
+from event_scheduler.events.stream import parse_last_event_id
+from event_scheduler.utils.throttling import check_throttles
+
+
+def _authenticate(request, view):
+    """
+    Run the configured DRF authentication classes and throttles on a Django
+    request, in the order DRF views do.
+    """
+    drf_request = Request(
+        request,
+        authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES],
+    )
+    if not drf_request.user.is_authenticated:
+        raise exceptions.NotAuthenticated
+    check_throttles(drf_request, view)
+    return drf_request.user
+
+
+def _json(data, status=200):
+    # DRF's encoder keeps the datetime format identical to the sync views
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def _error(exc):
+    response = _json({"detail": str(exc.detail)}, status=exc.status_code)
+    if getattr(exc, "wait", None) is not None:
+        response["Retry-After"] = str(exc.wait)
+    return response
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class AsyncEventsView(View):
+    """
+    Authenticate and throttle like the DRF views, then hand over to ``aget``.
+    Occurrence expansion is CPU-bound and runs in a worker thread so it
+    doesn't stall the event loop. Async views can't run in
+    ``ATOMIC_REQUESTS`` transactions, and reads don't need one.
+    """
+
+    http_method_names = ["get", "head", "options"]
+    throttle_scope = "calendar"
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user = await sync_to_async(_authenticate)(request, self)
+        except exceptions.APIException as exc:
+            return _error(exc)
+        request.user = user
+        return await self.aget(request, user)
+
+    async def aget(self, request, user):
+        raise NotImplementedError
+
+    @staticmethod
+    async def expand(queryset, start_dt, end_dt):
+        events = [event async for event in queryset]
+        return await sync_to_async(expand_events, thread_sensitive=False)(
+            events,
+            start_dt,
+            end_dt,
+        )
+
+
+class AsyncCalendarView(AsyncEventsView):
+    """
+    Async version of ``CalendarView``, same query parameters and response.
+
+    Example: /api/calendar/?start=2023-06-01&end=2023-06-30
+    """
+
+    def get_throttle_cost(self, request):
+        try:
+            return range_cost(*parse_calendar_range(request.query_params))
+        except ValueError:
+            return 1
+
+    async def aget(self, request, user):
+        try:
+            start_dt, end_dt = parse_calendar_range(request.GET)
+            occurrences = await self.expand(
+                calendar_events(user, start_dt, end_dt),
+                start_dt,
+                end_dt,
+            )
+        except ValueError as e:
+            return _json({"error": range_error_message(e)}, status=400)
+        return _json(occurrences)
+
+
+class AsyncUpcomingEventsView(AsyncEventsView):
+    """
+    Async version of ``UpcomingEventsView``, same response.
+
+    Example: /api/upcoming/
+    """
+
+    async def aget(self, request, user):
+        now, end_dt = upcoming_range()
+        try:
+            occurrences = await self.expand(upcoming_events(user, now), now, end_dt)
+        except RangeError as e:
+            return _json({"error": str(e)}, status=400)
+        return _json(occurrences[:50])
+
+
+class EventStreamView(AsyncEventsView):
+    """
+    Server-sent events announcing the changes to the user's events, to
+    refetch what changed instead of polling (see ``events.stream``).
+
+    Example:
+    const source = new EventSource("/api/stream/", {withCredentials: true});
+    source.addEventListener("change", (e) => JSON.parse(e.data));
+    // {"op": "saved" | "deleted", "event_id": 42}
+    source.addEventListener("reset", () => reloadEverything());
+
+    Browsers reconnect on their own, sending Last-Event-ID, and get the
+    changes they missed.
+    """
+
+    throttle_scope = "stream"
+
+    async def aget(self, request, user):
+        since = parse_last_event_id(
+            request.headers.get("Last-Event-ID", request.GET.get("lastEventId")),
+        )
+        response = StreamingHttpResponse(
+            change_stream(user.pk, since),
+            content_type="text/event-stream",
+        )
+        response["Cache-Control"] = "no-cache"
+        # Ask proxies not to buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
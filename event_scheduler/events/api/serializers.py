@@ -1,8 +1,81 @@
+import re
+
+from django.conf import settings
 from django.utils import timezone
 from rest_framework import serializers
 
+from event_scheduler.events.expansion import check_rule_cost
+from event_scheduler.events.models import CalendarImport
 from event_scheduler.events.models import Event
 
+BYDAY_RE = re.compile(
+    r"^[+-]?\d{0,2}(MO|TU|WE|TH|FR|SA|SU)(,[+-]?\d{0,2}(MO|TU|WE|TH|FR|SA|SU))*$",
+)
+MAX_INTERVAL = 1000
+
+
+def check_recurrence_values(recurrence):
+    """
+    Check the values copied into the RRULE string, so they can't carry
+    other RRULE parts (``"byday": "MO;FREQ=SECONDLY"``).
+    """
+    interval = recurrence.get("interval", 1)
+    if not isinstance(interval, int) or not 1 <= interval <= MAX_INTERVAL:
+        msg = f"interval must be an integer between 1 and {MAX_INTERVAL}"
+        raise ValueError(msg)
+    if recurrence.get("byday") and not BYDAY_RE.match(str(recurrence["byday"])):
+        msg = "byday must be a list of weekdays such as MO or 2TU,-1FR"
+        raise ValueError(msg)
+    bysetpos = recurrence.get("bysetpos")
+    if bysetpos and (not isinstance(bysetpos, int) or not -366 <= bysetpos <= 366):  # noqa: PLR2004
+        msg = "bysetpos must be an integer between -366 and 366"
+        raise ValueError(msg)
+    count = recurrence.get("count")
+    if count and (not isinstance(count, int) or count < 1):
+        msg = "count must be a positive integer"
+        raise ValueError(msg)
+
+
+class EventListSerializer(serializers.ListSerializer):
+    """
+    ``EventSerializer(many=True)``: validates a list of new events, or, given
+    a list of instances, updates of those instances (item by item), and saves
+    them with a single ``bulk_create`` or ``bulk_update``.
+
+    Bulk queries don't send model signals: callers invalidate the events
+    version and publish the changes themselves.
+    """
+
+    def to_internal_value(self, data):
+        self._instances = iter(self.instance or [])
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        # Each update is validated against its own instance
+        self.child.instance = next(self._instances, None)
+        self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        events = []
+        for attrs in validated_data:
+            attrs.pop("recurrence", None)
+            events.append(Event(**attrs))
+        return Event.objects.bulk_create(events)
+
+    def update(self, instance, validated_data):
+        # auto_now isn't applied by bulk_update
+        now = timezone.now()
+        fields = {"updated_at"}
+        for event, attrs in zip(instance, validated_data, strict=True):
+            attrs.pop("recurrence", None)
+            for field, value in attrs.items():
+                setattr(event, field, value)
+                fields.add(field)
+            event.updated_at = now
+        Event.objects.bulk_update(instance, sorted(fields))
+        return instance
+
 
 class EventSerializer(serializers.ModelSerializer):
     """
@@ -57,6 +130,7 @@ class EventSerializer(serializers.ModelSerializer):
             "recurrence",
         ]
         read_only_fields = ["id", "recurrence_rule"]
+        list_serializer_class = EventListSerializer
 
     def validate(self, data):  # noqa: C901, PLR0912
         """
@@ -90,6 +164,7 @@ class EventSerializer(serializers.ModelSerializer):
                 )
 
             try:
+                check_recurrence_values(recurrence)
                 freq_map = {
                     "daily": "DAILY",
                     "weekly": "WEEKLY",
@@ -147,9 +222,120 @@ class EventSerializer(serializers.ModelSerializer):
             except Exception as e:  # noqa: BLE001
                 raise serializers.ValidationError(f"Invalid recurrence rule: {e!s}")  # noqa: B904, EM102, TRY003
 
+            self.check_recurrence_cost(data)
+
         return data
 
+    def check_recurrence_cost(self, data):
+        """Reject rules too expensive to expand, see ``check_rule_cost``."""
+        start = data.get("start") or getattr(self.instance, "start", None)
+        if start is None:
+            return
+        try:
+            check_rule_cost(
+                data["recurrence_rule"],
+                start,
+                settings.EVENTS_MAX_OCCURRENCES_PER_YEAR,
+                settings.EVENTS_MAX_RECURRENCE_COUNT,
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({"recurrence": str(e)}) from e
+
     def create(self, validated_data):
         # Remove temporary fields
         validated_data.pop("recurrence", None)
         return super().create(validated_data)
+
+
+class BulkOperationSerializer(serializers.Serializer):
+    """One operation of ``/api/events/bulk/``."""
+
+    op = serializers.ChoiceField(choices=["create", "update", "delete"])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] != "create" and "id" not in attrs:
+            raise serializers.ValidationError({"id": "This field is required."})
+        if attrs["op"] != "delete" and "data" not in attrs:
+            raise serializers.ValidationError({"data": "This field is required."})
+        return attrs
+
+
+class BulkEventsSerializer(serializers.Serializer):
+    """
+    Body of ``/api/events/bulk/``:
+    {
+        "operations": [
+            {"op": "create", "data": {<event>}},
+            {"op": "update", "id": 42, "data": {<changed fields>}},
+            {"op": "delete", "id": 43}
+        ]
+    }
+    At most ``EVENTS_BULK_MAX_OPERATIONS`` operations, each event at most once.
+    """
+
+    operations = BulkOperationSerializer(many=True, allow_empty=False)
+
+    def validate_operations(self, operations):
+        limit = settings.EVENTS_BULK_MAX_OPERATIONS
+        if len(operations) > limit:
+            msg = f"At most {limit} operations are allowed per request"
+            raise serializers.ValidationError(msg)
+        ids = [operation["id"] for operation in operations if "id" in operation]
+        if len(ids) != len(set(ids)):
+            msg = "Each event can only appear in one operation"
+            raise serializers.ValidationError(msg)
+        return operations
+
+
+class CalendarImportSerializer(serializers.ModelSerializer):
+    """
+    An .ics import: the uploaded ``file``, then its progress.
+
+    Fields:
+    - status: "pending", "running", "done" or "failed"
+    - progress: percentage of the file read
+    - events_imported, events_skipped: VEVENTs imported so far, and those
+      skipped (no start, unsupported or too expensive recurrence rule)
+    - error: why a failed import stopped
+    """
+
+    file = serializers.FileField(write_only=True)
+
+    class Meta:
+        model = CalendarImport
+        fields = [
+            "id",
+            "file",
+            "status",
+            "progress",
+            "size",
+            "events_imported",
+            "events_skipped",
+            "error",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = [
+            "id",
+            "status",
+            "progress",
+            "size",
+            "events_imported",
+            "events_skipped",
+            "error",
+            "created_at",
+            "finished_at",
+        ]
+
+    def validate_file(self, file):
+        limit = settings.EVENTS_IMPORT_MAX_BYTES
+        if file.size > limit:
+            msg = f"The file can't be larger than {limit // (1024 * 1024)} MB"
+            raise serializers.ValidationError(msg)
+        if not file.read(15).startswith(b"BEGIN:VCALENDAR"):
+            msg = "Not an iCalendar (.ics) file"
+            raise serializers.ValidationError(msg)
+        file.seek(0)
+        return file
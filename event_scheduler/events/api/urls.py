@@ -3,18 +3,44 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 from rest_framework.routers import SimpleRouter
 
+from .async_views import AsyncCalendarView
+from .async_views import AsyncUpcomingEventsView
+from .async_views import EventStreamView
+from .views import CalendarFeedTokenView
+from .views import CalendarFeedView
+from .views import CalendarImportViewSet
 from .views import CalendarView
+from .views import DashboardView
 from .views import EventViewSet
+from .views import FreeBusyView
 from .views import UpcomingEventsView
 
 # Use DefaultRouter in debug mode for the browsable API; otherwise, use SimpleRouter
 router = DefaultRouter() if settings.DEBUG else SimpleRouter()
 
 router.register(r"events", EventViewSet, basename="event")
+router.register(r"imports", CalendarImportViewSet, basename="calendar-import")
 
 urlpatterns = router.urls
 
+# Serve the read-heavy views from their async versions when running under ASGI
+if settings.ASYNC_EVENT_VIEWS:
+    calendar_view = AsyncCalendarView.as_view()
+    upcoming_view = AsyncUpcomingEventsView.as_view()
+else:
+    calendar_view = CalendarView.as_view()
+    upcoming_view = UpcomingEventsView.as_view()
+
 urlpatterns += [
-    path("calendar/", CalendarView.as_view(), name="calendar-view"),
-    path("upcoming/", UpcomingEventsView.as_view(), name="upcoming-events"),
+    path("calendar/", calendar_view, name="calendar-view"),
+    path("upcoming/", upcoming_view, name="upcoming-events"),
+    path("dashboard/", DashboardView.as_view(), name="dashboard"),
+    path("freebusy/", FreeBusyView.as_view(), name="freebusy"),
+    path("feed/", CalendarFeedTokenView.as_view(), name="calendar-feed-token"),
+    path("feed/<str:token>.ics", CalendarFeedView.as_view(), name="calendar-feed"),
 ]
+
+# Streams are held open: only an ASGI server can serve them without a
+# thread per client
+if settings.EVENTS_STREAM_ENABLED:
+    urlpatterns += [path("stream/", EventStreamView.as_view(), name="event-stream")]
@@ -1,17 +1,72 @@
+import hashlib
 from datetime import timedelta
 
-from django.db.models import Q
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import Http404
+from django.http import HttpResponse
+from django.http import HttpResponseNotModified
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import parse_etags
+from django.views import View
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics
+from rest_framework import mixins
 from rest_framework import serializers
 from rest_framework import status
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-
+from rest_framework.views import APIView
+
+from event_scheduler.events.cache import bump_events_version
+from event_scheduler.events.cache import get_events_version
+from event_scheduler.events.changes import publish_changes
+from event_scheduler.events.feeds import astream_feed
+from event_scheduler.events.feeds import body_cache_key
+from event_scheduler.events.feeds import feed_user_id
+from event_scheduler.events.feeds import rotate_feed_token
+from event_scheduler.events.feeds import stream_feed
+from event_scheduler.events.freebusy import FreeBusyError
+from event_scheduler.events.freebusy import busy_intervals
+from event_scheduler.events.freebusy import parse_user_ids
+from event_scheduler.events.freebusy import visible_user_ids
+from event_scheduler.events.models import CalendarFeed
+from event_scheduler.events.models import CalendarImport
 from event_scheduler.events.models import Event
-
+from event_scheduler.events.models import EventTombstone
+from event_scheduler.events.occurrences import UPCOMING_DAYS
+from event_scheduler.events.occurrences import RangeError
+from event_scheduler.events.occurrences import calendar_events
+from event_scheduler.events.occurrences import expand_events
+from event_scheduler.events.occurrences import expand_ranges
+from event_scheduler.events.occurrences import parse_calendar_range
+from event_scheduler.events.occurrences import range_cost
+from event_scheduler.events.occurrences import range_error_message
+from event_scheduler.events.occurrences import upcoming_events
+from event_scheduler.events.occurrences import upcoming_range
+from event_scheduler.events.search import MAX_SUGGESTIONS
+from event_scheduler.events.search import SearchCursorError
+from event_scheduler.events.search import decode_cursor
+from event_scheduler.events.search import encode_cursor
+from event_scheduler.events.search import remember_titles
+from event_scheduler.events.search import search_events
+from event_scheduler.events.search import title_suggestions
+from event_scheduler.events.sync import SyncTokenError
+from event_scheduler.events.sync import sync_changes
+from event_scheduler.events.tasks import import_calendar
+from event_scheduler.users.api.serializers import UserDetailsSerializer
+from event_scheduler.users.api.serializers import UserProfileSerializer
+from event_scheduler.users.cache import get_cached_representation
+from event_scheduler.users.cache import get_user_version
+
+from .serializers import BulkEventsSerializer
+from .serializers import CalendarImportSerializer
 from .serializers import EventSerializer
 
 
@@ -173,8 +228,328 @@ class EventViewSet(viewsets.ModelViewSet):
         # Default: delete entire event
         return super().destroy(request, *args, **kwargs)
 
+    @action(detail=False, methods=["post"])
+    def bulk(self, request, *args, **kwargs):  # noqa: C901
+        """
+        Create, update and delete many events in one request and one
+        transaction.
+
+        Example:
+        POST /api/events/bulk/
+        {
+            "operations": [
+                {"op": "create", "data": {"title": "Standup", ...}},
+                {"op": "update", "id": 42, "data": {"title": "Updated Title"}},
+                {"op": "delete", "id": 43}
+            ]
+        }
+
+        Updates are partial. The response has one result per operation, in
+        order:
+        {
+            "results": [
+                {"op": "create", "status": 201, "data": {<event>}},
+                {"op": "update", "status": 200, "data": {<event>}},
+                {"op": "delete", "status": 204, "id": 43}
+            ]
+        }
+
+        If any operation fails nothing is applied: the response is a 400
+        where the failed operations have status 400 (or 404 for unknown
+        events) and their "errors", and the others status 424.
+        """
+        body = BulkEventsSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        operations = body.validated_data["operations"]
+        results = [{"op": operation["op"]} for operation in operations]
+
+        events = self.get_queryset().in_bulk(
+            [operation["id"] for operation in operations if "id" in operation],
+        )
+        indexes = {"create": [], "update": [], "delete": []}
+        for index, operation in enumerate(operations):
+            if operation["op"] != "create" and operation["id"] not in events:
+                results[index].update(status=404, errors={"id": "Not found."})
+            else:
+                indexes[operation["op"]].append(index)
+
+        creates = self.get_serializer(
+            data=[operations[i]["data"] for i in indexes["create"]],
+            many=True,
+        )
+        updates = self.get_serializer(
+            [events[operations[i]["id"]] for i in indexes["update"]],
+            data=[operations[i]["data"] for i in indexes["update"]],
+            many=True,
+            partial=True,
+        )
+        for serializer, op in ((creates, "create"), (updates, "update")):
+            if not serializer.is_valid():
+                for index, errors in zip(indexes[op], serializer.errors, strict=True):
+                    if errors:
+                        results[index].update(status=400, errors=errors)
+
+        if any("errors" in result for result in results):
+            for result in results:
+                result.setdefault("status", 424)
+            return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+        self.perform_bulk(
+            creates,
+            updates,
+            [operations[i]["id"] for i in indexes["delete"]],
+        )
+        for index, data in zip(indexes["create"], creates.data, strict=True):
+            results[index].update(status=201, data=data)
+        for index, data in zip(indexes["update"], updates.data, strict=True):
+            results[index].update(status=200, data=data)
+        for index in indexes["delete"]:
+            results[index].update(status=204, id=operations[index]["id"])
+        return Response({"results": results})
+
+    @action(detail=False, methods=["get"])
+    def sync(self, request, *args, **kwargs):
+        """
+        Events changed since a sync token, for clients keeping a local copy.
+
+        GET /api/events/sync/             (first sync: every event)
+        GET /api/events/sync/?token=...   (what changed since)
+
+        {
+            "events": [<event saved since>, ...],
+            "deleted": [43, ...],
+            "token": "...",
+            "more": false,
+            "reset": false
+        }
+
+        Send "token" with the next request. While "more" is true, ask again
+        right away for the next page. "reset" means a full resync: the
+        token expired (or none was sent) and the client should replace its
+        events with those returned. The same change may be returned twice.
+        """
+        try:
+            changes = sync_changes(request.user, request.query_params.get("token"))
+        except SyncTokenError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        changes["events"] = self.get_serializer(changes["events"], many=True).data
+        return Response(changes)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request, *args, **kwargs):
+        """
+        Full-text search of the user's events, best match first.
+
+        GET /api/events/search/?q=team standup
+        GET /api/events/search/?q="design review" -draft&start=2023-06-01&end=2023-06-30
+
+        q uses web search syntax: quoted phrases, "or", and "-" to exclude.
+        With start or end, only one-time events starting in the range and
+        series with an occurrence in it are returned.
+
+        {
+            "results": [
+                {<event>, "rank": 0.6, "next_occurrence": {"start": ..., "end": ...}},
+                ...
+            ],
+            "next": "<cursor>"
+        }
+
+        next_occurrence is the first occurrence in the range (from now
+        without one), or null. Pass "next" as ?cursor= for the next page;
+        it's null on the last one.
+        """
+        params = request.query_params
+        text = params.get("q", "").strip()
+        if not text:
+            return Response(
+                {"error": "q query parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start_dt = end_dt = cursor = None
+            if "start" in params or "end" in params:
+                start_dt, end_dt = parse_calendar_range(params)
+            if params.get("cursor"):
+                cursor = decode_cursor(params["cursor"])
+        except SearchCursorError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response(
+                {"error": range_error_message(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        matches, cursor = search_events(
+            request.user,
+            text,
+            start_dt,
+            end_dt,
+            cursor,
+        )
+        data = self.get_serializer([event for event, _, _ in matches], many=True).data
+        results = []
+        for item, (_, rank, occurrence) in zip(data, matches, strict=True):
+            item["rank"] = rank
+            item["next_occurrence"] = (
+                None
+                if occurrence is None
+                else {"start": occurrence[0], "end": occurrence[1]}
+            )
+            results.append(item)
+        return Response(
+            {
+                "results": results,
+                "next": None if cursor is None else encode_cursor(cursor),
+            },
+        )
+
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request, *args, **kwargs):
+        """
+        Suggest titles from the user's events for what's been typed.
+
+        GET /api/events/autocomplete/?q=stan&limit=5
+
+        {"results": ["Standup", "Stand-up review"]}
+
+        At most "limit" (default 10, up to 20) distinct titles, most similar
+        first; small typos are tolerated. Fewer than 2 characters return nothing.
+        """
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        titles = title_suggestions(
+            request.user,
+            request.query_params.get("q", ""),
+            min(max(limit, 1), MAX_SUGGESTIONS),
+        )
+        return Response({"results": titles})
+
+    def perform_bulk(self, creates, updates, deleted):
+        user = self.request.user
+        with transaction.atomic():
+            creates.save(user=user)
+            updates.save()
+            if deleted:
+                # Nothing references events: a single DELETE, without the
+                # collector's SELECT and per-row signals (handled below)
+                Event.objects.filter(pk__in=deleted)._raw_delete(Event.objects.db)  # noqa: SLF001
+                EventTombstone.objects.bulk_create(
+                    EventTombstone(user=user, event_id=pk) for pk in deleted
+                )
+            bump_events_version(user.pk)
+            saved = [*creates.instance, *updates.instance]
+            remember_titles(saved)
+            publish_changes("saved", [event.pk for event in saved], user.pk)
+            publish_changes("deleted", deleted, user.pk)
+
+
+@extend_schema(tags=["event"])
+class CalendarImportViewSet(
+    mixins.CreateModelMixin,
+    mixins.RetrieveModelMixin,
+    mixins.ListModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    API endpoint importing .ics files.
+
+    Upload a file (multipart, field "file") to create an import; it runs in
+    the background and its progress is polled on the import.
+
+    Example:
+    POST /api/imports/        -> 202 {"id": 7, "status": "pending", ...}
+    GET /api/imports/7/       -> {"status": "running", "progress": 42.5, ...}
+    """
+
+    serializer_class = CalendarImportSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return CalendarImport.objects.filter(user=self.request.user).order_by(
+            "-created_at",
+        )
+
+    def perform_create(self, serializer):
+        record = serializer.save(
+            user=self.request.user,
+            size=serializer.validated_data["file"].size,
+        )
+        import_calendar.delay(record.pk)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = status.HTTP_202_ACCEPTED
+        return response
+
+
+@extend_schema(tags=["event"])
+class CalendarFeedTokenView(APIView):
+    """
+    API endpoint for the user's .ics subscription URL, to add to calendar
+    apps. Anyone with the URL can read the calendar: POST replaces it with a
+    new one, and the previous URL stops working.
+
+    Example: /api/feed/
+    Response: {"url": "https://example.com/api/feed/<token>.ics"}
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        feed, _ = CalendarFeed.objects.get_or_create(user=request.user)
+        return Response(self.representation(feed))
+
+    def post(self, request, *args, **kwargs):
+        feed, created = CalendarFeed.objects.get_or_create(user=request.user)
+        if not created:
+            rotate_feed_token(feed)
+        return Response(self.representation(feed))
+
+    def representation(self, feed):
+        url = reverse("calendar-feed", kwargs={"token": feed.token})
+        return {"url": self.request.build_absolute_uri(url)}
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class CalendarFeedView(View):
+    """
+    The .ics feed of the user owning ``token``, authenticated by the token
+    alone so calendar apps can poll it (see ``events.feeds``).
+
+    Example: /api/feed/<token>.ics
+    """
+
+    http_method_names = ["get", "head"]
+    content_type = "text/calendar; charset=utf-8"
+
+    def get(self, request, token):
+        user_id = feed_user_id(token)
+        if user_id is None:
+            raise Http404
+        version = get_events_version(user_id)
+        headers = {"ETag": f'"{version}"', "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        if headers["ETag"] in parse_etags(if_none_match):
+            return HttpResponseNotModified(headers=headers)
+
+        key = body_cache_key(user_id, version)
+        body = cache.get(key)
+        if body is not None:
+            return HttpResponse(body, content_type=self.content_type, headers=headers)
+        # Django would consume a sync iterator whole under ASGI
+        stream = astream_feed if isinstance(request, ASGIRequest) else stream_feed
+        return StreamingHttpResponse(
+            stream(user_id, key),
+            content_type=self.content_type,
+            headers=headers,
+        )
+
 
 @extend_schema(tags=["event"])
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
 class CalendarView(generics.ListAPIView):
     """
     API endpoint for retrieving events in calendar view format.
@@ -196,54 +571,29 @@ class CalendarView(generics.ListAPIView):
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
     queryset = Event.objects.none()  # Add this line to satisfy DRF requirements
+    throttle_scope = "calendar"
 
-    def list(self, request, *args, **kwargs):
-        start_str = request.query_params.get("start")
-        end_str = request.query_params.get("end")
-
-        # Default to current month
-        if not start_str:
-            start_dt = timezone.now().replace(day=1, hour=0, minute=0, second=0)
-        else:
-            start_dt = timezone.datetime.fromisoformat(start_str)
-            if timezone.is_naive(start_dt):
-                start_dt = timezone.make_aware(start_dt)
-
-        if not end_str:
-            end_dt = (start_dt + timedelta(days=31)).replace(day=1)
-        else:
-            end_dt = timezone.datetime.fromisoformat(end_str)
-            if timezone.is_naive(end_dt):
-                end_dt = timezone.make_aware(end_dt)
-
-        events = Event.objects.filter(
-            Q(user=request.user)
-            & (
-                Q(start__range=(start_dt, end_dt))
-                | Q(end__range=(start_dt, end_dt))
-                | Q(is_recurring=True)
-            ),
-        )
-
-        occurrences = []
-        for event in events:
-            for occ in event.get_occurrences(start_dt, end_dt):
-                if not occ["cancelled"]:
-                    occurrences.append(  # noqa: PERF401
-                        {
-                            "id": event.id,
-                            "title": event.title,
-                            "start": occ["start"],
-                            "end": occ["end"],
-                            "description": event.description,
-                            "is_recurring": event.is_recurring,
-                        },
-                    )
+    def get_throttle_cost(self, request):
+        try:
+            return range_cost(*parse_calendar_range(request.query_params))
+        except ValueError:
+            return 1
 
-        return Response(sorted(occurrences, key=lambda x: x["start"]))
+    def list(self, request, *args, **kwargs):
+        try:
+            start_dt, end_dt = parse_calendar_range(request.query_params)
+            events = calendar_events(request.user, start_dt, end_dt)
+            occurrences = expand_events(events, start_dt, end_dt)
+        except ValueError as e:
+            return Response(
+                {"error": range_error_message(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(occurrences)
 
 
 @extend_schema(tags=["event"])
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
 class UpcomingEventsView(generics.ListAPIView):
     """
     API endpoint for retrieving upcoming events in list view format.
@@ -263,30 +613,174 @@ class UpcomingEventsView(generics.ListAPIView):
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated]
     queryset = Event.objects.none()  # Add this line to satisfy DRF requirements
+    throttle_scope = "calendar"
 
     def list(self, request, *args, **kwargs):
-        now = timezone.now()
-        end_dt = now + timedelta(days=30)
+        now, end_dt = upcoming_range()
+        events = upcoming_events(request.user, now)
+        try:
+            occurrences = expand_events(events, now, end_dt)
+        except RangeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Sorted by start time, limited to 50 occurrences
+        return Response(occurrences[:50])
+
+
+@extend_schema(tags=["event"])
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class DashboardView(APIView):
+    """
+    API endpoint returning everything the dashboard page shows in one
+    response: the user, their profile, the upcoming occurrences (as
+    /api/upcoming/) and the calendar month (as /api/calendar/).
+
+    Query Parameters:
+    - start, end: calendar range, as for /api/calendar/
+
+    Example: /api/dashboard/?start=2023-06-01&end=2023-06-30
+
+    The events are fetched and expanded once for both sections. The user
+    and profile come from the same cache as /api/auth/user/ and
+    /api/user/profile/. The response carries an ETag derived from the
+    versions of the user's data, so a matching If-None-Match gets a 304
+    without touching the database; upcoming occurrences are computed from
+    the start of the current minute so the ETag holds for that minute.
+
+    Like the calendar views, it doesn't run in an ``ATOMIC_REQUESTS``
+    transaction: reads don't need one, and it would hold a primary
+    connection during the expansion.
+    """
 
-        events = Event.objects.filter(
-            Q(user=request.user) & (Q(end__gte=now) | Q(is_recurring=True)),
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "calendar"
+
+    def get_throttle_cost(self, request):
+        # The upcoming section costs a month more
+        try:
+            return range_cost(*parse_calendar_range(request.query_params)) + 1
+        except ValueError:
+            return 1
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        try:
+            start_dt, end_dt = parse_calendar_range(request.query_params)
+        except ValueError as e:
+            return Response(
+                {"error": range_error_message(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        now = timezone.now().replace(second=0, microsecond=0)
+
+        etag = self.get_etag(user, start_dt, end_dt, now)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("If-None-Match", "")
+        if etag in parse_etags(if_none_match) or if_none_match.strip() == "*":
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        key = f"dashboard:{user.pk}:{etag}"
+        data = cache.get(key)
+        if data is None:
+            try:
+                data = self.build(user, start_dt, end_dt, now)
+            except RangeError as e:
+                return Response(
+                    {"error": str(e)},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            cache.set(key, data, 60)
+        return Response(data, headers=headers)
+
+    @staticmethod
+    def get_etag(user, start_dt, end_dt, now):
+        parts = (
+            get_user_version(user.pk),
+            get_events_version(user.pk),
+            start_dt.isoformat(),
+            end_dt.isoformat(),
+            now.isoformat(),
         )
+        digest = hashlib.blake2b(":".join(parts).encode(), digest_size=16)
+        return f'"{digest.hexdigest()}"'
+
+    @staticmethod
+    def build(user, start_dt, end_dt, now):
+        upcoming, calendar = expand_ranges(
+            user,
+            [(now, now + timedelta(days=UPCOMING_DAYS)), (start_dt, end_dt)],
+        )
+        return {
+            "user": get_cached_representation(
+                user.pk,
+                "details",
+                lambda: dict(UserDetailsSerializer(user).data),
+            ),
+            "profile": get_cached_representation(
+                user.pk,
+                "profile",
+                lambda: dict(UserProfileSerializer(user.profile).data),
+            ),
+            "upcoming": upcoming[:50],
+            "calendar": {"start": start_dt, "end": end_dt, "events": calendar},
+        }
 
-        occurrences = []
-        for event in events:
-            for occ in event.get_occurrences(now, end_dt):
-                if not occ["cancelled"]:
-                    occurrences.append(  # noqa: PERF401
-                        {
-                            "id": event.id,
-                            "title": event.title,
-                            "start": occ["start"],
-                            "end": occ["end"],
-                            "description": event.description,
-                            "is_recurring": event.is_recurring,
-                        },
-                    )
 
-        # Sort and limit to 50 occurrences
-        sorted_occ = sorted(occurrences, key=lambda x: x["start"])
-        return Response(sorted_occ[:50])
+@extend_schema(tags=["event"])
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class FreeBusyView(APIView):
+    """
+    API endpoint returning when several users are busy, for scheduling
+    across people: the merged intervals of their occurrences in a range,
+    never their titles.
+
+    Query Parameters:
+    - users: comma-separated user ids, at most EVENTS_FREEBUSY_MAX_USERS
+    - start, end: range, as for /api/calendar/
+
+    Example: /api/freebusy/?users=3,7&start=2024-06-03&end=2024-06-08
+
+    Users appear in the order asked for; those whose free/busy isn't
+    shared with the requester, or don't exist, get an error instead of
+    intervals.
+    """
+
+    permission_classes = [IsAuthenticated]
+    throttle_scope = "freebusy"
+
+    def get_throttle_cost(self, request):
+        try:
+            # Bounded by one occurrence budget, it costs what a calendar
+            # request of the same range does
+            return range_cost(*parse_calendar_range(request.query_params))
+        except ValueError:
+            return 1
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        try:
+            user_ids = parse_user_ids(params.get("users"))
+            start_dt, end_dt = parse_calendar_range(params)
+            visible = visible_user_ids(request.user, user_ids)
+            busy = busy_intervals(
+                [pk for pk in user_ids if pk in visible],
+                start_dt,
+                end_dt,
+            )
+        except FreeBusyError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response(
+                {"error": range_error_message(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        users = [
+            {
+                "id": pk,
+                "busy": [{"start": start, "end": end} for start, end in busy[pk]],
+            }
+            if pk in busy
+            else {"id": pk, "error": "Not found"}
+            for pk in user_ids
+        ]
+        return Response({"start": start_dt, "end": end_dt, "users": users})
@@ -1,6 +1,12 @@
+import contextlib
+
 from django.apps import AppConfig
 
 
 class EventsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "event_scheduler.events"
+
+    def ready(self):
+        with contextlib.suppress(ImportError):
+            import event_scheduler.events.signals  # noqa: F401
@@ -0,0 +1,45 @@
+"""
+Per-user version of the events data.
+
+The version is replaced whenever one of the user's events is saved or
+deleted (see ``events.signals``), so responses derived from the events can
+be cached, or given ETags, keyed by it. Updates bypassing ``save()`` and
+``delete()`` (``QuerySet.update()``, bulk operations) must bump it
+themselves.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(user_id):
+    return f"events:{user_id}:version"
+
+
+def get_events_version(user_id):
+    return cache.get_or_set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def get_events_versions(user_ids):
+    """``{user_id: version}``, in one cache round trip once they're all set."""
+    keys = {_version_key(user_id): user_id for user_id in user_ids}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for user_id in user_ids:
+        if user_id not in versions:
+            versions[user_id] = get_events_version(user_id)
+    return versions
+
+
+def bump_events_version(user_id):
+    """
+    Invalidate now and again once the transaction commits: a concurrent
+    request may cache the events as they were before the commit in between.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
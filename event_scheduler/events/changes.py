@@ -0,0 +1,122 @@
+"""
+Event change notifications.
+
+Every committed create/update/delete of an ``Event`` is published as
+
+    {"op": "saved" | "deleted", "event_id": 1, "user_id": 1, "at": 1700000000.0}
+
+on the ``EVENTS_CHANGES_CHANNEL`` Redis pub/sub channel, so long-running
+consumers (the reminder scheduler) can follow edits without rescanning the
+table. Pub/sub is fire-and-forget: consumers that were disconnected catch up
+from ``Event.updated_at`` (see ``ChangeListener``).
+"""
+
+import contextlib
+import json
+import logging
+import time
+from functools import partial
+
+import redis
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def get_redis():
+    global _client  # noqa: PLW0603
+    if _client is None:
+        _client = redis.Redis.from_url(settings.EVENTS_CHANGES_REDIS_URL)
+    return _client
+
+
+def publish_change(op, event_id, user_id):
+    """Publish a change once the current transaction commits."""
+    if not settings.EVENTS_CHANGES_ENABLED:
+        return
+    message = {"op": op, "event_id": event_id, "user_id": user_id, "at": time.time()}
+    transaction.on_commit(partial(_publish, message))
+
+
+def publish_changes(op, event_ids, user_id):
+    """Like ``publish_change`` for many events, published in one round trip."""
+    if not settings.EVENTS_CHANGES_ENABLED or not event_ids:
+        return
+    at = time.time()
+    messages = [
+        {"op": op, "event_id": event_id, "user_id": user_id, "at": at}
+        for event_id in event_ids
+    ]
+    transaction.on_commit(partial(_publish_many, messages))
+
+
+def _publish_many(messages):
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        for message in messages:
+            pipeline.publish(settings.EVENTS_CHANGES_CHANNEL, json.dumps(message))
+        pipeline.execute()
+    except redis.RedisError:
+        logger.warning(
+            "Could not publish %d event changes",
+            len(messages),
+            exc_info=True,
+        )
+
+
+def _publish(message):
+    try:
+        get_redis().publish(settings.EVENTS_CHANGES_CHANNEL, json.dumps(message))
+    except redis.RedisError:
+        # Consumers resync from updated_at; never fail the request over this
+        logger.warning("Could not publish event change %s", message, exc_info=True)
+
+
+class ChangeListener:
+    """
+    Subscriber to the change channel.
+
+    ``poll`` returns the ids of the events changed since the previous call,
+    and ``resync_since``: ``None`` normally, or the time from which messages
+    may have been lost after the connection to Redis dropped.
+    """
+
+    def __init__(self, client=None, channel=None):
+        self.client = client or get_redis()
+        self.channel = channel or settings.EVENTS_CHANGES_CHANNEL
+        self._pubsub = None
+        self._last_ok = time.time()
+
+    def poll(self, timeout):
+        resync_since = None
+        if self._pubsub is None:
+            try:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(self.channel)
+            except redis.RedisError:
+                self._pubsub = None
+                time.sleep(timeout)
+                return set(), None
+            resync_since = self._last_ok
+
+        ids = set()
+        try:
+            message = self._pubsub.get_message(timeout=timeout)
+            while message is not None:
+                ids.add(json.loads(message["data"])["event_id"])
+                message = self._pubsub.get_message(timeout=0)
+        except redis.RedisError:
+            logger.warning("Lost the event change subscription", exc_info=True)
+            self.close()
+            return ids, self._last_ok
+        self._last_ok = time.time()
+        return ids, resync_since
+
+    def close(self):
+        if self._pubsub is not None:
+            with contextlib.suppress(redis.RedisError):
+                self._pubsub.close()
+            self._pubsub = None
@@ -0,0 +1,133 @@
+"""
+Daily agenda digests, sent by ``manage.py send_agenda_digests``.
+
+Users are streamed in primary key order, ``chunk_size`` at a time. Each
+chunk costs one query for the users and one for their events; the recurring
+series of the whole chunk are expanded as one batch, which an
+``ExpansionExecutor`` spreads over its process pool. Messages go out over a
+single email connection, and progress is saved in ``AgendaDigestRun`` after
+every chunk, so a crashed run resumes after the last chunk sent (at worst
+the chunk being sent during the crash is sent twice).
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from datetime import time as dt_time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from event_scheduler.events.models import AgendaDigestRun
+from event_scheduler.events.models import Event
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+def day_range(day):
+    """Aware bounds of ``day`` in the current time zone, both inclusive."""
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), dt_time.min))
+    return start, end - timedelta(microseconds=1)
+
+
+def user_chunks(after_pk, chunk_size):
+    """Yield lists of active users with an email, in keyset-ordered chunks."""
+    queryset = (
+        User.objects.filter(is_active=True)
+        .exclude(email="")
+        .order_by("pk")
+        .only("pk", "email", "first_name", "last_name")
+    )
+    while True:
+        users = list(queryset.filter(pk__gt=after_pk)[:chunk_size])
+        if not users:
+            return
+        yield users
+        after_pk = users[-1].pk
+
+
+def chunk_agendas(users, start, end, executor):
+    """
+    Return ``(user, occurrences)`` for the users of the chunk having
+    occurrences between ``start`` and ``end``, using one query.
+    """
+    events = list(
+        Event.objects.filter(user__in=users).filter(
+            Q(start__range=(start, end)) | Q(is_recurring=True, start__lte=end),
+        ),
+    )
+    series = [event for event in events if event.is_recurring]
+    results = executor.run([event.expansion_job(start, end) for event in series])
+    expanded = dict(zip((id(event) for event in series), results, strict=True))
+
+    occurrences = defaultdict(list)
+    for event in events:
+        for occ in event.get_occurrences(start, end, expanded.get(id(event))):
+            occurrences[event.user_id].append(
+                {"title": event.title, "start": occ["start"], "end": occ["end"]},
+            )
+
+    return [
+        (user, sorted(occurrences[user.pk], key=lambda occ: occ["start"]))
+        for user in users
+        if occurrences[user.pk]
+    ]
+
+
+def render_digest(user, day, occurrences):
+    context = {"user": user, "day": day, "occurrences": occurrences}
+    message = EmailMultiAlternatives(
+        subject=f"Your agenda for {day:%A %d %B}",
+        body=render_to_string("events/email/agenda_digest.txt", context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[user.email],
+    )
+    message.attach_alternative(
+        render_to_string("events/email/agenda_digest.html", context),
+        "text/html",
+    )
+    return message
+
+
+def send_digests(day, connection, executor, chunk_size=1000, *, restart=False):
+    """
+    Send the digests of ``day`` that haven't been sent yet; returns the
+    ``AgendaDigestRun``.
+    """
+    run, _created = AgendaDigestRun.objects.get_or_create(date=day)
+    if restart:
+        run.last_user_id, run.users_sent, run.finished_at = 0, 0, None
+        run.save()
+    elif run.finished_at is not None:
+        logger.info("Agenda digests of %s were already sent", day)
+        return run
+    elif run.last_user_id:
+        logger.info(
+            "Resuming agenda digests of %s after user %d",
+            day,
+            run.last_user_id,
+        )
+
+    start, end = day_range(day)
+    for users in user_chunks(run.last_user_id, chunk_size):
+        messages = [
+            render_digest(user, day, occurrences)
+            for user, occurrences in chunk_agendas(users, start, end, executor)
+        ]
+        if messages:
+            connection.send_messages(messages)
+        run.last_user_id = users[-1].pk
+        run.users_sent += len(messages)
+        run.save(update_fields=["last_user_id", "users_sent"])
+
+    run.finished_at = timezone.now()
+    run.save(update_fields=["finished_at"])
+    return run
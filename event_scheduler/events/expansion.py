@@ -0,0 +1,341 @@
+"""
+Recurrence expansion, optionally offloaded to a process pool.
+
+dateutil expansion is pure-Python CPU work that holds the GIL, so one large
+calendar request stalls every other thread of a gthread worker. An
+``ExpansionExecutor`` ships picklable expansion jobs
+
+    (rule, dtstart, duration, exceptions, window_start, window_end[, limit])
+
+to a warm ``ProcessPoolExecutor`` once the estimated work of a request
+exceeds ``EVENTS_EXPANSION_POOL_THRESHOLD`` and runs them in-process
+otherwise, or whenever the pool is disabled or broken.
+
+This module must stay importable without Django being set up: pool workers
+import it on their own.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import MAXYEAR
+from datetime import datetime
+from datetime import timedelta
+from itertools import islice
+from itertools import takewhile
+
+from dateutil.relativedelta import relativedelta
+from dateutil.rrule import rruleset
+from dateutil.rrule import rrulestr
+
+logger = logging.getLogger(__name__)
+
+# Approximate length of one period of each frequency, in seconds
+FREQ_SECONDS = {
+    "YEARLY": 365.25 * 86400,
+    "MONTHLY": 30.44 * 86400,
+    "WEEKLY": 7 * 86400,
+    "DAILY": 86400,
+    "HOURLY": 3600,
+    "MINUTELY": 60,
+    "SECONDLY": 1,
+}
+DAY_OR_LONGER = {"YEARLY", "MONTHLY", "WEEKLY", "DAILY"}
+
+
+def normalize_rule(rule):
+    rule_str = rule.strip()
+    if not rule_str.startswith("RRULE:"):
+        rule_str = "RRULE:" + rule_str
+    return rule_str
+
+
+def rule_parts(rule):
+    """Split an RRULE string into a ``{"FREQ": "DAILY", ...}`` dict."""
+    body = normalize_rule(rule).removeprefix("RRULE:")
+    return dict(part.split("=", 1) for part in body.split(";") if "=" in part)
+
+
+def bounded_rule(rule, dtstart, until):
+    """
+    Parse ``rule``, ending it at ``until`` at the latest. dateutil walks
+    period after period until the next match, so a rule that never matches
+    again would otherwise be scanned up to year 9999.
+    """
+    parsed = rrulestr(normalize_rule(rule), dtstart=dtstart)
+    # COUNT rules can't take an UNTIL as well; write-time validation
+    # (check_rule_cost) keeps them from being empty
+    if parsed._count is None and (parsed._until is None or parsed._until > until):  # noqa: SLF001
+        parsed = parsed.replace(until=until)
+    return parsed
+
+
+def expand_rule(  # noqa: PLR0913
+    rule,
+    dtstart,
+    duration,
+    exceptions,
+    window_start,
+    window_end,
+    limit=None,
+):
+    """
+    Return the ``(start, end)`` spans of ``rule`` that start between
+    ``window_start`` and ``window_end`` (inclusive), skipping ``exceptions``;
+    at most ``limit`` of them if given.
+    """
+    ruleset = rruleset()
+    ruleset.rrule(bounded_rule(rule, dtstart, window_end))
+
+    for ex_date in exceptions:
+        if isinstance(ex_date, str):
+            ex_date = datetime.fromisoformat(ex_date)  # noqa: PLW2901
+        ruleset.exdate(ex_date)
+
+    if limit is None:
+        starts = ruleset.between(window_start, window_end, inc=True)
+    else:
+        starts = list(
+            takewhile(
+                lambda dt: dt <= window_end,
+                islice(ruleset.xafter(window_start, inc=True), limit),
+            ),
+        )
+    return [(dt, dt + duration) for dt in starts]
+
+
+def check_rule_cost(rule, dtstart, max_per_year, max_count):
+    """
+    Raise ``ValueError`` with a user-facing message when ``rule`` would be
+    too expensive to expand: more than ``max_per_year`` occurrences a year,
+    a COUNT above ``max_count`` (COUNT series can't be fast-forwarded, so
+    every expansion iterates them from the start), or no occurrence at all.
+
+    The rate is measured on a sample of the rule's first years rather than
+    derived from its parts, so every BYxxx combination is covered.
+    """
+    parsed = rrulestr(normalize_rule(rule), dtstart=dtstart)
+    if parsed._count is not None and parsed._count > max_count:  # noqa: SLF001
+        msg = f"Recurring events can't have more than {max_count} occurrences"
+        raise ValueError(msg)
+
+    parts = rule_parts(rule)
+    if (
+        parts.keys() <= {"FREQ", "INTERVAL", "COUNT", "WKST"}
+        and parts.get("FREQ") in DAY_OR_LONGER
+        and max_per_year >= 366  # noqa: PLR2004
+    ):
+        # At most daily, and dtstart is an occurrence: no need to sample
+        return
+
+    # A yearly rule can need the whole 28-year calendar cycle to match
+    years = 28 if parts.get("FREQ") == "YEARLY" else 4
+    until = dtstart + relativedelta(years=years)
+    if parsed._until is not None:  # noqa: SLF001
+        until = min(until, parsed._until)  # noqa: SLF001
+    # dateutil only stops at the first occurrence after ``until``, or else in
+    # year 9999. The calendar repeats every 400 years (weekdays and leap
+    # years), so the sample is taken as many cycles later as fit: a rule
+    # that never matches is then scanned for at most 400 more years.
+    cycles = max(0, (MAXYEAR - until.year) // 400)
+    sample = parsed.replace(
+        dtstart=dtstart.replace(year=dtstart.year + cycles * 400),
+        count=None,
+        until=until.replace(year=until.year + cycles * 400),
+    )
+    found = sum(1 for _ in islice(sample, max_per_year * years + 1))
+    if not found:
+        msg = "The recurrence rule never produces an occurrence"
+        raise ValueError(msg)
+    if found > max_per_year * years:
+        msg = f"Recurring events can't occur more than {max_per_year} times a year"
+        raise ValueError(msg)
+
+
+def fast_forward(rule, dtstart, instant):
+    """
+    Return a start for ``rule`` at or before ``instant`` that generates the
+    same occurrences as ``dtstart`` from there on.
+
+    dateutil iterates every occurrence since ``dtstart`` to reach a window,
+    so expanding a series that started years ago costs years of occurrences.
+    Moving ``dtstart`` forward by a whole number of periods keeps the rule's
+    alignment and the parts it implicitly takes from ``dtstart`` (time of day,
+    weekday, day of month). Rules with COUNT, and monthly/yearly rules whose
+    day of month may not exist in every month, are left as they are, and so
+    are malformed rules: their error is reported by the expansion itself.
+    """
+    try:
+        parts = rule_parts(rule)
+        interval = max(int(parts.get("INTERVAL", 1)), 1)
+    except (AttributeError, ValueError):
+        return dtstart
+    if "COUNT" in parts or instant <= dtstart:
+        return dtstart
+    freq = parts.get("FREQ")
+
+    if freq in ("MONTHLY", "YEARLY"):
+        if dtstart.day > 28:  # noqa: PLR2004
+            return dtstart
+        months = (instant.year - dtstart.year) * 12 + instant.month - dtstart.month
+        step = interval * (12 if freq == "YEARLY" else 1)
+        shifted = dtstart + relativedelta(months=months // step * step)
+        if shifted > instant:
+            shifted -= relativedelta(months=step)
+        return shifted
+
+    if freq not in FREQ_SECONDS:
+        return dtstart
+    period = timedelta(seconds=FREQ_SECONDS[freq] * interval)
+    return dtstart + (instant - dtstart) // period * period
+
+
+def run_expansion_job(job):
+    """
+    Run one expansion job, returning ``(spans, seconds, error)``.
+    Errors are returned rather than raised so a bad rule doesn't fail a whole
+    chunk in a pool worker.
+    """
+    started = time.perf_counter()
+    try:
+        spans = expand_rule(*job)
+    except Exception as e:  # noqa: BLE001
+        return [], time.perf_counter() - started, f"{e!s}"
+    return spans, time.perf_counter() - started, None
+
+
+def estimate_cost(job):
+    """
+    Estimate how many occurrences dateutil iterates for ``job``.
+
+    ``rruleset.between`` walks the rule from ``dtstart``, so a long-running
+    series costs every occurrence since its start, not only those in the
+    window.
+    """
+    rule, dtstart, _duration, _exceptions, _window_start, window_end = job[:6]
+    try:
+        parts = rule_parts(rule)
+        period = FREQ_SECONDS[parts.get("FREQ", "DAILY")]
+        period *= max(int(parts.get("INTERVAL", 1)), 1)
+        per_period = len(parts["BYDAY"].split(",")) if "BYDAY" in parts else 1
+        estimate = (window_end - dtstart).total_seconds() / period * per_period
+        if "COUNT" in parts:
+            estimate = min(estimate, int(parts["COUNT"]))
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return 1
+    return max(int(estimate), 1)
+
+
+def _run_chunk(chunk):
+    return [(index, run_expansion_job(job)) for index, job in chunk]
+
+
+def _warm(_):
+    # Pay for imports and dateutil's parser setup before the first real job
+    rrulestr("RRULE:FREQ=DAILY;COUNT=1", dtstart=datetime(2000, 1, 1))  # noqa: DTZ001
+    return os.getpid()
+
+
+class ExpansionExecutor:
+    """
+    Run expansion jobs in a process pool when a batch is expensive enough,
+    in-process otherwise. ``workers=0`` disables the pool.
+    """
+
+    def __init__(self, workers=0, threshold=20_000, chunks_per_worker=4):
+        self.workers = workers
+        self.threshold = threshold
+        self.chunks_per_worker = chunks_per_worker
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        from django.conf import settings
+
+        return cls(
+            workers=settings.EVENTS_EXPANSION_POOL_WORKERS,
+            threshold=settings.EVENTS_EXPANSION_POOL_THRESHOLD,
+            chunks_per_worker=settings.EVENTS_EXPANSION_POOL_CHUNKS_PER_WORKER,
+        )
+
+    def run(self, jobs):
+        """Return one ``(spans, seconds, error)`` result per job, in order."""
+        if not jobs:
+            return []
+        if self.workers:
+            costs = [estimate_cost(job) for job in jobs]
+            if sum(costs) >= self.threshold:
+                try:
+                    return self._run_in_pool(jobs, costs)
+                except (BrokenProcessPool, OSError, RuntimeError):
+                    logger.warning(
+                        "Expansion pool unavailable, expanding in-process",
+                        exc_info=True,
+                    )
+                    self.shutdown()
+        return [run_expansion_job(job) for job in jobs]
+
+    def warm(self):
+        """Start the pool workers ahead of the first request."""
+        if self.workers:
+            pool = self._get_pool()
+            for _ in range(self.workers):
+                pool.submit(_warm, None)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def chunk(self, jobs, costs):
+        """
+        Split ``jobs`` into chunks of similar estimated cost, largest first,
+        so one huge series doesn't leave the other workers idle.
+        """
+        count = min(len(jobs), self.workers * self.chunks_per_worker)
+        chunks = [[] for _ in range(count)]
+        loads = [0] * count
+        for index in sorted(range(len(jobs)), key=costs.__getitem__, reverse=True):
+            target = loads.index(min(loads))
+            chunks[target].append((index, jobs[index]))
+            loads[target] += costs[index]
+        return [chunk for chunk in chunks if chunk]
+
+    def _run_in_pool(self, jobs, costs):
+        results = [None] * len(jobs)
+        for chunk_results in self._get_pool().map(_run_chunk, self.chunk(jobs, costs)):
+            for index, result in chunk_results:
+                results[index] = result
+        return results
+
+    def _get_pool(self):
+        pid = os.getpid()
+        with self._lock:
+            # A pool inherited through fork() belongs to the parent process
+            if self._pool is None or self._pool_pid != pid:
+                context = multiprocessing.get_context("forkserver")
+                context.set_forkserver_preload([__name__])
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=context,
+                )
+                self._pool_pid = pid
+            return self._pool
+
+
+_executor = None
+
+
+def get_executor():
+    """Process-wide ``ExpansionExecutor`` configured from settings."""
+    global _executor  # noqa: PLW0603
+    if _executor is None:
+        _executor = ExpansionExecutor.from_settings()
+    return _executor
@@ -0,0 +1,222 @@
+"""
+Per-user iCalendar subscription feeds (``/api/feed/<token>.ics``).
+
+Calendar apps poll feeds every few minutes, so a poll must stay cheap:
+
+- the token is resolved to a user through the cache;
+- the ETag is the user's events version (see ``events.cache``), so an
+  unchanged calendar is answered with a 304 without touching the database;
+- otherwise the body is served from the cache, keyed by that version, or
+  streamed from a server-side cursor and cached on the way out when it's
+  small enough. Under ASGI the stream is an async iterator
+  (``astream_feed``): a sync one would be drained into a list by Django
+  before the first byte is sent.
+
+Series are written with their RRULE and EXDATEs rather than expanded, so
+the feed is as long as the user's events table.
+"""
+
+from datetime import UTC
+from datetime import datetime
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from event_scheduler.events.expansion import normalize_rule
+from event_scheduler.events.models import CalendarFeed
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import new_feed_token
+
+HEADER = (
+    "BEGIN:VCALENDAR\r\n"
+    "VERSION:2.0\r\n"
+    "PRODID:-//Event Scheduler//Calendar feed//EN\r\n"
+    "CALSCALE:GREGORIAN\r\n"
+    "METHOD:PUBLISH\r\n"
+)
+FOOTER = "END:VCALENDAR\r\n"
+
+FIELDS = (
+    "pk",
+    "title",
+    "description",
+    "start",
+    "end",
+    "is_recurring",
+    "recurrence_rule",
+    "exceptions",
+    "updated_at",
+)
+
+
+def _token_key(token):
+    return f"feed:token:{token}"
+
+
+def feed_user_id(token):
+    """Id of the owner of the feed ``token``, ``None`` for unknown tokens."""
+    key = _token_key(token)
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = (
+            CalendarFeed.objects.filter(token=token)
+            .values_list("user_id", flat=True)
+            .first()
+        )
+        if user_id is None:
+            return None
+        cache.set(key, user_id, 3600)
+    return user_id
+
+
+def rotate_feed_token(feed):
+    """Give ``feed`` a new token; the old URL stops working at once."""
+    cache.delete(_token_key(feed.token))
+    feed.token = new_feed_token()
+    feed.save(update_fields=["token"])
+    return feed
+
+
+def body_cache_key(user_id, version):
+    return f"feed:{user_id}:{version}"
+
+
+def escape(text):
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Fold a content line at 75 octets, without splitting characters."""
+    encoded = line.encode()
+    if len(encoded) <= 75:  # noqa: PLR2004
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Don't cut inside a UTF-8 sequence
+        while cut < len(encoded) and encoded[cut] & 0xC0 == 0x80:  # noqa: PLR2004
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+        # Continuation lines start with a space
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(dt):
+    return f"{dt.astimezone(UTC):%Y%m%dT%H%M%SZ}"
+
+
+def vevent(row):
+    """VEVENT of an ``Event`` row, as ``FIELDS``."""
+    (pk, title, description, start, end, recurring, rule, exceptions, updated) = row
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:event-{pk}@event-scheduler",
+        f"DTSTAMP:{_utc(updated)}",
+        f"LAST-MODIFIED:{_utc(updated)}",
+        f"DTSTART:{_utc(start)}",
+        f"DTEND:{_utc(end)}",
+        f"SUMMARY:{escape(title)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{escape(description)}")
+    if recurring and rule:
+        lines.append(normalize_rule(rule))
+        if exceptions:
+            exdates = ",".join(
+                _utc(datetime.fromisoformat(exception)) for exception in exceptions
+            )
+            lines.append(f"EXDATE:{exdates}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def _feed_rows(user_id, chunk_size):
+    return (
+        Event.objects.filter(user_id=user_id)
+        .order_by("pk")
+        .values_list(*FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _render(rows, chunk_size):
+    return "".join(vevent(row) for row in islice(rows, chunk_size)).encode()
+
+
+def feed_chunks(user_id):
+    """Yield the feed of ``user_id`` in chunks, from a server-side cursor."""
+    chunk_size = settings.EVENTS_FEED_CHUNK_SIZE
+    rows = _feed_rows(user_id, chunk_size)
+    yield HEADER.encode()
+    while chunk := _render(rows, chunk_size):
+        yield chunk
+    yield FOOTER.encode()
+
+
+async def afeed_chunks(user_id):
+    """
+    Async version of ``feed_chunks``. The cursor is read and the chunks
+    rendered in the database thread, one chunk at a time (``aiterator()``
+    opens the cursor in the event loop for ``values_list()`` querysets).
+    """
+    chunk_size = settings.EVENTS_FEED_CHUNK_SIZE
+    rows = _feed_rows(user_id, chunk_size)
+    render = sync_to_async(_render)
+    yield HEADER.encode()
+    while chunk := await render(rows, chunk_size):
+        yield chunk
+    yield FOOTER.encode()
+
+
+class _BodyKeeper:
+    """Keeps the streamed chunks until they exceed the cacheable size."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def keep(self, chunk):
+        if self.chunks is not None:
+            self.size += len(chunk)
+            if self.size > settings.EVENTS_FEED_CACHE_MAX_BYTES:
+                self.chunks = None
+            else:
+                self.chunks.append(chunk)
+
+    @property
+    def body(self):
+        return None if self.chunks is None else b"".join(self.chunks)
+
+
+def stream_feed(user_id, cache_key):
+    """
+    Stream the feed and cache it under ``cache_key`` once fully sent, unless
+    it's larger than ``EVENTS_FEED_CACHE_MAX_BYTES``.
+    """
+    keeper = _BodyKeeper()
+    for chunk in feed_chunks(user_id):
+        keeper.keep(chunk)
+        yield chunk
+    if keeper.body is not None:
+        cache.set(cache_key, keeper.body, settings.EVENTS_FEED_CACHE_TIMEOUT)
+
+
+async def astream_feed(user_id, cache_key):
+    """Async version of ``stream_feed``."""
+    keeper = _BodyKeeper()
+    async for chunk in afeed_chunks(user_id):
+        keeper.keep(chunk)
+        yield chunk
+    if keeper.body is not None:
+        await cache.aset(cache_key, keeper.body, settings.EVENTS_FEED_CACHE_TIMEOUT)
@@ -0,0 +1,156 @@
+"""
+Free/busy of several users at once (``/api/freebusy/``).
+
+A user's busy time in a range is the union of their occurrences
+overlapping it, clipped to it: the occurrences are sorted by start and
+swept once, each one extending the last interval when it starts before
+that one ends, in O(n log n). Only the intervals leave this module; titles
+and descriptions aren't even loaded.
+
+Intervals are cached per user, keyed by the events version and the range,
+so a request for dozens of users only recomputes the calendars that
+changed. Those are read with two queries, through the GiST index of the
+events' spans and the partial index of series, and all their series are
+expanded in a single executor batch (see ``events.expansion``).
+The calendars computed for one request share a single
+``EVENTS_OCCURRENCE_BUDGET``, like one calendar request: asking for more
+users doesn't buy more expansion.
+
+A user sees the free/busy of themselves, of the users who share it
+(``UserProfile.share_freebusy``) and, when staff, of every active user.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+
+from event_scheduler.events.cache import get_events_versions
+from event_scheduler.events.expansion import estimate_cost
+from event_scheduler.events.expansion import get_executor
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import event_span
+from event_scheduler.events.occurrences import raise_over_budget
+
+User = get_user_model()
+
+
+class FreeBusyError(ValueError):
+    pass
+
+
+def parse_user_ids(value):
+    """Distinct ids of a comma-separated ``users`` parameter, in order."""
+    if not value or not value.strip():
+        msg = "users is required"
+        raise FreeBusyError(msg)
+    try:
+        user_ids = list(dict.fromkeys(int(part) for part in value.split(",")))
+    except ValueError as e:
+        msg = "users must be comma-separated ids"
+        raise FreeBusyError(msg) from e
+    if len(user_ids) > settings.EVENTS_FREEBUSY_MAX_USERS:
+        msg = f"At most {settings.EVENTS_FREEBUSY_MAX_USERS} users at a time"
+        raise FreeBusyError(msg)
+    return user_ids
+
+
+def visible_user_ids(viewer, user_ids):
+    """The ids among ``user_ids`` whose free/busy ``viewer`` may see."""
+    users = User.objects.filter(pk__in=user_ids, is_active=True)
+    if not viewer.is_staff:
+        users = users.filter(Q(pk=viewer.pk) | Q(profile__share_freebusy=True))
+    return set(users.values_list("pk", flat=True))
+
+
+def merge_intervals(intervals):
+    """Union of ``(start, end)`` intervals, sorted; touching ones are joined."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_intervals(user_ids, start_dt, end_dt):
+    """``{user_id: [(start, end), ...]}`` of the merged busy time in the range."""
+    versions = get_events_versions(user_ids)
+    range_key = f"{start_dt.isoformat()}:{end_dt.isoformat()}"
+    keys = {
+        f"events:{user_id}:freebusy:{versions[user_id]}:{range_key}": user_id
+        for user_id in user_ids
+    }
+    busy = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing = [user_id for user_id in user_ids if user_id not in busy]
+    if missing:
+        computed = _compute(missing, start_dt, end_dt)
+        busy.update(computed)
+        cache.set_many(
+            {
+                key: computed[user_id]
+                for key, user_id in keys.items()
+                if user_id in computed
+            },
+            settings.EVENTS_FREEBUSY_CACHE_TIMEOUT,
+        )
+    return busy
+
+
+def _compute(user_ids, start_dt, end_dt):
+    # Plain tuples for one-time events: there are many more than series
+    spans = list(
+        Event.objects.alias(span=event_span())
+        .filter(
+            user_id__in=user_ids,
+            is_recurring=False,
+            span__overlap=(start_dt, end_dt),
+        )
+        .values_list("user_id", "start", "end"),
+    )
+    series = list(
+        Event.objects.filter(
+            user_id__in=user_ids,
+            is_recurring=True,
+            start__lt=end_dt,
+        ).only(
+            "user_id",
+            "start",
+            "end",
+            "is_recurring",
+            "recurrence_rule",
+            "exceptions",
+        ),
+    )
+    budget = settings.EVENTS_OCCURRENCE_BUDGET
+    # Occurrences starting up to one duration before the range overlap it
+    windows = [(start_dt - (event.end - event.start), end_dt) for event in series]
+    jobs = [
+        event.expansion_job(*window, budget + 1)
+        for event, window in zip(series, windows, strict=True)
+    ]
+    if sum(estimate_cost(job) for job in jobs) + len(spans) > budget:
+        raise_over_budget(budget)
+    expanded = get_executor().run(jobs)
+
+    intervals = {user_id: [] for user_id in user_ids}
+    for user_id, start, end in spans:
+        intervals[user_id].append((start, end))
+    for event, window, result in zip(series, windows, expanded, strict=True):
+        intervals[event.user_id].extend(
+            (occ["start"], occ["end"]) for occ in event.get_occurrences(*window, result)
+        )
+
+    if sum(len(user_spans) for user_spans in intervals.values()) > budget:
+        raise_over_budget(budget)
+    busy = {}
+    for user_id, user_spans in intervals.items():
+        clipped = (
+            (max(start, start_dt), min(end, end_dt))
+            for start, end in user_spans
+            if start < end_dt and end > start_dt
+        )
+        busy[user_id] = merge_intervals(clipped)
+    return busy
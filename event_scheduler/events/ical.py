@@ -0,0 +1,339 @@
+"""
+Streaming iCalendar (.ics) import.
+
+``VEventReader`` reads a binary file line by line and yields the
+properties of one VEVENT at a time, so memory doesn't grow with the file.
+``ICalendarImporter`` maps them onto ``Event`` rows, inserted with
+``bulk_create`` every ``batch_size`` events:
+
+- DTSTART/DTEND (or DURATION), SUMMARY and DESCRIPTION map onto the event;
+  floating times are read in the current time zone, unknown TZIDs too;
+- RRULE becomes ``recurrence_rule``, rejected as by the API when it's too
+  expensive to expand (see ``check_rule_cost``); EXDATEs go to
+  ``exceptions``;
+- a VEVENT with a RECURRENCE-ID (a modified occurrence) cancels that
+  occurrence of its series, by UID, and is imported as a one-time event,
+  as ``PUT /api/events/<id>/?occurrence_date=...`` does.
+
+Only the UIDs of recurring series and the exceptions waiting for their
+series are kept across batches. RDATEs and VTIMEZONE definitions are
+ignored.
+"""
+
+import logging
+import re
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from functools import lru_cache
+from functools import partial
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+from event_scheduler.events.cache import bump_events_version
+from event_scheduler.events.changes import publish_changes
+from event_scheduler.events.expansion import check_rule_cost
+from event_scheduler.events.models import Event
+from event_scheduler.events.search import remember_titles
+
+logger = logging.getLogger(__name__)
+
+# Longest physical line read at once, and longest unfolded property kept
+MAX_LINE = 64 * 1024
+MAX_PROPERTY = 1024 * 1024
+
+DURATION_RE = re.compile(
+    r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$",
+)
+ESCAPE_RE = re.compile(r"\\([\\;,nN])")
+
+
+class VEventReader:
+    """
+    Iterate over the VEVENTs of a binary .ics file as
+    ``{NAME: [(params, value), ...]}``; components nested in them (VALARM)
+    are skipped. ``bytes_read`` tells how far into the file it got.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+
+    def lines(self):
+        """Yield unfolded content lines."""
+        pending = None
+        for raw in iter(partial(self.file.readline, MAX_LINE), b""):
+            self.bytes_read += len(raw)
+            line = raw.rstrip(b"\r\n")
+            if line[:1] in (b" ", b"\t"):
+                if pending is not None and len(pending) < MAX_PROPERTY:
+                    pending += line[1:]
+                continue
+            if pending is not None:
+                yield pending.decode("utf-8", errors="replace")
+            pending = line
+        if pending:
+            yield pending.decode("utf-8", errors="replace")
+
+    def __iter__(self):
+        event = None
+        depth = 0
+        for line in self.lines():
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            name, params, value = parsed
+            if name == "BEGIN":
+                if event is not None:
+                    depth += 1
+                elif value.upper() == "VEVENT":
+                    event = {}
+            elif name == "END":
+                if depth:
+                    depth -= 1
+                elif event is not None and value.upper() == "VEVENT":
+                    yield event
+                    event = None
+            elif event is not None and not depth:
+                event.setdefault(name, []).append((params, value))
+
+
+def parse_line(line):
+    """Split a content line into ``(NAME, {PARAM: value}, value)``."""
+    colon = line.find(":")
+    if colon == -1:
+        return None
+    if '"' in line[:colon]:
+        # The value starts at the first colon outside of quoted parameters
+        quoted = False
+        for colon, char in enumerate(line):  # noqa: B007
+            if char == '"':
+                quoted = not quoted
+            elif char == ":" and not quoted:
+                break
+        else:
+            return None
+    name, *params = line[:colon].split(";")
+    return (
+        name.upper(),
+        {
+            key.upper(): param.strip('"')
+            for key, _, param in (p.partition("=") for p in params)
+        },
+        line[colon + 1 :],
+    )
+
+
+def unescape(text):
+    return ESCAPE_RE.sub(
+        lambda m: "\n" if m.group(1) in "nN" else m.group(1),
+        text,
+    )
+
+
+@lru_cache(maxsize=128)
+def _zone(tzid):
+    if tzid:
+        try:
+            return ZoneInfo(tzid)
+        except (ValueError, KeyError, OSError):
+            # Windows or vendor-specific names
+            logger.debug("Unknown TZID %s", tzid)
+    return timezone.get_current_timezone()
+
+
+def parse_datetime(value, params):
+    """Aware datetime of a DATE or DATE-TIME value, and whether it's a DATE."""
+    value = value.strip()
+    if params.get("VALUE", "").upper() == "DATE" or len(value) == 8:  # noqa: PLR2004
+        day = datetime.strptime(value[:8], "%Y%m%d")  # noqa: DTZ007
+        return day.replace(tzinfo=_zone(params.get("TZID"))), True
+    if value.endswith("Z"):
+        return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=UTC), False
+    naive = datetime.strptime(value, "%Y%m%dT%H%M%S")  # noqa: DTZ007
+    return naive.replace(tzinfo=_zone(params.get("TZID"))), False
+
+
+def parse_duration(value):
+    match = DURATION_RE.match(value.strip())
+    if match is None:
+        msg = f"Invalid duration {value!r}"
+        raise ValueError(msg)
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0),
+        days=int(days or 0),
+        hours=int(hours or 0),
+        minutes=int(minutes or 0),
+        seconds=int(seconds or 0),
+    )
+    return -duration if sign == "-" else duration
+
+
+def normalize_rule(value, start):
+    """
+    RRULE value as ``Event.recurrence_rule``: dateutil needs UNTIL in UTC
+    when DTSTART is aware, which floating or DATE UNTILs aren't.
+    """
+    parts = []
+    for part in value.strip().split(";"):
+        key, _, until = part.partition("=")
+        if key.upper() == "UNTIL" and not until.endswith("Z"):
+            until_dt, is_date = parse_datetime(until, {"TZID": str(start.tzinfo)})
+            if is_date:
+                # UNTIL is inclusive: keep the occurrences of that day
+                until_dt += timedelta(days=1, seconds=-1)
+            part = f"UNTIL={until_dt.astimezone(UTC):%Y%m%dT%H%M%SZ}"  # noqa: PLW2901
+        parts.append(part)
+    return f"RRULE:{';'.join(parts)}"
+
+
+def _first(props, name, default=None):
+    values = props.get(name)
+    return values[0] if values else default
+
+
+def _dates(props, name, start):
+    """Aware datetimes of a multi-valued date property (EXDATE)."""
+    for params, value in props.get(name, []):
+        for item in value.split(","):
+            dt, is_date = parse_datetime(item, params)
+            if is_date:
+                # The occurrence of that day
+                dt = start.astimezone(dt.tzinfo).replace(
+                    year=dt.year,
+                    month=dt.month,
+                    day=dt.day,
+                )
+            yield dt
+
+
+class ICalendarImporter:
+    """
+    Import VEVENTs for ``user``. ``progress(importer)`` is called after every
+    batch, with ``bytes_read``, ``imported`` and ``skipped`` up to date.
+    """
+
+    def __init__(self, user, batch_size=1000, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.bytes_read = 0
+        self.imported = 0
+        self.skipped = 0
+        self._batch = []
+        self._batch_uids = []
+        # UID -> pk of the recurring series imported so far
+        self._series = {}
+        # UID -> cancelled occurrences whose series wasn't inserted yet
+        self._pending = {}
+
+    def run(self, file):
+        reader = VEventReader(file)
+        try:
+            for props in reader:
+                self.bytes_read = reader.bytes_read
+                try:
+                    self.add(props)
+                except (ValueError, OverflowError) as e:
+                    self.skipped += 1
+                    logger.debug("Skipped VEVENT %s: %s", _first(props, "UID"), e)
+                if len(self._batch) >= self.batch_size:
+                    self.flush()
+            self.bytes_read = reader.bytes_read
+            self.flush()
+            self.apply_pending()
+        finally:
+            # The batches inserted before a failure stay
+            bump_events_version(self.user.pk)
+
+    def add(self, props):
+        uid = _first(props, "UID", ({}, ""))[1]
+        cancelled = _first(props, "STATUS", ({}, ""))[1].upper() == "CANCELLED"
+        recurrence_id = _first(props, "RECURRENCE-ID")
+        if recurrence_id is None and cancelled:
+            self.skipped += 1
+            return
+
+        event = None if cancelled else self.build(props, recurring=not recurrence_id)
+        if recurrence_id is not None:
+            occurrence, _ = parse_datetime(recurrence_id[1], recurrence_id[0])
+            self._pending.setdefault(uid, []).append(occurrence.isoformat())
+        if event is None:
+            return
+        if event.is_recurring and uid:
+            event.exceptions.extend(self._pending.pop(uid, []))
+        self._batch.append(event)
+        self._batch_uids.append(uid if event.is_recurring else None)
+
+    def build(self, props, *, recurring):
+        dtstart = _first(props, "DTSTART")
+        if dtstart is None:
+            msg = "No DTSTART"
+            raise ValueError(msg)
+        start, is_date = parse_datetime(dtstart[1], dtstart[0])
+        if dtend := _first(props, "DTEND"):
+            end = parse_datetime(dtend[1], dtend[0])[0]
+        elif duration := _first(props, "DURATION"):
+            end = start + parse_duration(duration[1])
+        else:
+            # RFC 5545: a day for dates, an instant for date-times
+            end = start + timedelta(days=1) if is_date else start
+        end = max(start, end)
+
+        event = Event(
+            user=self.user,
+            title=unescape(_first(props, "SUMMARY", ({}, ""))[1])[:255] or "Untitled",
+            description=unescape(_first(props, "DESCRIPTION", ({}, ""))[1]),
+            start=start,
+            end=end,
+            exceptions=[dt.isoformat() for dt in _dates(props, "EXDATE", start)],
+        )
+        rrule = _first(props, "RRULE")
+        if recurring and rrule is not None:
+            event.is_recurring = True
+            event.recurrence_rule = normalize_rule(rrule[1], start)
+            check_rule_cost(
+                event.recurrence_rule,
+                start,
+                settings.EVENTS_MAX_OCCURRENCES_PER_YEAR,
+                settings.EVENTS_MAX_RECURRENCE_COUNT,
+            )
+        return event
+
+    def flush(self):
+        if self._batch:
+            Event.objects.bulk_create(self._batch)
+            remember_titles(self._batch)
+            for event, uid in zip(self._batch, self._batch_uids, strict=True):
+                if uid:
+                    self._series[uid] = event.pk
+            publish_changes("saved", [e.pk for e in self._batch], self.user.pk)
+            self.imported += len(self._batch)
+            self._batch = []
+            self._batch_uids = []
+        if self.progress is not None:
+            self.progress(self)
+
+    def apply_pending(self):
+        """Add the cancelled occurrences read after their series."""
+        pending = {
+            self._series[uid]: occurrences
+            for uid, occurrences in self._pending.items()
+            if uid in self._series
+        }
+        series = Event.objects.in_bulk(list(pending))
+        now = timezone.now()
+        for pk, event in series.items():
+            event.exceptions = [*event.exceptions, *pending[pk]]
+            # Seen by /api/events/sync/; auto_now isn't applied by bulk_update
+            event.updated_at = now
+        Event.objects.bulk_update(
+            series.values(),
+            ["exceptions", "updated_at"],
+            self.batch_size,
+        )
+        publish_changes("saved", list(series), self.user.pk)
+        self._pending = {}
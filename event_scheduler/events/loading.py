@@ -0,0 +1,361 @@
+"""
+Bulk loading of legacy event dumps, used by ``manage.py load_events``.
+
+Rows are streamed from a CSV or JSON Lines file into a temporary staging
+table with ``COPY FROM STDIN``, then checked and inserted into
+``events_event`` by two set-wise statements, all in one transaction:
+
+1. every row is normalized and checked at once: owner email mapped to a
+   user id by a join, timestamps and each exception checked with
+   ``pg_input_is_valid``, recurrence rules upper-cased, stripped of their
+   ``RRULE:`` prefix, given a UTC UNTIL and matched against the subset of
+   RFC 5545 the API itself writes (at most daily, COUNT within
+   ``EVENTS_MAX_RECURRENCE_COUNT``); each distinct rule and start left is
+   then run through ``check_rule_cost``, as the API does, which rejects
+   rules too dense or never matching (a COUNT rule that never matches
+   would be scanned up to year 9999 by every expansion);
+2. the valid rows are inserted with a single ``INSERT ... SELECT``, their
+   exceptions rewritten as the UTC ISO strings the API writes (naive ones
+   are taken as UTC), and their titles upserted into ``EventTitle``, with
+   their words, by another.
+
+Their ``updated_at`` is set once more just before the commit, so that
+``/api/events/sync/`` clients syncing during a long load still see them.
+
+Rejected rows are reported by reason with the first line numbers. Like the
+bulk API, the load bypasses model signals: events versions are bumped per
+user at the end, and the reminder scheduler picks the events up when it
+loads its next window. Needs PostgreSQL 16+ and psycopg 3.
+"""
+
+import csv
+import json
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db import transaction
+
+from event_scheduler.events.cache import bump_events_version
+from event_scheduler.events.expansion import check_rule_cost
+
+COLUMNS = (
+    "user_email",
+    "title",
+    "start",
+    "end",
+    "description",
+    "recurrence_rule",
+    "exceptions",
+)
+
+CREATE_STAGING = """
+CREATE TEMPORARY TABLE events_staging (
+    line bigint,
+    user_email text,
+    title text,
+    start text,
+    "end" text,
+    description text,
+    recurrence_rule text,
+    exceptions text
+) ON COMMIT DROP
+"""
+
+COPY_STAGING = """
+COPY events_staging (
+    line, user_email, title, start, "end", description, recurrence_rule, exceptions
+) FROM STDIN
+"""
+
+WEEKDAY = "(MO|TU|WE|TH|FR|SA|SU)"
+RULE_PART = (
+    "(FREQ=(DAILY|WEEKLY|MONTHLY|YEARLY)"
+    "|INTERVAL=[1-9][0-9]{0,2}"
+    "|COUNT=[1-9][0-9]{0,5}"
+    "|UNTIL=[0-9]{8}T[0-9]{6}Z"
+    f"|BYDAY=[+-]?[0-9]{{0,2}}{WEEKDAY}(,[+-]?[0-9]{{0,2}}{WEEKDAY})*"
+    "|BYMONTHDAY=-?[0-9]{1,2}(,-?[0-9]{1,2})*"
+    "|BYMONTH=[0-9]{1,2}(,[0-9]{1,2})*"
+    "|BYSETPOS=-?[0-9]{1,3}"
+    f"|WKST={WEEKDAY})"
+)
+RULE_RE = f"^{RULE_PART}(;{RULE_PART})*$"
+
+# Normalizes the rules, maps users and gives each row its error, if any
+CHECK_STAGING = r"""
+CREATE TEMPORARY TABLE events_checked ON COMMIT DROP AS
+WITH users AS (
+    SELECT DISTINCT ON (lower(email)) lower(email) AS email, id
+    FROM users_user
+    ORDER BY lower(email), id
+),
+staged AS (
+    SELECT
+        s.*,
+        regexp_replace(
+            regexp_replace(
+                NULLIF(
+                    upper(regexp_replace(s.recurrence_rule, '^\s*RRULE:|\s', '', 'gi')),
+                    ''
+                ),
+                'UNTIL=([0-9]{8})(;|$)', 'UNTIL=\1T235959Z\2'
+            ),
+            'UNTIL=([0-9]{8}T[0-9]{6})(;|$)', 'UNTIL=\1Z\2'
+        ) AS rule,
+        NULLIF(btrim(s.exceptions), '') AS exdates
+    FROM events_staging s
+)
+SELECT
+    s.line,
+    u.id AS user_id,
+    left(btrim(s.title), 255) AS title,
+    s.start,
+    s."end",
+    coalesce(s.description, '') AS description,
+    s.rule,
+    s.exdates,
+    CASE
+        WHEN u.id IS NULL THEN 'unknown user'
+        WHEN coalesce(btrim(s.title), '') = '' THEN 'missing title'
+        WHEN NOT coalesce(pg_input_is_valid(s.start, 'timestamptz'), false)
+            THEN 'invalid start'
+        WHEN NOT coalesce(pg_input_is_valid(s."end", 'timestamptz'), false)
+            THEN 'invalid end'
+        WHEN s."end"::timestamptz <= s.start::timestamptz THEN 'end not after start'
+        WHEN s.rule IS NOT NULL AND (
+            s.rule !~ %(rule_re)s
+            OR s.rule !~ '(^|;)FREQ='
+            OR (s.rule ~ '(^|;)COUNT=' AND s.rule ~ '(^|;)UNTIL=')
+        ) THEN 'unsupported recurrence rule'
+        WHEN coalesce(substring(s.rule FROM 'COUNT=([0-9]+)')::int, 0) > %(max_count)s
+            THEN 'too many occurrences'
+        WHEN s.exdates IS NOT NULL AND NOT pg_input_is_valid(s.exdates, 'jsonb')
+            THEN 'invalid exceptions'
+        WHEN s.exdates IS NOT NULL AND jsonb_typeof(s.exdates::jsonb) <> 'array'
+            THEN 'invalid exceptions'
+        WHEN s.exdates IS NOT NULL AND EXISTS (
+            SELECT 1
+            FROM jsonb_array_elements(s.exdates::jsonb) AS e
+            WHERE jsonb_typeof(e) <> 'string'
+                -- Not 'now', 'epoch' and the like
+                OR e #>> '{}' !~ '^\d{4}-\d{2}-\d{2}'
+                OR NOT pg_input_is_valid(e #>> '{}', 'timestamptz')
+        ) THEN 'invalid exceptions'
+    END AS error
+FROM staged s
+LEFT JOIN users u ON u.email = lower(btrim(s.user_email))
+"""
+
+CREATE_LOADED = """
+CREATE TEMPORARY TABLE events_loaded (id bigint) ON COMMIT DROP
+"""
+
+INSERT_EVENTS = """
+WITH inserted AS (
+    INSERT INTO events_event (
+        user_id, title, start, "end", description, is_recurring, recurrence_rule,
+        exceptions, created_at, updated_at
+    )
+    SELECT
+        user_id,
+        title,
+        start::timestamptz,
+        "end"::timestamptz,
+        description,
+        rule IS NOT NULL,
+        'RRULE:' || rule,
+        -- As Python's isoformat() in UTC, which the API writes
+        coalesce(
+            (
+                SELECT jsonb_agg(
+                    to_char(t AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS')
+                    || CASE WHEN to_char(t, 'US') <> '000000'
+                        THEN to_char(t, '.US') ELSE '' END
+                    || '+00:00'
+                    ORDER BY n
+                )
+                FROM
+                    jsonb_array_elements_text(exdates::jsonb)
+                        WITH ORDINALITY AS e(value, n),
+                    LATERAL (SELECT e.value::timestamptz AS t) AS parsed
+            ),
+            '[]'::jsonb
+        ),
+        now(),
+        now()
+    FROM events_checked
+    WHERE error IS NULL
+    ORDER BY user_id, line
+    RETURNING id
+)
+INSERT INTO events_loaded (id)
+SELECT id FROM inserted
+"""
+
+# now() is when the transaction started, which can be minutes before the
+# rows become visible: they are stamped again right before the commit, for
+# /api/events/sync/ (see events.sync)
+STAMP_EVENTS = """
+UPDATE events_event e
+SET updated_at = (SELECT clock_timestamp())
+FROM events_loaded l
+WHERE e.id = l.id
+"""
+
+REJECTED = """
+SELECT error, count(*), (array_agg(line ORDER BY line))[1:%(shown)s]
+FROM events_checked
+WHERE error IS NOT NULL
+GROUP BY error
+ORDER BY count(*) DESC
+"""
+
+REMEMBER_TITLES = """
+WITH titles AS (
+    INSERT INTO events_eventtitle (user_id, title, last_used)
+    SELECT DISTINCT user_id, title, now()
+    FROM events_checked
+    WHERE error IS NULL
+    ORDER BY user_id, title
+    ON CONFLICT (user_id, title) DO UPDATE SET last_used = EXCLUDED.last_used
+    RETURNING user_id, words
+)
+INSERT INTO events_eventtitleword (user_id, word)
+SELECT DISTINCT t.user_id, w.word
+FROM titles t, unnest(t.words) AS w(word)
+ORDER BY t.user_id, w.word
+ON CONFLICT (user_id, word) DO NOTHING
+"""
+
+LOADED_USERS = "SELECT DISTINCT user_id FROM events_checked WHERE error IS NULL"
+
+SERIES = """
+SELECT DISTINCT rule, start::timestamptz
+FROM events_checked
+WHERE error IS NULL AND rule IS NOT NULL
+"""
+
+REJECT_SERIES = """
+UPDATE events_checked c
+SET error = r.error
+FROM unnest(%(rules)s::text[], %(starts)s::timestamptz[], %(errors)s::text[])
+    AS r(rule, start, error)
+WHERE c.error IS NULL AND c.rule = r.rule AND c.start::timestamptz = r.start
+"""
+
+
+def read_rows(file, fmt):
+    """
+    Yield the ``COLUMNS`` values of each record of a CSV file (with a header
+    row) or a JSON Lines file, prefixed by its line number. Exceptions are
+    JSON arrays of ISO datetimes, as in ``Event.exceptions``.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield (reader.line_num, *(record.get(column) for column in COLUMNS))
+        return
+    for line, text in enumerate(file, start=1):
+        if not text.strip():
+            continue
+        record = json.loads(text)
+        exceptions = record.get("exceptions")
+        if isinstance(exceptions, list):
+            record["exceptions"] = json.dumps(exceptions)
+        yield (line, *(_text(record.get(column)) for column in COLUMNS))
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _check_rule_costs(cursor):
+    """
+    Reject the series whose rule ``check_rule_cost`` refuses for their start,
+    by its message: the SQL checks only the syntax of the rules.
+    """
+    cursor.execute(SERIES)
+    rejected = []
+    for rule, start in cursor.fetchall():
+        try:
+            check_rule_cost(
+                rule,
+                start,
+                settings.EVENTS_MAX_OCCURRENCES_PER_YEAR,
+                settings.EVENTS_MAX_RECURRENCE_COUNT,
+            )
+        except ValueError as e:
+            rejected.append((rule, start, str(e)))
+    if rejected:
+        rules, starts, errors = zip(*rejected, strict=True)
+        cursor.execute(
+            REJECT_SERIES,
+            {"rules": list(rules), "starts": list(starts), "errors": list(errors)},
+        )
+
+
+class LoadReport:
+    """Row counts and seconds spent in each phase of a load."""
+
+    def __init__(self):
+        self.staged = 0
+        self.loaded = 0
+        self.rejected = []
+        self.timings = {}
+
+    def rate(self, phase):
+        """Staged rows per second in ``phase``."""
+        seconds = self.timings[phase]
+        return self.staged / seconds if seconds else 0
+
+
+def load_events(rows, progress=None, progress_every=100_000, shown=10):
+    """
+    Load ``rows`` (from ``read_rows``) into ``events_event``; return a
+    ``LoadReport``. ``progress(staged)`` is called every ``progress_every``
+    rows during the COPY. Rejected rows are reported as
+    ``(reason, count, first shown line numbers)``.
+    """
+    report = LoadReport()
+    with transaction.atomic(), connection.cursor() as cursor:
+        started = time.perf_counter()
+        cursor.execute(CREATE_STAGING)
+        with cursor.copy(COPY_STAGING) as copy:
+            for row in rows:
+                copy.write_row(row)
+                report.staged += 1
+                if progress is not None and report.staged % progress_every == 0:
+                    progress(report.staged)
+        report.timings["copy"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cursor.execute(
+            CHECK_STAGING,
+            {
+                "rule_re": RULE_RE,
+                "max_count": settings.EVENTS_MAX_RECURRENCE_COUNT,
+            },
+        )
+        _check_rule_costs(cursor)
+        report.timings["check"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cursor.execute(CREATE_LOADED)
+        cursor.execute(INSERT_EVENTS)
+        report.loaded = cursor.rowcount
+        cursor.execute(REMEMBER_TITLES)
+        report.timings["insert"] = time.perf_counter() - started
+
+        cursor.execute(REJECTED, {"shown": shown})
+        report.rejected = cursor.fetchall()
+        cursor.execute(LOADED_USERS)
+        for (user_id,) in cursor.fetchall():
+            bump_events_version(user_id)
+
+        started = time.perf_counter()
+        cursor.execute(STAMP_EVENTS)
+        report.timings["stamp"] = time.perf_counter() - started
+    return report
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from event_scheduler.events.ical import ICalendarImporter
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the events of an .ics file for a user, streaming it in "
+        "batches so large files don't have to fit in memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the .ics file.")
+        parser.add_argument("--user", required=True, help="Email of the owner.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.EVENTS_IMPORT_BATCH_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options["user"])
+        except User.DoesNotExist as e:
+            msg = f"No user with email {options['user']}"
+            raise CommandError(msg) from e
+
+        def report(importer):
+            self.stdout.write(
+                f"{importer.bytes_read:,} bytes read, "
+                f"{importer.imported:,} events imported, "
+                f"{importer.skipped:,} skipped",
+            )
+
+        importer = ICalendarImporter(
+            user,
+            batch_size=options["batch_size"],
+            progress=report,
+        )
+        try:
+            with open(options["path"], "rb") as file:  # noqa: PTH123
+                importer.run(file)
+        except OSError as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {importer.imported:,} events ({importer.skipped:,} skipped)",
+            ),
+        )
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+
+from event_scheduler.events.loading import load_events
+from event_scheduler.events.loading import read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Load events from a CSV (with a header row) or JSON Lines dump, with "
+        "the columns user_email, title, start, end, description, "
+        "recurrence_rule and exceptions. Rows are copied into a staging table "
+        "and validated and inserted set-wise; PostgreSQL only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the dump.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Format of the dump; guessed from its extension by default.",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            msg = "load_events needs PostgreSQL"
+            raise CommandError(msg)
+        path = Path(options["path"])
+        fmt = options["format"] or ("csv" if path.suffix == ".csv" else "jsonl")
+
+        def progress(staged):
+            self.stdout.write(f"{staged:,} rows copied")
+
+        try:
+            with path.open(newline="", encoding="utf-8") as file:
+                report = load_events(read_rows(file, fmt), progress=progress)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e)) from e
+
+        for phase, seconds in report.timings.items():
+            self.stdout.write(
+                f"{phase}: {seconds:.2f}s ({report.rate(phase):,.0f} rows/s)",
+            )
+        for error, count, lines in report.rejected:
+            shown = ", ".join(str(line) for line in lines)
+            more = ", ..." if count > len(lines) else ""
+            self.stdout.write(
+                self.style.WARNING(f"{count:,} rejected, {error}: line {shown}{more}"),
+            )
+        total = sum(report.timings.values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Loaded {report.loaded:,} of {report.staged:,} events in "
+                f"{total:.2f}s ({report.loaded / total if total else 0:,.0f} events/s)",
+            ),
+        )
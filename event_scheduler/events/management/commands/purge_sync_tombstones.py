@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from event_scheduler.events.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the tombstones of deleted events older than any valid sync "
+        "token (EVENTS_SYNC_TOKEN_MAX_AGE_DAYS). Run it daily."
+    )
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted:,} tombstones"))
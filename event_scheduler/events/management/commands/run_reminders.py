@@ -0,0 +1,53 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from event_scheduler.events.changes import ChangeListener
+from event_scheduler.events.reminders import ReminderService
+from event_scheduler.events.reminders import leader_lock
+from event_scheduler.events.tasks import send_event_reminder
+
+
+def enqueue_reminders(reminders):
+    send_event_reminder.enqueue_many(
+        [
+            (reminder.event_id, reminder.occurrence.isoformat())
+            for reminder in reminders
+        ],
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Send event reminders. Several instances may run: one leads, the "
+        "others wait for its Postgres advisory lock."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--standby-interval",
+            type=float,
+            default=10,
+            help="Seconds between attempts to become leader.",
+        )
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+        while not stop.is_set():
+            with leader_lock(settings.REMINDERS_LOCK_ID) as leader:
+                if not leader:
+                    stop.wait(options["standby_interval"])
+                    continue
+                self.stdout.write("Leading reminder scheduling")
+                listener = ChangeListener()
+                service = ReminderService.from_settings(enqueue_reminders, listener)
+                try:
+                    service.run(stop)
+                finally:
+                    listener.close()
+                self.stdout.write(f"Stopped after firing {service.fired} reminders")
@@ -0,0 +1,56 @@
+import os
+from datetime import date
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from event_scheduler.events.digests import send_digests
+from event_scheduler.events.expansion import ExpansionExecutor
+
+
+class Command(BaseCommand):
+    help = (
+        "Email every user with events tomorrow their agenda. Run it nightly; "
+        "an interrupted run picks up where it stopped when started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            type=date.fromisoformat,
+            help="Day of the agenda (YYYY-MM-DD), tomorrow by default.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Recurrence expansion processes (0 expands in-process).",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Send the day's digests again from the first user.",
+        )
+
+    def handle(self, *args, **options):
+        day = options["date"] or timezone.localdate() + timedelta(days=1)
+        executor = ExpansionExecutor(
+            workers=options["workers"],
+            threshold=settings.EVENTS_EXPANSION_POOL_THRESHOLD,
+        )
+        try:
+            with get_connection() as connection:
+                run = send_digests(
+                    day,
+                    connection,
+                    executor,
+                    chunk_size=options["chunk_size"],
+                    restart=options["restart"],
+                )
+        finally:
+            executor.shutdown()
+        self.stdout.write(f"Sent {run.users_sent} agenda digests for {day}")
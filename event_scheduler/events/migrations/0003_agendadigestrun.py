@@ -0,0 +1,24 @@
+# Generated by Django 5.1.9 on 2026-10-19 10:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_rename_end_time_event_end_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgendaDigestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('last_user_id', models.BigIntegerField(default=0)),
+                ('users_sent', models.PositiveIntegerField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
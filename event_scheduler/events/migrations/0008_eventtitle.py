@@ -0,0 +1,44 @@
+# Generated by Django 5.1.9 on 2026-10-19 11:50
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import BtreeGinExtension
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        BtreeGinExtension(),
+        migrations.CreateModel(
+            name='EventTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=255)),
+                ('last_used', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['user', 'title'], name='event_title_trgm_idx', opclasses=['int8_ops', 'gin_trgm_ops'])],
+                'constraints': [models.UniqueConstraint(fields=('user', 'title'), name='event_title_user_title_unique')],
+            },
+        ),
+        # Titles of the existing events
+        migrations.RunSQL(
+            """
+            INSERT INTO events_eventtitle (user_id, title, last_used)
+            SELECT user_id, title, max(updated_at)
+            FROM events_event
+            GROUP BY user_id, title
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.9 on 2026-10-19 12:01
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+import event_scheduler.events.models
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking out writes
+    atomic = False
+
+    dependencies = [
+        ('events', '0008_eventtitle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        AddIndexConcurrently(
+            model_name='event',
+            index=django.contrib.postgres.indexes.GistIndex(models.F('user'), event_scheduler.events.models.TsTzRange('start', django.db.models.functions.comparison.Greatest('start', 'end')), name='event_user_span_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_recurring', True)), fields=['user'], name='event_user_series_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.9 on 2026-10-19 12:50
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_freebusy_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventTitleWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.TextField()),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='eventtitle',
+            name='event_title_trgm_idx',
+        ),
+        migrations.AddField(
+            model_name='eventtitle',
+            name='words',
+            field=models.GeneratedField(db_persist=True, expression=models.Func(models.Func(django.db.models.functions.text.Lower('title'), models.Value('[^[:alnum:]]+'), function='REGEXP_SPLIT_TO_ARRAY'), models.Value(''), function='ARRAY_REMOVE'), output_field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), size=None)),
+        ),
+        migrations.AddIndex(
+            model_name='eventtitle',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'words'], name='event_title_words_idx', opclasses=['int8_ops', 'array_ops']),
+        ),
+        migrations.AddField(
+            model_name='eventtitleword',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='eventtitleword',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['user', 'word'], name='event_title_word_trgm_idx', opclasses=['int8_ops', 'gin_trgm_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='eventtitleword',
+            constraint=models.UniqueConstraint(fields=('user', 'word'), name='event_title_word_user_word_unique'),
+        ),
+        # Words of the existing titles
+        migrations.RunSQL(
+            """
+            INSERT INTO events_eventtitleword (user_id, word)
+            SELECT DISTINCT user_id, unnest(words)
+            FROM events_eventtitle
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -1,11 +1,53 @@
-from dateutil.rrule import rruleset
-from dateutil.rrule import rrulestr
+import logging
+import secrets
+
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GistIndex
+from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
-from django.utils import timezone
+from django.db.models import F
+from django.db.models import Func
+from django.db.models import Value
+from django.db.models.functions import Greatest
+from django.db.models.functions import Lower
+
+from event_scheduler.events.expansion import fast_forward
+from event_scheduler.events.expansion import run_expansion_job
+from event_scheduler.utils.request_stats import current_stats
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+# Text search configuration of ``Event.search``
+SEARCH_CONFIG = "english"
+
+
+class TsTzRange(Func):
+    """``[start, end)`` of two datetime expressions, as a PostgreSQL range."""
+
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+def event_span():
+    """
+    ``[start, end)`` of an event, as indexed for ``events.freebusy``. The
+    API never writes an end before the start, but the admin doesn't check.
+    """
+    return TsTzRange("start", Greatest("start", "end"))
+
+
+class EventManager(models.Manager):
+    def get_queryset(self):
+        # Only full-text search reads the tsvector; don't ship it with
+        # every event
+        return super().get_queryset().defer("search")
+
 
 class Event(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -22,11 +64,62 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintained by PostgreSQL, for /api/events/search/ (see events.search)
+    search = models.GeneratedField(
+        expression=(
+            SearchVector("title", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("description", weight="B", config=SEARCH_CONFIG)
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = EventManager()
+
+    class Meta:
+        indexes = [
+            # Keyset order of /api/events/sync/ (see events.sync)
+            models.Index(
+                fields=["user", "updated_at", "id"],
+                name="event_user_updated_idx",
+            ),
+            GinIndex(fields=["search"], name="event_search_idx"),
+            # Events overlapping a free/busy range, and series to expand
+            # (see events.freebusy); btree_gist lets GiST index the user
+            GistIndex(F("user"), event_span(), name="event_user_span_idx"),
+            models.Index(
+                fields=["user"],
+                condition=models.Q(is_recurring=True),
+                name="event_user_series_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
-    def get_occurrences(self, start_dt, end_dt):
-        """Generate event occurrences between two dates"""
+    def expansion_job(self, start_dt, end_dt, limit=None):
+        """
+        Picklable arguments of ``expand_rule`` for this series, so the
+        expansion can run in a process pool (see ``events.expansion``).
+        The series start is moved close to the window with ``fast_forward``.
+        """
+        return (
+            self.recurrence_rule,
+            fast_forward(self.recurrence_rule, self.start, start_dt),
+            self.end - self.start,
+            self.exceptions,
+            start_dt,
+            end_dt,
+            limit,
+        )
+
+    def get_occurrences(self, start_dt, end_dt, expanded=None):
+        """
+        Generate event occurrences between two dates.
+
+        ``expanded`` takes the precomputed ``(spans, seconds, error)`` result
+        of ``expansion_job`` when the caller expanded it elsewhere.
+        """
         if not self.is_recurring:
             if start_dt <= self.start <= end_dt:
                 return [
@@ -38,42 +131,207 @@ class Event(models.Model):
                 ]
             return []
 
-        try:
-            # Clean the RRULE string before parsing
-            rule_str = self.recurrence_rule.strip()
-            if not rule_str.startswith("RRULE:"):
-                rule_str = "RRULE:" + rule_str
+        if expanded is None:
+            expanded = run_expansion_job(self.expansion_job(start_dt, end_dt))
+        spans, seconds, error = expanded
 
-            # Parse recurrence rule
-            ruleset = rruleset()
-            rule = rrulestr(rule_str, dtstart=self.start)
-            ruleset.rrule(rule)
+        if error is not None:
+            # Log the error and return empty list
+            logger.error(
+                "Error parsing recurrence rule %s: %s",
+                self.recurrence_rule,
+                error,
+            )
+            return []
 
-            # Add exceptions
-            for ex_date in self.exceptions:
-                if isinstance(ex_date, str):
-                    ex_date = timezone.datetime.fromisoformat(ex_date)  # noqa: PLW2901
-                ruleset.exdate(ex_date)
+        stats = current_stats()
+        if stats is not None:
+            stats.record_expansion(self.pk, self.recurrence_rule, seconds, len(spans))
 
-            occurrences = []
-            duration = self.end - self.start
+        return [
+            {
+                "start": start,
+                "end": end,
+                "cancelled": False,
+            }
+            for start, end in spans
+        ]
 
-            for dt in ruleset.between(start_dt, end_dt, inc=True):
-                occurrences.append(  # noqa: PERF401
-                    {
-                        "start": dt,
-                        "end": dt + duration,
-                        "cancelled": False,
-                    },
-                )
 
-            return occurrences  # noqa: TRY300
+class AgendaDigestRun(models.Model):
+    """
+    Progress of ``send_agenda_digests`` for one day, so an interrupted run
+    resumes after the last user whose digest was sent.
+    """
 
-        except Exception as e:
-            # Log the error and return empty list
-            import logging
+    date = models.DateField(unique=True)
+    last_user_id = models.BigIntegerField(default=0)
+    users_sent = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
 
-            logging.exception(
-                f"Error parsing recurrence rule {self.recurrence_rule}: {e!s}",  # noqa: G004, TRY401
-            )
-            return []
+    def __str__(self):
+        return f"Agenda digests of {self.date}"
+
+
+class CalendarImport(models.Model):
+    """
+    An .ics file uploaded to ``/api/imports/`` and its progress, imported
+    in the background by ``events.tasks.import_calendar``.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    user = models.ForeignKey(
+        User,
+        related_name="calendar_imports",
+        on_delete=models.CASCADE,
+    )
+    file = models.FileField(upload_to="imports/%Y/%m/")
+    size = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    bytes_read = models.PositiveBigIntegerField(default=0)
+    events_imported = models.PositiveIntegerField(default=0)
+    events_skipped = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Import of {self.file.name}"
+
+    @property
+    def progress(self):
+        """Percentage of the file read."""
+        if self.status == self.Status.DONE:
+            return 100.0
+        if not self.size:
+            return 0.0
+        return round(min(self.bytes_read / self.size, 1) * 100, 1)
+
+
+def new_feed_token():
+    return secrets.token_urlsafe(32)
+
+
+class CalendarFeed(models.Model):
+    """
+    Secret token of a user's .ics subscription URL, ``/api/feed/<token>.ics``
+    (see ``events.feeds``).
+    """
+
+    user = models.OneToOneField(
+        User,
+        related_name="calendar_feed",
+        on_delete=models.CASCADE,
+    )
+    token = models.CharField(max_length=64, unique=True, default=new_feed_token)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Calendar feed of {self.user}"
+
+
+class EventTombstone(models.Model):
+    """
+    A deleted event, so ``/api/events/sync/`` can tell clients to drop it
+    (see ``events.sync``). Kept for ``EVENTS_SYNC_TOKEN_MAX_AGE_DAYS``, after
+    which sync tokens expire; ``purge_sync_tombstones`` removes older ones.
+    """
+
+    user = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    event_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "deleted_at", "id"],
+                name="tombstone_user_deleted_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Deleted event {self.event_id}"
+
+
+class EventTitle(models.Model):
+    """
+    A title the user gave to events, and when it was last saved, for title
+    suggestions (see ``events.search.title_suggestions``). Titles stay
+    after their events are renamed or deleted: they're the user's history.
+    """
+
+    user = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    title = models.CharField(max_length=255)
+    last_used = models.DateTimeField()
+    # Maintained by PostgreSQL: the distinct lowercase words of the title,
+    # split like pg_trgm splits them
+    words = models.GeneratedField(
+        expression=Func(
+            Func(
+                Lower("title"),
+                Value("[^[:alnum:]]+"),
+                function="REGEXP_SPLIT_TO_ARRAY",
+            ),
+            Value(""),
+            function="ARRAY_REMOVE",
+        ),
+        output_field=ArrayField(models.TextField()),
+        db_persist=True,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "title"],
+                name="event_title_user_title_unique",
+            ),
+        ]
+        indexes = [
+            # btree_gin lets one GIN scan apply both conditions
+            GinIndex(
+                fields=["user", "words"],
+                opclasses=["int8_ops", "array_ops"],
+                name="event_title_words_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
+
+
+class EventTitleWord(models.Model):
+    """
+    A word of the user's ``EventTitle``s: suggestions match what's typed
+    against these, a few hundred rows, rather than against every title.
+    """
+
+    user = models.ForeignKey(User, related_name="+", on_delete=models.CASCADE)
+    word = models.TextField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "word"],
+                name="event_title_word_user_word_unique",
+            ),
+        ]
+        indexes = [
+            GinIndex(
+                fields=["user", "word"],
+                opclasses=["int8_ops", "gin_trgm_ops"],
+                name="event_title_word_trgm_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.word
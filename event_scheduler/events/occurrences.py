@@ -0,0 +1,189 @@
+"""
+Helpers turning ``Event`` rows into calendar occurrences.
+
+They are shared by the sync DRF views and their async counterparts, so both
+code paths select and expand events the same way.
+"""
+
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from event_scheduler.events.expansion import estimate_cost
+from event_scheduler.events.expansion import get_executor
+from event_scheduler.events.models import Event
+from event_scheduler.utils.request_stats import current_stats
+
+UPCOMING_DAYS = 30
+
+
+class RangeError(ValueError):
+    """
+    A range the API won't expand: too wide, or with more occurrences than
+    ``EVENTS_OCCURRENCE_BUDGET``. The message is meant for the client.
+    """
+
+
+def parse_calendar_range(params):
+    """
+    Read the ``start``/``end`` query parameters (ISO format).
+    Defaults to the current month; naive datetimes are made aware.
+    """
+    start_str = params.get("start")
+    end_str = params.get("end")
+
+    if not start_str:
+        start_dt = timezone.now().replace(
+            day=1,
+            hour=0,
+            minute=0,
+            second=0,
+            microsecond=0,
+        )
+    else:
+        start_dt = timezone.datetime.fromisoformat(start_str)
+        if timezone.is_naive(start_dt):
+            start_dt = timezone.make_aware(start_dt)
+
+    if not end_str:
+        end_dt = (start_dt + timedelta(days=31)).replace(day=1)
+    else:
+        end_dt = timezone.datetime.fromisoformat(end_str)
+        if timezone.is_naive(end_dt):
+            end_dt = timezone.make_aware(end_dt)
+
+    check_range(start_dt, end_dt)
+    return start_dt, end_dt
+
+
+def check_range(start_dt, end_dt):
+    if end_dt < start_dt:
+        msg = "The end of the range must be after its start"
+        raise RangeError(msg)
+    max_days = settings.EVENTS_MAX_RANGE_DAYS
+    if end_dt - start_dt > timedelta(days=max_days):
+        msg = f"The range can't be wider than {max_days} days"
+        raise RangeError(msg)
+
+
+def range_error_message(error):
+    """The 400 error message of a ``ValueError`` raised by the helpers."""
+    if isinstance(error, RangeError):
+        return str(error)
+    return f"Invalid date format: {error!s}"
+
+
+def range_cost(start_dt, end_dt):
+    """Throttle cost of expanding a range: one token per (started) month."""
+    return max(1, math.ceil((end_dt - start_dt) / timedelta(days=31)))
+
+
+def upcoming_range():
+    now = timezone.now()
+    return now, now + timedelta(days=UPCOMING_DAYS)
+
+
+def calendar_events(user, start_dt, end_dt):
+    """Events of ``user`` that may have occurrences in the range."""
+    return Event.objects.filter(
+        Q(user=user)
+        & (
+            Q(start__range=(start_dt, end_dt))
+            | Q(end__range=(start_dt, end_dt))
+            | Q(is_recurring=True)
+        ),
+    )
+
+
+def upcoming_events(user, now):
+    """Events of ``user`` that may have occurrences after ``now``."""
+    return Event.objects.filter(
+        Q(user=user) & (Q(end__gte=now) | Q(is_recurring=True)),
+    )
+
+
+def expand_events(events, start_dt, end_dt):
+    """
+    Expand ``events`` into the occurrences falling between ``start_dt`` and
+    ``end_dt``, sorted by start time. Cancelled occurrences are skipped.
+    """
+    events = list(events)
+    budget = settings.EVENTS_OCCURRENCE_BUDGET
+    # Recurring series are expanded as one batch, which the executor may
+    # offload to its process pool when the batch is expensive enough.
+    series = [event for event in events if event.is_recurring]
+    jobs = [event.expansion_job(start_dt, end_dt, budget + 1) for event in series]
+    # Refuse before spending the CPU when the estimate is already over budget;
+    # each job is capped anyway in case the estimate is short
+    if sum(estimate_cost(job) for job in jobs) + len(events) - len(series) > budget:
+        raise_over_budget(budget)
+    expanded = get_executor().run(jobs)
+    results = dict(zip((id(event) for event in series), expanded, strict=True))
+
+    occurrences = []
+    for event in events:
+        for occ in event.get_occurrences(start_dt, end_dt, results.get(id(event))):
+            if not occ["cancelled"]:
+                occurrences.append(  # noqa: PERF401
+                    {
+                        "id": event.id,
+                        "title": event.title,
+                        "start": occ["start"],
+                        "end": occ["end"],
+                        "description": event.description,
+                        "is_recurring": event.is_recurring,
+                    },
+                )
+
+    if len(occurrences) > budget:
+        raise_over_budget(budget)
+    occurrences.sort(key=lambda x: x["start"])
+
+    stats = current_stats()
+    if stats is not None:
+        stats.record_range(start_dt, end_dt)
+        stats.record_events(len(events), len(occurrences))
+    return occurrences
+
+
+def raise_over_budget(budget):
+    msg = f"The range has more than {budget} occurrences, request a narrower one"
+    raise RangeError(msg)
+
+
+def _contiguous(ranges):
+    ordered = sorted(ranges)
+    covered = ordered[0][1]
+    for start_dt, end_dt in ordered[1:]:
+        if start_dt > covered:
+            return False
+        covered = max(covered, end_dt)
+    return True
+
+
+def expand_ranges(user, ranges):
+    """
+    Return the occurrences of ``user``'s events in each ``(start_dt,
+    end_dt)`` of ``ranges``, as ``expand_events`` would, from a single
+    query. Overlapping ranges share one expansion pass over their union.
+    """
+    low = min(start_dt for start_dt, _end_dt in ranges)
+    high = max(end_dt for _start_dt, end_dt in ranges)
+    events = list(
+        Event.objects.filter(
+            Q(user=user) & (Q(start__range=(low, high)) | Q(is_recurring=True)),
+        ),
+    )
+
+    if not _contiguous(ranges):
+        # Expanding the gaps between them would be wasted work
+        return [expand_events(events, start_dt, end_dt) for start_dt, end_dt in ranges]
+
+    occurrences = expand_events(events, low, high)
+    return [
+        [occ for occ in occurrences if start_dt <= occ["start"] <= end_dt]
+        for start_dt, end_dt in ranges
+    ]
@@ -0,0 +1,356 @@
+"""
+Reminder scheduling, run by ``manage.py run_reminders``.
+
+``ReminderScheduler`` holds the reminders due in the loaded window in a
+min-heap keyed by fire time. Windows of ``REMINDERS_WINDOW_SECONDS`` are
+loaded ahead of time in keyset-paginated chunks, interleaved with firing, so
+a load never delays due reminders by more than one chunk. Edits arrive as
+change notifications (see ``events.changes``) and only reload the events
+that changed; entries of a changed event are invalidated lazily through a
+per-event version instead of being searched for in the heap.
+
+Firing enqueues ``send_event_reminder`` jobs, which re-check the occurrence
+against the current row before sending.
+"""
+
+import heapq
+import logging
+import time
+from contextlib import contextmanager
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+from django.db.models import Q
+
+from event_scheduler.events.expansion import fast_forward
+from event_scheduler.events.expansion import run_expansion_job
+from event_scheduler.events.models import Event
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+MICROSECOND = timedelta(microseconds=1)
+WATERMARK_CACHE_KEY = "reminders:watermark"
+
+
+class Series(NamedTuple):
+    """The ``Event`` columns needed to schedule its reminders."""
+
+    id: int
+    user_id: int
+    start: datetime
+    end: datetime
+    is_recurring: bool
+    recurrence_rule: str | None
+    exceptions: list
+
+
+class Reminder(NamedTuple):
+    event_id: int
+    occurrence: datetime
+    fire_at: float
+
+
+class ReminderScheduler:
+    """
+    Min-heap of ``(fire_at, event_id, occurrence_us, version)`` entries.
+
+    Times are stored as numbers rather than datetimes to keep a window of
+    a million series compact; ``occurrence_us`` is exact (microseconds since
+    the epoch) so it can be compared with the event's occurrences later.
+    """
+
+    def __init__(self, lead):
+        self.lead = lead
+        self._heap = []
+        self._versions = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def occurrences(self, series, start, end):
+        """Starts of the occurrences of ``series`` to remind of in ``[start, end)``."""
+        occ_start, occ_end = start + self.lead, end + self.lead
+        if not series.is_recurring:
+            return [series.start] if occ_start <= series.start < occ_end else []
+
+        spans, _seconds, error = run_expansion_job(
+            (
+                series.recurrence_rule,
+                fast_forward(series.recurrence_rule, series.start, occ_start),
+                series.end - series.start,
+                series.exceptions,
+                occ_start,
+                occ_end,
+            ),
+        )
+        if error is not None:
+            logger.error(
+                "Error parsing recurrence rule %s: %s",
+                series.recurrence_rule,
+                error,
+            )
+        return [span_start for span_start, _end in spans if span_start < occ_end]
+
+    def add(self, series, start, end):
+        """Schedule the reminders of ``series`` falling in ``[start, end)``."""
+        version = self._versions.get(series.id, 0)
+        lead = self.lead.total_seconds()
+        occurrences = self.occurrences(series, start, end)
+        for occurrence in occurrences:
+            occurrence_us = (occurrence - EPOCH) // MICROSECOND
+            fire_at = occurrence_us / 1_000_000 - lead
+            heapq.heappush(self._heap, (fire_at, series.id, occurrence_us, version))
+        return len(occurrences)
+
+    def discard(self, event_id):
+        """Drop the scheduled reminders of ``event_id``."""
+        self._versions[event_id] = self._versions.get(event_id, 0) + 1
+
+    def replace(self, series, start, end):
+        self.discard(series.id)
+        return self.add(series, start, end)
+
+    def next_at(self):
+        """Fire time of the earliest live reminder, or ``None``."""
+        heap = self._heap
+        while heap and heap[0][3] != self._versions.get(heap[0][1], 0):
+            heapq.heappop(heap)
+        return heap[0][0] if heap else None
+
+    def pop_due(self, now):
+        """Remove and return the reminders due at ``now`` (a timestamp)."""
+        due = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            fire_at, event_id, occurrence_us, version = heapq.heappop(heap)
+            if version == self._versions.get(event_id, 0):
+                occurrence = EPOCH + timedelta(microseconds=occurrence_us)
+                due.append(Reminder(event_id, occurrence, fire_at))
+        return due
+
+
+def series_queryset():
+    return Event.objects.order_by("pk").values_list(*Series._fields)
+
+
+def load_chunks(start, end, lead, chunk_size):
+    """
+    Yield lists of the ``Series`` that may have reminders in ``[start, end)``,
+    ``chunk_size`` rows at a time using keyset pagination.
+    """
+    queryset = series_queryset().filter(
+        Q(is_recurring=True, start__lt=end + lead)
+        | Q(is_recurring=False, start__gte=start + lead, start__lt=end + lead),
+    )
+    last_pk = 0
+    while True:
+        rows = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not rows:
+            return
+        yield [Series(*row) for row in rows]
+        last_pk = rows[-1][0]
+
+
+class ReminderService:
+    """
+    The scheduling loop: fire due reminders, load the next window before the
+    current one runs out and apply change notifications.
+
+    ``fire`` receives lists of ``Reminder``; ``listener`` is a
+    ``events.changes.ChangeListener`` or anything with the same ``poll``.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        fire,
+        listener,
+        *,
+        lead,
+        window,
+        chunk_size=2000,
+        max_lateness=5,
+        catch_up=300,
+        poll_interval=1,
+        keepalive_interval=30,
+        clock=time.time,
+    ):
+        self.scheduler = ReminderScheduler(lead)
+        self.fire = fire
+        self.listener = listener
+        self.window = window
+        self.chunk_size = chunk_size
+        self.max_lateness = max_lateness
+        self.catch_up = catch_up
+        self.poll_interval = poll_interval
+        self.keepalive_interval = keepalive_interval
+        self.clock = clock
+        self.loaded_until = None
+        self.fired = 0
+        self.worst_lateness = 0
+        self._loader = None
+        self._loading_until = None
+        self._changed_during_load = set()
+        self._checked_at = clock()
+
+    @classmethod
+    def from_settings(cls, fire, listener):
+        from django.conf import settings
+
+        return cls(
+            fire,
+            listener,
+            lead=timedelta(seconds=settings.REMINDERS_LEAD_SECONDS),
+            window=timedelta(seconds=settings.REMINDERS_WINDOW_SECONDS),
+            chunk_size=settings.REMINDERS_LOAD_CHUNK_SIZE,
+            max_lateness=settings.REMINDERS_MAX_LATENESS_SECONDS,
+            catch_up=settings.REMINDERS_CATCH_UP_SECONDS,
+        )
+
+    def now(self):
+        return datetime.fromtimestamp(self.clock(), tz=UTC)
+
+    def start(self):
+        """
+        Start from where the previous leader stopped firing, but no further
+        back than ``catch_up`` seconds.
+        """
+        now = self.clock()
+        start = now - self.catch_up
+        watermark = cache.get(WATERMARK_CACHE_KEY)
+        if watermark is not None:
+            start = max(start, watermark + 1e-6)
+        self.loaded_until = datetime.fromtimestamp(min(start, now), tz=UTC)
+
+    def run(self, stop):
+        self.start()
+        while not stop.is_set():
+            self.step()
+
+    def step(self):
+        if self.loaded_until is None:
+            self.start()
+        self.fire_due()
+        self.keepalive()
+
+        if self._loader is None and self.now() + self.window / 2 >= self.loaded_until:
+            self._start_load()
+        if self._loader is not None:
+            self._load_chunk()
+            timeout = 0
+        else:
+            next_at = self.scheduler.next_at()
+            timeout = self.poll_interval
+            if next_at is not None:
+                timeout = min(max(next_at - self.clock(), 0), timeout)
+
+        event_ids, resync_since = self.listener.poll(timeout)
+        if resync_since is not None:
+            event_ids |= self._changed_since(resync_since)
+        if event_ids:
+            self.apply_changes(event_ids)
+
+    def fire_due(self):
+        now = self.clock()
+        due = self.scheduler.pop_due(now)
+        if not due:
+            return
+        self.fire(due)
+        self.fired += len(due)
+        lateness = now - due[0].fire_at
+        self.worst_lateness = max(self.worst_lateness, lateness)
+        if lateness > self.max_lateness:
+            logger.warning("Fired %d reminders up to %.1fs late", len(due), lateness)
+        cache.set(WATERMARK_CACHE_KEY, due[-1].fire_at, None)
+
+    def keepalive(self):
+        """
+        Touch the database connection now and then: the leader lock lives in
+        its session, so a dropped connection must stop this process (the
+        error propagates) before another instance takes over.
+        """
+        if self.clock() - self._checked_at < self.keepalive_interval:
+            return
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT 1")
+        self._checked_at = self.clock()
+
+    def apply_changes(self, event_ids):
+        """Reschedule the reminders of changed events over what is loaded."""
+        horizon = self._loading_until or self.loaded_until
+        start = self.now()
+        rows = {
+            row[0]: Series(*row) for row in series_queryset().filter(pk__in=event_ids)
+        }
+        for event_id in event_ids:
+            if event_id in rows:
+                self.scheduler.replace(rows[event_id], start, horizon)
+            else:
+                self.scheduler.discard(event_id)
+        if self._loader is not None:
+            # The loader must not schedule them a second time
+            self._changed_during_load |= event_ids
+
+    def _changed_since(self, since):
+        # Pub/sub messages were possibly lost: look the edits up instead
+        since = datetime.fromtimestamp(since, tz=UTC) - timedelta(seconds=5)
+        return set(
+            Event.objects.filter(updated_at__gte=since).values_list("pk", flat=True),
+        )
+
+    def _start_load(self):
+        start = self.loaded_until
+        end = max(start, self.now()) + self.window
+        logger.info("Loading reminders from %s to %s", start, end)
+        self._loading_until = end
+        self._changed_during_load = set()
+        self._loader = (
+            (start, end, chunk)
+            for chunk in load_chunks(start, end, self.scheduler.lead, self.chunk_size)
+        )
+
+    def _load_chunk(self):
+        try:
+            start, end, chunk = next(self._loader)
+        except StopIteration:
+            self.loaded_until = self._loading_until
+            self._loader = self._loading_until = None
+            logger.info(
+                "Reminders loaded until %s, %d scheduled",
+                self.loaded_until,
+                len(self.scheduler),
+            )
+            return
+        for series in chunk:
+            if series.id not in self._changed_during_load:
+                self.scheduler.add(series, start, end)
+
+
+@contextmanager
+def leader_lock(lock_id, using=DEFAULT_DB_ALIAS):
+    """
+    Try to take the Postgres session advisory lock ``lock_id``; yields
+    whether this process is the leader. The lock is released on exit, or by
+    Postgres when the connection drops.
+
+    Other databases have no advisory locks: the caller is always leader.
+    """
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        yield True
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [lock_id])
+        acquired = cursor.fetchone()[0]
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
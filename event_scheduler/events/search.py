@@ -0,0 +1,253 @@
+"""
+Full-text search over event titles and descriptions
+(``/api/events/search/``), and title suggestions
+(``/api/events/autocomplete/``).
+
+``Event.search`` is a tsvector column generated by PostgreSQL from the
+title (weighted A) and the description (weighted B), with a GIN index.
+Queries use the web search syntax (``"exact phrase" -excluded or``),
+results are ranked with ``ts_rank`` and paginated by keyset on
+``(rank, id)``, so a page costs the same however deep it is.
+
+With a date range, one-time events must start in it and series must have
+an occurrence in it. Only the first occurrence of a series is expanded,
+after the query, so a page may need several batches of rows: at most
+``EVENTS_SEARCH_SCAN_LIMIT`` rows are examined per request, and the cursor
+resumes after the last one. Without a range every match is returned, with
+its next occurrence within ``EVENTS_MAX_RANGE_DAYS``.
+
+Title suggestions match what's been typed against the user's titles with
+``pg_trgm`` word similarity (``<%``), which covers prefixes and typos
+alike. They're read from ``EventTitle``, one row per distinct title,
+rather than from the events: a common word matches thousands of events but
+few titles. Still, it matches thousands of titles at 100k events, and
+computing their similarity was most of the cost, so titles are found
+through their words (``EventTitle.words``, indexed):
+
+- a single word is matched against ``EventTitleWord``, the user's distinct
+  words, and titles are ranked by their most similar word, then most
+  recently used; only the ``limit`` most recent titles of each matching
+  word are read;
+- several words are matched one by one, the last one typically as a
+  prefix, and only the titles containing a match for each are ranked by
+  the similarity of the whole title.
+
+Every path writing events calls ``remember_titles`` (the loader does the
+same in SQL).
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery
+from django.contrib.postgres.search import SearchRank
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.db.models import FloatField
+from django.db.models import Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from event_scheduler.events.cache import get_events_version
+from event_scheduler.events.expansion import run_expansion_job
+from event_scheduler.events.models import SEARCH_CONFIG
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import EventTitle
+from event_scheduler.events.models import EventTitleWord
+
+# Shorter input has too few trigrams to match on
+MIN_SUGGESTION_LENGTH = 2
+MAX_SUGGESTIONS = 20
+
+# Words as ``EventTitle.words`` splits them
+WORD_RE = re.compile(r"[^\W_]+")
+
+SUGGEST_TITLES = """
+WITH matches AS (
+    SELECT word, word_similarity(%(text)s, word) AS similarity
+    FROM events_eventtitleword
+    WHERE user_id = %(user_id)s AND %(text)s <%% word
+)
+SELECT t.title
+FROM matches m
+CROSS JOIN LATERAL (
+    SELECT title, last_used
+    FROM events_eventtitle
+    WHERE user_id = %(user_id)s AND words @> ARRAY[m.word]
+    ORDER BY last_used DESC, title
+    LIMIT %(limit)s
+) t
+GROUP BY t.title, t.last_used
+ORDER BY max(m.similarity) DESC, t.last_used DESC, t.title
+LIMIT %(limit)s
+"""
+
+REMEMBER_WORDS = """
+INSERT INTO events_eventtitleword (user_id, word)
+SELECT DISTINCT t.user_id, w.word
+FROM events_eventtitle t, unnest(t.words) AS w(word)
+WHERE t.id = ANY(%s)
+ORDER BY t.user_id, w.word
+ON CONFLICT (user_id, word) DO NOTHING
+"""
+
+
+class SearchCursorError(ValueError):
+    pass
+
+
+def encode_cursor(cursor):
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+def decode_cursor(value):
+    """``(rank, id)`` of a cursor from ``encode_cursor``."""
+    try:
+        rank, pk = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return float(rank), int(pk)
+    except (binascii.Error, TypeError, ValueError) as e:
+        msg = "Invalid cursor"
+        raise SearchCursorError(msg) from e
+
+
+def next_occurrence(event, start_dt, end_dt):
+    """``(start, end)`` of the first occurrence of ``event`` in the range."""
+    if not event.is_recurring:
+        if start_dt <= event.start <= end_dt:
+            return event.start, event.end
+        return None
+    spans, _seconds, error = run_expansion_job(
+        event.expansion_job(start_dt, end_dt, limit=1),
+    )
+    return spans[0] if spans and error is None else None
+
+
+def search_events(user, text, start_dt=None, end_dt=None, cursor=None):
+    """
+    Return ``([(event, rank, next occurrence), ...], next cursor)`` for the
+    events of ``user`` matching ``text``, best first; the next cursor is
+    ``None`` on the last page.
+    """
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+    queryset = (
+        Event.objects.filter(user=user, search=query)
+        # ts_rank is a real, whose text form doesn't round-trip through a
+        # cursor: compare doubles
+        .annotate(rank=Cast(SearchRank(F("search"), query), FloatField()))
+        .order_by("-rank", "-pk")
+    )
+    if start_dt is None:
+        required = False
+        start_dt = timezone.now()
+        end_dt = start_dt + timedelta(days=settings.EVENTS_MAX_RANGE_DAYS)
+    else:
+        required = True
+        queryset = queryset.filter(
+            Q(start__range=(start_dt, end_dt))
+            | Q(is_recurring=True, start__lte=end_dt),
+        )
+
+    limit = settings.EVENTS_SEARCH_PAGE_SIZE
+    results = []
+    scanned = 0
+    while scanned < settings.EVENTS_SEARCH_SCAN_LIMIT:
+        page = queryset
+        if cursor is not None:
+            rank, pk = cursor
+            page = page.filter(Q(rank__lt=rank) | Q(rank=rank, pk__lt=pk))
+        batch = list(page[:limit])
+        for event in batch:
+            scanned += 1
+            cursor = (event.rank, event.pk)
+            occurrence = next_occurrence(event, start_dt, end_dt)
+            if occurrence is not None or not required:
+                results.append((event, event.rank, occurrence))
+                if len(results) == limit:
+                    return results, cursor
+        if len(batch) < limit:
+            return results, None
+    return results, cursor
+
+
+def title_suggestions(user, text, limit):
+    """
+    Up to ``limit`` distinct titles of ``user``'s events matching ``text``,
+    most similar first, then most recently used. Cached per prefix for
+    ``EVENTS_AUTOCOMPLETE_CACHE_TIMEOUT``, keyed by the events version so
+    new titles show up at once.
+    """
+    text = " ".join(text.split()).lower()
+    if len(text) < MIN_SUGGESTION_LENGTH:
+        return []
+    digest = hashlib.sha256(text.encode()).hexdigest()[:32]
+    version = get_events_version(user.pk)
+    key = f"events:{user.pk}:titles:{version}:{limit}:{digest}"
+    titles = cache.get(key)
+    if titles is None:
+        words = WORD_RE.findall(text)
+        if words == [text]:
+            titles = _suggest_for_word(user, text, limit)
+        else:
+            titles = _suggest_for_words(user, text, words, limit)
+        cache.set(key, titles, settings.EVENTS_AUTOCOMPLETE_CACHE_TIMEOUT)
+    return titles
+
+
+def _suggest_for_word(user, word, limit):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            SUGGEST_TITLES,
+            {"user_id": user.pk, "text": word, "limit": limit},
+        )
+        return [title for (title,) in cursor.fetchall()]
+
+
+def _suggest_for_words(user, text, words, limit):
+    if not words:
+        return []
+    queryset = EventTitle.objects.filter(user=user, title__trigram_word_similar=text)
+    for word in words:
+        # Words too short for trigrams, typically the one being typed,
+        # match as prefixes
+        matches = list(
+            EventTitleWord.objects.filter(
+                Q(word__trigram_word_similar=word) | Q(word__startswith=word),
+                user=user,
+            ).values_list("word", flat=True),
+        )
+        if not matches:
+            return []
+        queryset = queryset.filter(words__overlap=matches)
+    return list(
+        queryset.annotate(similarity=TrigramWordSimilarity(text, "title"))
+        .order_by("-similarity", "-last_used", "title")
+        .values_list("title", flat=True)[:limit],
+    )
+
+
+def remember_titles(events):
+    """
+    Record the titles of saved ``events`` as just used, in one upsert, and
+    their words in another.
+    """
+    now = timezone.now()
+    # Sorted, so concurrent upserts lock their rows in the same order
+    keys = sorted({(event.user_id, event.title) for event in events})
+    titles = EventTitle.objects.bulk_create(
+        [
+            EventTitle(user_id=user_id, title=title, last_used=now)
+            for user_id, title in keys
+        ],
+        update_conflicts=True,
+        unique_fields=["user", "title"],
+        update_fields=["last_used"],
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(REMEMBER_WORDS, [[title.pk for title in titles]])
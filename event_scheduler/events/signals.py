@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .cache import bump_events_version
+from .changes import publish_change
+from .models import Event
+from .models import EventTombstone
+from .search import remember_titles
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, update_fields=None, **kwargs):
+    bump_events_version(instance.user_id)
+    if update_fields is None or "title" in update_fields:
+        remember_titles([instance])
+    publish_change("saved", instance.pk, instance.user_id)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, origin=None, **kwargs):
+    bump_events_version(instance.user_id)
+    publish_change("deleted", instance.pk, instance.user_id)
+    # Events deleted with their user have no one left to sync them
+    if getattr(origin, "model", type(origin)) is not User:
+        EventTombstone.objects.create(user_id=instance.user_id, event_id=instance.pk)
@@ -0,0 +1,218 @@
+"""
+Server-sent events stream of a user's event changes (``/api/stream/``).
+
+Each ASGI process holds a single subscription to ``EVENTS_CHANGES_CHANNEL``
+(see ``events.changes``), a ``ChangeHub`` which fans the messages out to
+the asyncio queues of the streams of their user. An idle stream costs a
+queue and a suspended coroutine, no thread or Redis connection.
+
+Messages are sent as
+
+    id: 1700000000.123
+    event: change
+    data: {"op": "saved", "event_id": 42}
+
+with the ``at`` time of the change as id. A client reconnecting with
+``Last-Event-ID`` gets the changes it missed replayed from the database
+(``updated_at`` and the sync tombstones, see ``events.sync``); so does a
+stream whose queue overflowed or whose hub lost Redis for a while. When
+there's too much to replay, a ``reset`` event tells the client to reload
+its events instead. Comment lines are sent as heartbeats so proxies keep
+idle streams open.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+import time
+import weakref
+from collections import defaultdict
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import redis
+import redis.asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import EventTombstone
+
+logger = logging.getLogger(__name__)
+
+# Put in a queue when its stream may have missed messages
+RESYNC = object()
+
+
+class ChangeHub:
+    """
+    Subscription to the change channel shared by the streams of one event
+    loop, reconnecting with a backoff when Redis goes away.
+    """
+
+    def __init__(self, url, channel, queue_size=100):
+        self.url = url
+        self.channel = channel
+        self.queue_size = queue_size
+        self._queues = defaultdict(set)
+        self._task = None
+
+    def subscribe(self, user_id):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        queue = asyncio.Queue(self.queue_size)
+        self._queues[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id, queue):
+        queues = self._queues.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._queues[user_id]
+
+    def dispatch(self, message):
+        for queue in self._queues.get(message.get("user_id"), ()):
+            _put(queue, message)
+
+    def resync_all(self):
+        for queues in self._queues.values():
+            for queue in queues:
+                _put(queue, RESYNC)
+
+    async def _listen(self):
+        client = redis.asyncio.Redis.from_url(self.url)
+        delay = 1
+        connected_before = False
+        while True:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                if connected_before:
+                    # Messages published while disconnected are lost
+                    self.resync_all()
+                connected_before = True
+                delay = 1
+                async for message in pubsub.listen():
+                    self.dispatch(json.loads(message["data"]))
+            except (redis.RedisError, OSError):
+                logger.warning("Lost the event change subscription", exc_info=True)
+            finally:
+                with contextlib.suppress(redis.RedisError, OSError):
+                    await pubsub.aclose()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+
+def _put(queue, item):
+    try:
+        queue.put_nowait(item)
+    except asyncio.QueueFull:
+        # A client that doesn't keep up: drop its backlog, it's replayed
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC)
+
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_hub():
+    """``ChangeHub`` of the running event loop."""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = ChangeHub(
+            settings.EVENTS_CHANGES_REDIS_URL,
+            settings.EVENTS_CHANGES_CHANNEL,
+            settings.EVENTS_STREAM_QUEUE_SIZE,
+        )
+    return hub
+
+
+def replay_changes(user_id, since):
+    """
+    Change messages of ``user_id`` since ``since`` (a message ``at``), or
+    ``None`` when the client should reload its events instead: there are
+    more than ``EVENTS_STREAM_REPLAY_LIMIT`` or tombstones may be gone.
+    """
+    limit = settings.EVENTS_STREAM_REPLAY_LIMIT
+    # Rows are timestamped before commit, slightly ahead of their message
+    start = datetime.fromtimestamp(since, UTC) - timedelta(
+        seconds=settings.EVENTS_SYNC_OVERLAP_SECONDS,
+    )
+    max_age = timedelta(days=settings.EVENTS_SYNC_TOKEN_MAX_AGE_DAYS)
+    if start < timezone.now() - max_age:
+        return None
+    saved = list(
+        Event.objects.filter(user_id=user_id, updated_at__gt=start)
+        .order_by("updated_at", "pk")
+        .values_list("pk", "updated_at")[: limit + 1],
+    )
+    deleted = list(
+        EventTombstone.objects.filter(user_id=user_id, deleted_at__gt=start)
+        .order_by("deleted_at", "pk")
+        .values_list("event_id", "deleted_at")[: limit + 1],
+    )
+    if len(saved) + len(deleted) > limit:
+        return None
+    messages = [
+        {"op": op, "event_id": pk, "user_id": user_id, "at": at.timestamp()}
+        for op, rows in (("saved", saved), ("deleted", deleted))
+        for pk, at in rows
+    ]
+    return sorted(messages, key=lambda message: message["at"])
+
+
+def format_message(message):
+    if message["op"] == "reset":
+        return f"id: {message['at']}\nevent: reset\ndata: {{}}\n\n"
+    data = json.dumps({"op": message["op"], "event_id": message["event_id"]})
+    return f"id: {message['at']}\nevent: change\ndata: {data}\n\n"
+
+
+def parse_last_event_id(value):
+    try:
+        since = float(value)
+    except (TypeError, ValueError):
+        return None
+    # Ids are message times; ignore ones from the future
+    return since if 0 < since <= time.time() else None
+
+
+async def change_stream(user_id, since=None, hub=None):
+    """
+    Yield the SSE stream of ``user_id``, replaying what happened after
+    ``since`` first, for ``EVENTS_STREAM_MAX_SECONDS`` at most: clients
+    reconnect, which spreads them over the processes again.
+    """
+    hub = hub or get_hub()
+    queue = hub.subscribe(user_id)
+    heartbeat = settings.EVENTS_STREAM_HEARTBEAT_SECONDS
+    deadline = time.monotonic() + settings.EVENTS_STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {settings.EVENTS_STREAM_RETRY_MS}\n\n"
+        pending = RESYNC if since is not None else None
+        since = since or time.time()
+        while time.monotonic() < deadline:
+            if pending is RESYNC:
+                messages = await sync_to_async(replay_changes)(user_id, since)
+                if messages is None:
+                    messages = [{"op": "reset", "at": time.time()}]
+            elif pending is not None:
+                messages = [pending]
+            else:
+                messages = []
+            for message in messages:
+                since = max(since, message["at"])
+                yield format_message(message)
+            try:
+                pending = await asyncio.wait_for(queue.get(), heartbeat)
+            except TimeoutError:
+                pending = None
+                yield ": heartbeat\n\n"
+    finally:
+        hub.unsubscribe(user_id, queue)
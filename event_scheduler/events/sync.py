@@ -0,0 +1,163 @@
+"""
+Incremental sync of a user's events (``/api/events/sync/``).
+
+A client starts without a token and pages through all of its events; every
+response carries a token to send next time, which returns only the events
+saved and the ids of the events deleted since. Both are read in keyset
+order, ``(updated_at, id)`` on events and ``(deleted_at, id)`` on
+``EventTombstone``, from the indexes of that name.
+
+``updated_at`` and ``deleted_at`` are set before the transaction commits,
+so a row can become visible with a timestamp slightly behind the last one
+returned. Once a client has caught up, its cursors are therefore moved
+back to ``EVENTS_SYNC_OVERLAP_SECONDS`` ago: the changes of that window are
+sent again, and clients apply them idempotently.
+
+Writes must therefore commit within that window of setting the
+timestamps. ``load_events`` stamps its rows in a last statement before its
+commit; a load whose stamping alone outlasts the window, at many millions
+of rows, can still be missed, and should be split or the window widened.
+
+Tokens are signed, bound to their user and expire after
+``EVENTS_SYNC_TOKEN_MAX_AGE_DAYS``, since tombstones aren't kept longer.
+An expired token starts a full resync, flagged ``reset``.
+"""
+
+from datetime import datetime
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import EventTombstone
+
+SALT = "events.sync"
+
+
+class SyncTokenError(ValueError):
+    pass
+
+
+def dump_token(user_id, events_cursor, deleted_cursor):
+    """Opaque token for the cursors, each ``(datetime, id)`` or ``None``."""
+    return signing.dumps(
+        {
+            "u": user_id,
+            "e": _dump_cursor(events_cursor),
+            "d": _dump_cursor(deleted_cursor),
+        },
+        salt=SALT,
+        compress=True,
+    )
+
+
+def load_token(user_id, token):
+    """
+    Cursors of ``token``, or ``None`` when it has expired; raise
+    ``SyncTokenError`` when it isn't a token of ``user_id``.
+    """
+    try:
+        payload = signing.loads(
+            token,
+            salt=SALT,
+            max_age=timedelta(days=settings.EVENTS_SYNC_TOKEN_MAX_AGE_DAYS),
+        )
+    except signing.SignatureExpired:
+        return None
+    except signing.BadSignature as e:
+        msg = "Invalid sync token"
+        raise SyncTokenError(msg) from e
+    if payload.get("u") != user_id:
+        msg = "Invalid sync token"
+        raise SyncTokenError(msg)
+    return _load_cursor(payload["e"]), _load_cursor(payload["d"])
+
+
+def _dump_cursor(cursor):
+    return None if cursor is None else [cursor[0].isoformat(), cursor[1]]
+
+
+def _load_cursor(cursor):
+    return None if cursor is None else (datetime.fromisoformat(cursor[0]), cursor[1])
+
+
+def _page(queryset, field, cursor, limit):
+    """Rows of ``queryset`` after ``cursor`` in ``(field, id)`` order."""
+    if cursor is not None:
+        moment, pk = cursor
+        queryset = queryset.filter(
+            Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "pk__gt": pk}),
+        )
+    rows = list(queryset.order_by(field, "pk")[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _next_cursor(rows, field, cursor, more, overlap_start):
+    if rows:
+        cursor = (getattr(rows[-1], field), rows[-1].pk)
+    if not more and cursor is not None and cursor[0] > overlap_start:
+        # Caught up: send the last moments again next time
+        cursor = (overlap_start, 0)
+    return cursor
+
+
+def sync_changes(user, token=None):
+    """
+    Events saved and ids of events deleted since ``token``, at most
+    ``EVENTS_SYNC_PAGE_SIZE`` of each, as a dict with the next ``token``,
+    ``more`` when the client should ask again right away, and ``reset``
+    when the client should drop its events first.
+    """
+    overlap_start = timezone.now() - timedelta(
+        seconds=settings.EVENTS_SYNC_OVERLAP_SECONDS,
+    )
+    cursors = load_token(user.pk, token) if token else None
+    reset = cursors is None
+    if reset:
+        # Everything there is, then what gets deleted from now on
+        cursors = (None, (overlap_start, 0))
+    events_cursor, deleted_cursor = cursors
+
+    limit = settings.EVENTS_SYNC_PAGE_SIZE
+    events, more_events = _page(
+        Event.objects.filter(user=user),
+        "updated_at",
+        events_cursor,
+        limit,
+    )
+    tombstones, more_deleted = _page(
+        EventTombstone.objects.filter(user=user).only("event_id", "deleted_at"),
+        "deleted_at",
+        deleted_cursor,
+        limit,
+    )
+    token = dump_token(
+        user.pk,
+        _next_cursor(events, "updated_at", events_cursor, more_events, overlap_start),
+        _next_cursor(
+            tombstones,
+            "deleted_at",
+            deleted_cursor,
+            more_deleted,
+            overlap_start,
+        ),
+    )
+    return {
+        "events": events,
+        "deleted": [tombstone.event_id for tombstone in tombstones],
+        "token": token,
+        "more": more_events or more_deleted,
+        "reset": reset,
+    }
+
+
+def purge_tombstones():
+    """Delete the tombstones no valid token can need anymore."""
+    cutoff = timezone.now() - timedelta(
+        days=settings.EVENTS_SYNC_TOKEN_MAX_AGE_DAYS + 1,
+    )
+    deleted, _ = EventTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
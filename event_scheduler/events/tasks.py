@@ -0,0 +1,104 @@
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from event_scheduler.events.ical import ICalendarImporter
+from event_scheduler.events.models import CalendarImport
+from event_scheduler.events.models import Event
+from event_scheduler.tasks.registry import task
+
+logger = logging.getLogger(__name__)
+
+
+@task(queue="reminders", max_retries=3, backoff=5)
+def send_event_reminder(event_id, occurrence):
+    """
+    Email the owner of ``event_id`` about the occurrence starting at
+    ``occurrence`` (ISO format).
+
+    The scheduler may act on data that changed since it loaded it, so the
+    occurrence is checked against the current row: reminders of deleted
+    events, or of occurrences moved or cancelled since, are dropped.
+    """
+    event = Event.objects.select_related("user").filter(pk=event_id).first()
+    if event is None or not event.user.email:
+        return
+    start = datetime.fromisoformat(occurrence)
+    if not any(occ["start"] == start for occ in event.get_occurrences(start, start)):
+        return
+
+    local_start = timezone.localtime(start)
+    send_mail(
+        subject=f"Reminder: {event.title} at {local_start:%H:%M}",
+        message=(
+            f"{event.title} starts on {local_start:%A %d %B %Y at %H:%M}.\n\n"
+            f"{event.description}"
+        ).strip(),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[event.user.email],
+    )
+
+
+@task(queue="imports", max_retries=0)
+def import_calendar(import_id):
+    """
+    Import the .ics file of a ``CalendarImport``, saving the progress after
+    every batch.
+
+    Batches are committed as they go, so an import interrupted by a worker
+    crash isn't run again (it would duplicate the events already inserted):
+    it is marked failed when the job is recovered.
+    """
+    claimed = CalendarImport.objects.filter(
+        pk=import_id,
+        status=CalendarImport.Status.PENDING,
+    ).update(status=CalendarImport.Status.RUNNING)
+    if not claimed:
+        CalendarImport.objects.filter(
+            pk=import_id,
+            status=CalendarImport.Status.RUNNING,
+        ).update(
+            status=CalendarImport.Status.FAILED,
+            error="The import was interrupted",
+            finished_at=timezone.now(),
+        )
+        return
+
+    record = CalendarImport.objects.select_related("user").get(pk=import_id)
+
+    def save_progress(importer, **fields):
+        CalendarImport.objects.filter(pk=import_id).update(
+            bytes_read=importer.bytes_read,
+            events_imported=importer.imported,
+            events_skipped=importer.skipped,
+            **fields,
+        )
+
+    importer = ICalendarImporter(
+        record.user,
+        batch_size=settings.EVENTS_IMPORT_BATCH_SIZE,
+        progress=save_progress,
+    )
+    try:
+        with record.file.open("rb") as file:
+            importer.run(file)
+    except Exception as e:
+        logger.exception("Import %s failed", import_id)
+        save_progress(
+            importer,
+            status=CalendarImport.Status.FAILED,
+            error=str(e)[:1000],
+            finished_at=timezone.now(),
+        )
+        return
+
+    save_progress(
+        importer,
+        status=CalendarImport.Status.DONE,
+        finished_at=timezone.now(),
+    )
+    # Failed imports keep their file for inspection
+    record.file.delete(save=False)
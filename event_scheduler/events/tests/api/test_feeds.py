@@ -0,0 +1,120 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from event_scheduler.events.cache import get_events_version
+from event_scheduler.events.feeds import body_cache_key
+from event_scheduler.events.feeds import fold
+from event_scheduler.events.tests.factories import EventFactory
+
+START = datetime(2024, 6, 3, 9, tzinfo=UTC)
+
+
+def _feed_url(client):
+    return client.get("/api/feed/").json()["url"].removeprefix("http://testserver")
+
+
+def _body(response):
+    return b"".join(response.streaming_content).decode()
+
+
+def test_fold_keeps_lines_under_75_octets():
+    folded = fold("DESCRIPTION:" + "é" * 100)
+
+    lines = folded.removesuffix("\r\n").split("\r\n")
+    assert all(len(line.encode()) <= 75 for line in lines)  # noqa: PLR2004
+    assert "".join(line.removeprefix(" ") for line in lines).endswith("é" * 100)
+
+
+def test_feed_writes_rules_instead_of_occurrences(user):
+    EventFactory(
+        user=user,
+        title="Standup, daily",
+        start=START,
+        end=START + timedelta(minutes=15),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=DAILY;INTERVAL=1",
+        exceptions=[(START + timedelta(days=1)).isoformat()],
+    )
+    EventFactory(user=user, title="Lunch", start=START)
+    EventFactory(title="Someone else's")
+    client = APIClient()
+    client.force_authenticate(user)
+    url = _feed_url(client)
+
+    response = APIClient().get(url)
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["Content-Type"] == "text/calendar; charset=utf-8"
+    body = _body(response)
+    assert body.startswith("BEGIN:VCALENDAR\r\n")
+    assert body.count("BEGIN:VEVENT") == 2  # noqa: PLR2004
+    assert "SUMMARY:Standup\\, daily\r\n" in body
+    assert "RRULE:FREQ=DAILY;INTERVAL=1\r\n" in body
+    assert "EXDATE:20240604T090000Z\r\n" in body
+    assert "Someone else" not in body
+
+
+def test_feed_polls_are_cheap(user):
+    EventFactory(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    url = _feed_url(client)
+    first = APIClient().get(url)
+    body = _body(first)
+
+    with CaptureQueriesContext(connection) as queries:
+        not_modified = APIClient().get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        cached = APIClient().get(url)
+
+    assert not_modified.status_code == 304  # noqa: PLR2004
+    assert cached.content.decode() == body
+    assert not [q for q in queries.captured_queries if "SELECT" in q["sql"]]
+
+    EventFactory(user=user)
+    changed = APIClient().get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+    assert changed.status_code == 200  # noqa: PLR2004
+    assert _body(changed).count("BEGIN:VEVENT") == 2  # noqa: PLR2004
+
+
+def test_rotating_the_token_revokes_the_url(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    old = _feed_url(client)
+    assert APIClient().get(old).status_code == 200  # noqa: PLR2004
+
+    new = client.post("/api/feed/").json()["url"].removeprefix("http://testserver")
+
+    assert new != old
+    assert APIClient().get(old).status_code == 404  # noqa: PLR2004
+    assert APIClient().get(new).status_code == 200  # noqa: PLR2004
+
+
+def test_feed_streams_asynchronously_under_asgi(user, settings):
+    settings.EVENTS_FEED_CHUNK_SIZE = 2
+    for i in range(5):
+        EventFactory(user=user, title=f"Event {i}", start=START + timedelta(days=i))
+    client = APIClient()
+    client.force_authenticate(user)
+    url = _feed_url(client)
+
+    async def get():
+        response = await AsyncClient().get(url)
+        return response, [chunk async for chunk in response.streaming_content]
+
+    response, chunks = async_to_sync(get)()
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.is_async
+    body = b"".join(chunks)
+    assert len(chunks) == 1 + 3 + 1  # header, 3 chunks of 2 events, footer
+    assert body.decode().count("BEGIN:VEVENT") == 5  # noqa: PLR2004
+    assert body.endswith(b"END:VCALENDAR\r\n")
+    assert cache.get(body_cache_key(user.pk, get_events_version(user.pk))) == body
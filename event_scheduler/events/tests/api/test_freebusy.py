@@ -0,0 +1,131 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from rest_framework.test import APIClient
+
+from event_scheduler.events.freebusy import merge_intervals
+from event_scheduler.events.tests.factories import EventFactory
+from event_scheduler.users.tests.factories import UserFactory
+
+URL = "/api/freebusy/"
+START = datetime(2024, 6, 3, tzinfo=UTC)
+RANGE = {"start": "2024-06-03T00:00:00+00:00", "end": "2024-06-04T00:00:00+00:00"}
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def _at(hours, minutes=0):
+    return START + timedelta(hours=hours, minutes=minutes)
+
+
+def test_merge_intervals_sweeps_sorted_intervals():
+    intervals = [(5, 6), (1, 3), (2, 4), (4, 5), (8, 9), (8, 8)]
+
+    assert merge_intervals(intervals) == [(1, 6), (8, 9)]
+    assert merge_intervals([]) == []
+
+
+def test_freebusy_merges_and_clips_occurrences(user):
+    EventFactory(user=user, title="Standup", start=_at(9), end=_at(10))
+    EventFactory(user=user, title="Design review", start=_at(9, 30), end=_at(11))
+    EventFactory(user=user, start=_at(11), end=_at(12))
+    # Overlaps the start of the range
+    EventFactory(user=user, start=_at(-1), end=_at(1))
+    # Daily series started before the range, overlapping its end
+    EventFactory(
+        user=user,
+        start=START - timedelta(days=7, hours=1),
+        end=START - timedelta(days=7, hours=-1),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=DAILY",
+    )
+
+    response = _client(user).get(URL, {"users": str(user.pk), **RANGE})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    [entry] = response.json()["users"]
+    assert entry["id"] == user.pk
+    assert [(b["start"], b["end"]) for b in entry["busy"]] == [
+        ("2024-06-03T00:00:00Z", "2024-06-03T01:00:00Z"),
+        ("2024-06-03T09:00:00Z", "2024-06-03T12:00:00Z"),
+        ("2024-06-03T23:00:00Z", "2024-06-04T00:00:00Z"),
+    ]
+    assert "Standup" not in response.content.decode()
+
+
+def test_freebusy_only_shows_shared_users(user):
+    shared = UserFactory()
+    shared.profile.share_freebusy = True
+    shared.profile.save()
+    private = UserFactory()
+    EventFactory(user=shared, start=_at(9), end=_at(10))
+    EventFactory(user=private, start=_at(9), end=_at(10))
+    users = f"{private.pk},{shared.pk},{user.pk},0"
+
+    body = _client(user).get(URL, {"users": users, **RANGE}).json()
+
+    assert [entry["id"] for entry in body["users"]] == [
+        private.pk,
+        shared.pk,
+        user.pk,
+        0,
+    ]
+    assert body["users"][0] == {"id": private.pk, "error": "Not found"}
+    assert len(body["users"][1]["busy"]) == 1
+    assert body["users"][2]["busy"] == []
+    assert "busy" not in body["users"][3]
+
+
+def test_freebusy_cache_follows_new_events(user):
+    client = _client(user)
+    params = {"users": str(user.pk), **RANGE}
+    assert client.get(URL, params).json()["users"][0]["busy"] == []
+
+    EventFactory(user=user, start=_at(9), end=_at(10))
+
+    assert len(client.get(URL, params).json()["users"][0]["busy"]) == 1
+
+
+def test_freebusy_rejects_bad_users(user, settings):
+    settings.EVENTS_FREEBUSY_MAX_USERS = 2
+    client = _client(user)
+
+    for users in ("", "me", "1,2,3"):
+        response = client.get(URL, {"users": users, **RANGE})
+        assert response.status_code == 400  # noqa: PLR2004
+
+
+def test_freebusy_budget_covers_all_users(user, settings):
+    settings.EVENTS_OCCURRENCE_BUDGET = 3
+    shared = UserFactory()
+    shared.profile.share_freebusy = True
+    shared.profile.save()
+    for owner in (user, shared):
+        EventFactory(user=owner, start=_at(9), end=_at(10))
+        EventFactory(user=owner, start=_at(11), end=_at(12))
+    client = _client(user)
+
+    both = client.get(URL, {"users": f"{user.pk},{shared.pk}", **RANGE})
+    alone = client.get(URL, {"users": str(user.pk), **RANGE})
+
+    assert alone.status_code == 200  # noqa: PLR2004
+    assert both.status_code == 400  # noqa: PLR2004
+    assert "more than 3 occurrences" in both.json()["error"]
+
+
+def test_freebusy_of_unshared_users_needs_real_staff(user):
+    private = UserFactory()
+    client = _client(user)
+    params = {"users": str(private.pk), **RANGE}
+
+    client.patch("/api/auth/user/", {"is_staff": True}, format="json")
+
+    assert client.get(URL, params).json()["users"][0]["error"] == "Not found"
+    user.is_staff = True
+    user.save()
+    assert "busy" in client.get(URL, params).json()["users"][0]
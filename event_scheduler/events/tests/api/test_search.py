@@ -0,0 +1,164 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from rest_framework.test import APIClient
+
+from event_scheduler.events.tests.factories import EventFactory
+
+URL = "/api/events/search/"
+START = datetime(2024, 6, 3, 9, tzinfo=UTC)
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def test_search_ranks_title_matches_first(user):
+    in_description = EventFactory(
+        user=user,
+        title="Lunch",
+        description="Plan the roadmap meeting",
+    )
+    in_title = EventFactory(user=user, title="Roadmap meetings", description="")
+    EventFactory(user=user, title="Dentist")
+    EventFactory(title="Roadmap meeting")
+
+    response = _client(user).get(URL, {"q": "roadmap meeting"})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    results = response.json()["results"]
+    assert [r["id"] for r in results] == [in_title.pk, in_description.pk]
+    assert results[0]["rank"] > results[1]["rank"]
+    assert response.json()["next"] is None
+
+
+def test_search_pages_by_keyset(user, settings):
+    settings.EVENTS_SEARCH_PAGE_SIZE = 2
+    events = EventFactory.create_batch(5, user=user, title="Standup")
+    client = _client(user)
+
+    ids = []
+    params = {"q": "standup"}
+    while True:
+        body = client.get(URL, params).json()
+        ids.extend(r["id"] for r in body["results"])
+        if body["next"] is None:
+            break
+        params["cursor"] = body["next"]
+
+    assert sorted(ids) == sorted(event.pk for event in events)
+    assert len(ids) == len(set(ids))
+
+
+def test_search_range_composes_with_recurrence(user):
+    series = EventFactory(
+        user=user,
+        title="Weekly review",
+        start=START,
+        end=START + timedelta(hours=1),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=WEEKLY;INTERVAL=1",
+    )
+    EventFactory(
+        user=user,
+        title="Review that ended",
+        start=START,
+        end=START + timedelta(hours=1),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=WEEKLY;COUNT=2",
+    )
+    one_time = EventFactory(
+        user=user,
+        title="Quarterly review",
+        start=START + timedelta(days=60),
+    )
+    EventFactory(user=user, title="Old review", start=START)
+
+    response = _client(user).get(
+        URL,
+        {"q": "review", "start": "2024-08-01T00:00:00Z", "end": "2024-08-31T00:00:00Z"},
+    )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    results = {r["id"]: r for r in response.json()["results"]}
+    assert set(results) == {series.pk, one_time.pk}
+    assert results[series.pk]["next_occurrence"]["start"] == "2024-08-05T09:00:00Z"
+
+
+def test_search_rejects_bad_requests(user):
+    client = _client(user)
+
+    assert client.get(URL).status_code == 400  # noqa: PLR2004
+    assert client.get(URL, {"q": "x", "cursor": "nope"}).status_code == 400  # noqa: PLR2004
+    assert client.get(URL, {"q": "x", "start": "soon"}).status_code == 400  # noqa: PLR2004
+
+
+def test_autocomplete_suggests_distinct_titles(user):
+    EventFactory.create_batch(3, user=user, title="Standup")
+    EventFactory(user=user, title="Stand-up review")
+    EventFactory(user=user, title="Dentist")
+    EventFactory(title="Standing desk delivery")
+    client = _client(user)
+
+    response = client.get("/api/events/autocomplete/", {"q": "stan"})
+    typo = client.get("/api/events/autocomplete/", {"q": "standp"})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert sorted(response.json()["results"]) == ["Stand-up review", "Standup"]
+    assert "Standup" in typo.json()["results"]
+
+
+def test_autocomplete_cache_follows_new_titles(user):
+    EventFactory(user=user, title="Planning")
+    client = _client(user)
+    client.get("/api/events/autocomplete/", {"q": "plan"})
+
+    EventFactory(user=user, title="Plants watering")
+    response = client.get("/api/events/autocomplete/", {"q": "plan", "limit": 5})
+
+    assert "Plants watering" in response.json()["results"]
+    short = client.get("/api/events/autocomplete/", {"q": "p"})
+    assert short.json()["results"] == []
+
+
+def test_autocomplete_remembers_bulk_and_deleted_titles(user):
+    old = EventFactory(user=user, title="Roadmap review")
+    client = _client(user)
+
+    client.post(
+        "/api/events/bulk/",
+        {
+            "operations": [
+                {
+                    "op": "create",
+                    "data": {
+                        "title": "Roadmap planning",
+                        "start": "2024-06-03T09:00:00Z",
+                        "end": "2024-06-03T10:00:00Z",
+                    },
+                },
+                {"op": "delete", "id": old.pk},
+            ],
+        },
+        format="json",
+    )
+    response = client.get("/api/events/autocomplete/", {"q": "roadmap"})
+
+    # Equally similar: the most recently used first
+    assert response.json()["results"] == ["Roadmap planning", "Roadmap review"]
+
+
+def test_autocomplete_completes_the_word_being_typed(user):
+    for title in ("Team sales review", "Team sync", "Sales call", "Steam room"):
+        EventFactory(user=user, title=title)
+    client = _client(user)
+
+    typing = client.get("/api/events/autocomplete/", {"q": "team s"})
+    word = client.get("/api/events/autocomplete/", {"q": "sales"})
+
+    assert sorted(typing.json()["results"]) == ["Team sales review", "Team sync"]
+    # Ranked by their best word, then the most recently used first
+    assert word.json()["results"] == ["Sales call", "Team sales review"]
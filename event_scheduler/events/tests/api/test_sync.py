@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import EventTombstone
+from event_scheduler.events.sync import dump_token
+from event_scheduler.events.tests.factories import EventFactory
+from event_scheduler.users.tests.factories import UserFactory
+
+URL = "/api/events/sync/"
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def _age(queryset, **fields):
+    # Changes older than the overlap window, so they aren't sent again
+    past = timezone.now() - timedelta(hours=1)
+    queryset.update(**dict.fromkeys(fields, past))
+
+
+def test_first_sync_pages_through_every_event(user, settings):
+    settings.EVENTS_SYNC_PAGE_SIZE = 2
+    events = EventFactory.create_batch(3, user=user)
+    EventFactory()
+    client = _client(user)
+
+    first = client.get(URL).json()
+    second = client.get(URL, {"token": first["token"]}).json()
+
+    assert first["reset"]
+    assert first["more"]
+    assert not second["reset"]
+    assert not second["more"]
+    ids = [event["id"] for event in first["events"] + second["events"]]
+    assert sorted(ids) == sorted(event.pk for event in events)
+
+
+def test_sync_returns_changes_since_the_token(user):
+    kept, updated, deleted = EventFactory.create_batch(3, user=user)
+    _age(Event.objects.all(), updated_at=True)
+    client = _client(user)
+    token = client.get(URL).json()["token"]
+
+    updated.title = "Moved"
+    updated.save()
+    client.delete(f"/api/events/{deleted.pk}/")
+    created = EventFactory(user=user)
+    response = client.get(URL, {"token": token})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    body = response.json()
+    assert {event["id"] for event in body["events"]} == {updated.pk, created.pk}
+    assert body["deleted"] == [deleted.pk]
+    assert not body["reset"]
+    assert kept.pk not in body["deleted"]
+
+
+def test_sync_is_near_empty_once_caught_up(user):
+    EventFactory.create_batch(3, user=user)
+    _age(Event.objects.all(), updated_at=True)
+    client = _client(user)
+    token = client.get(URL).json()["token"]
+
+    body = client.get(URL, {"token": token}).json()
+
+    assert body["events"] == []
+    assert body["deleted"] == []
+
+
+def test_bulk_deletes_leave_tombstones(user):
+    events = EventFactory.create_batch(2, user=user)
+    client = _client(user)
+    token = client.get(URL).json()["token"]
+
+    client.post(
+        "/api/events/bulk/",
+        {"operations": [{"op": "delete", "id": event.pk} for event in events]},
+        format="json",
+    )
+
+    body = client.get(URL, {"token": token}).json()
+    assert sorted(body["deleted"]) == sorted(event.pk for event in events)
+
+
+def test_expired_token_starts_a_full_resync(user, settings):
+    event = EventFactory(user=user)
+    client = _client(user)
+    token = client.get(URL).json()["token"]
+    settings.EVENTS_SYNC_TOKEN_MAX_AGE_DAYS = -1
+
+    body = client.get(URL, {"token": token}).json()
+
+    assert body["reset"]
+    assert [e["id"] for e in body["events"]] == [event.pk]
+
+
+def test_tokens_are_bound_to_their_user(user):
+    other = UserFactory()
+    token = dump_token(other.pk, None, None)
+
+    response = _client(user).get(URL, {"token": token})
+    garbage = _client(user).get(URL, {"token": "not-a-token"})
+
+    assert response.status_code == 400  # noqa: PLR2004
+    assert garbage.status_code == 400  # noqa: PLR2004
+
+
+def test_deleting_a_user_leaves_no_tombstones(user):
+    EventFactory(user=user)
+
+    user.delete()
+
+    assert not EventTombstone.objects.exists()
+
+
+def test_purge_sync_tombstones(user):
+    EventFactory(user=user).delete()
+    EventFactory(user=user).delete()
+    EventTombstone.objects.filter(pk=EventTombstone.objects.first().pk).update(
+        deleted_at=timezone.now() - timedelta(days=60),
+    )
+
+    call_command("purge_sync_tombstones")
+
+    assert EventTombstone.objects.count() == 1
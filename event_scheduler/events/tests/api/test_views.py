@@ -1,4 +1,279 @@
+import importlib
+import json
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+from importlib import import_module
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event_scheduler.events.api.async_views import AsyncCalendarView
+from event_scheduler.events.api.async_views import AsyncUpcomingEventsView
+from event_scheduler.events.cache import get_events_version
+from event_scheduler.events.tests.factories import EventFactory
+
+
 def test_example32():
     result = 2 + 2
     expected = 4
     assert result == expected
+
+
+def _weekly_series(user):
+    start = datetime(2024, 6, 3, 9, tzinfo=UTC)
+    return EventFactory(
+        user=user,
+        start=start,
+        end=start + timedelta(hours=1),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=WEEKLY;INTERVAL=1;BYDAY=MO",
+    )
+
+
+def _reload_urls():
+    for name in (
+        "event_scheduler.events.api.urls",
+        "config.api_router",
+        settings.ROOT_URLCONF,
+    ):
+        importlib.reload(import_module(name))
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_event_views(settings):
+    """Route the calendar views to their async versions, as under ASGI."""
+    settings.ASYNC_EVENT_VIEWS = True
+    _reload_urls()
+    yield
+    settings.ASYNC_EVENT_VIEWS = False
+    _reload_urls()
+
+
+def _async_get(user, path, data=None):
+    # Through the request handler, which applies ATOMIC_REQUESTS
+    client = AsyncClient()
+    if user is not None:
+        client.cookies["auth_session"] = str(AccessToken.for_user(user))
+    return async_to_sync(client.get)(path, data)
+
+
+@pytest.mark.usefixtures("async_event_views")
+def test_async_calendar_matches_sync_view(user):
+    _weekly_series(user)
+    EventFactory(user=user, start=datetime(2024, 6, 5, 12, tzinfo=UTC))
+    params = {"start": "2024-06-01T00:00:00", "end": "2024-06-30T00:00:00"}
+    client = APIClient()
+    client.force_authenticate(user)
+
+    expected = client.get("/api/calendar/", params)
+    response = _async_get(user, "/api/calendar/", params)
+
+    assert resolve("/api/calendar/").func.view_class is AsyncCalendarView
+    assert response.status_code == 200  # noqa: PLR2004
+    assert json.loads(response.content) == expected.json()
+    assert len(expected.json()) == 5  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures("async_event_views")
+def test_async_upcoming_requires_authentication(db):
+    response = _async_get(None, "/api/upcoming/")
+
+    assert resolve("/api/upcoming/").func.view_class is AsyncUpcomingEventsView
+    assert response.status_code == 401  # noqa: PLR2004
+
+
+@pytest.mark.usefixtures("async_event_views")
+def test_async_calendar_rejects_invalid_dates(user):
+    response = _async_get(user, "/api/calendar/", {"start": "not-a-date"})
+
+    assert response.status_code == 400  # noqa: PLR2004
+
+
+def test_dashboard_combines_its_parts(user):
+    cache.clear()
+    start = timezone.now().replace(microsecond=0) - timedelta(days=10, hours=3)
+    EventFactory(
+        user=user,
+        start=start,
+        end=start + timedelta(hours=1),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=DAILY;INTERVAL=1",
+    )
+    EventFactory(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get("/api/dashboard/")
+
+    assert response.status_code == 200  # noqa: PLR2004
+    data = response.json()
+    assert data["user"] == client.get("/api/auth/user/").json()
+    assert data["profile"] == client.get("/api/user/profile/").json()
+    assert data["upcoming"] == client.get("/api/upcoming/").json()
+    assert data["calendar"]["events"] == client.get("/api/calendar/").json()
+
+
+def test_dashboard_etag(user):
+    cache.clear()
+    client = APIClient()
+    client.force_authenticate(user)
+    etag = client.get("/api/dashboard/")["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get("/api/dashboard/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304  # noqa: PLR2004
+    assert not [q for q in queries if q["sql"].startswith("SELECT")]
+
+    EventFactory(user=user)
+    response = client.get("/api/dashboard/", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["ETag"] != etag
+    assert len(response.json()["upcoming"]) == 1
+
+
+def test_calendar_rejects_too_wide_ranges(user, settings):
+    settings.EVENTS_MAX_RANGE_DAYS = 31
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get(
+        "/api/calendar/",
+        {"start": "2024-01-01T00:00:00", "end": "2124-01-01T00:00:00"},
+    )
+
+    assert response.status_code == 400  # noqa: PLR2004
+    assert "31 days" in response.json()["error"]
+
+
+def test_calendar_occurrence_budget(user, settings):
+    settings.EVENTS_OCCURRENCE_BUDGET = 3
+    _weekly_series(user)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get(
+        "/api/calendar/",
+        {"start": "2024-06-01T00:00:00", "end": "2024-06-30T00:00:00"},
+    )
+
+    assert response.status_code == 400  # noqa: PLR2004
+    assert "more than 3 occurrences" in response.json()["error"]
+
+
+def test_event_rejects_expensive_recurrence(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    event = {
+        "title": "Stand-up",
+        "start": "2024-06-03T09:00:00Z",
+        "end": "2024-06-03T09:15:00Z",
+        "is_recurring": True,
+    }
+
+    for recurrence in [
+        {"frequency": "monthly", "byday": "MO;FREQ=SECONDLY"},
+        {"frequency": "daily", "count": 1_000_000},
+        {"frequency": "monthly", "byday": "MO", "bysetpos": 6},
+    ]:
+        response = client.post(
+            "/api/events/",
+            {**event, "recurrence": recurrence},
+            format="json",
+        )
+        assert response.status_code == 400, recurrence  # noqa: PLR2004
+
+
+def _bulk(client, *operations):
+    return client.post(
+        "/api/events/bulk/",
+        {"operations": list(operations)},
+        format="json",
+    )
+
+
+def test_bulk_applies_operations_in_one_batch(user):
+    kept = EventFactory(user=user, title="Old")
+    gone = EventFactory(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+    new = {
+        "title": "New",
+        "start": "2024-06-03T09:00:00Z",
+        "end": "2024-06-03T10:00:00Z",
+    }
+    version = get_events_version(user.pk)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = _bulk(
+            client,
+            {"op": "create", "data": new},
+            {"op": "create", "data": {**new, "title": "Newer"}},
+            {"op": "update", "id": kept.pk, "data": {"title": "Renamed"}},
+            {"op": "delete", "id": gone.pk},
+        )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [201, 201, 200, 204]
+    assert results[1]["data"]["title"] == "Newer"
+    assert results[2]["data"]["title"] == "Renamed"
+    assert sorted(user.event_set.values_list("title", flat=True)) == [
+        "New",
+        "Newer",
+        "Renamed",
+    ]
+    writes = [
+        q["sql"]
+        for q in queries.captured_queries
+        if q["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+    # One INSERT, UPDATE and DELETE of events, one INSERT of tombstones and
+    # one upsert of titles
+    assert len(writes) == 5  # noqa: PLR2004
+    assert get_events_version(user.pk) != version
+
+
+def test_bulk_applies_nothing_when_an_operation_fails(user):
+    event = EventFactory(user=user, title="Old")
+    other = EventFactory()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = _bulk(
+        client,
+        {"op": "update", "id": event.pk, "data": {"title": "Renamed"}},
+        {"op": "create", "data": {"title": "No dates"}},
+        {"op": "delete", "id": other.pk},
+    )
+
+    assert response.status_code == 400  # noqa: PLR2004
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [424, 400, 404]
+    assert "start" in results[1]["errors"]
+    event.refresh_from_db()
+    assert event.title == "Old"
+    assert other.__class__.objects.filter(pk=other.pk).exists()
+
+
+def test_bulk_limits_operations(user, settings):
+    settings.EVENTS_BULK_MAX_OPERATIONS = 1
+    event = EventFactory(user=user)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    too_many = _bulk(client, *[{"op": "delete", "id": event.pk}] * 2)
+
+    assert too_many.status_code == 400  # noqa: PLR2004
+    assert "operations" in too_many.json()
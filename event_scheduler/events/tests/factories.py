@@ -1,2 +1,21 @@
-class UserFactory:
-    pass
+from datetime import timedelta
+
+from django.utils import timezone
+from factory import Faker
+from factory import LazyAttribute
+from factory import LazyFunction
+from factory import SubFactory
+from factory.django import DjangoModelFactory
+
+from event_scheduler.events.models import Event
+from event_scheduler.users.tests.factories import UserFactory
+
+
+class EventFactory(DjangoModelFactory[Event]):
+    user = SubFactory(UserFactory)
+    title = Faker("sentence", nb_words=3)
+    start = LazyFunction(lambda: timezone.now() + timedelta(days=1))
+    end = LazyAttribute(lambda o: o.start + timedelta(hours=1))
+
+    class Meta:
+        model = Event
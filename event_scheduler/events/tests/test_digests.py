@@ -0,0 +1,82 @@
+from datetime import date
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail import get_connection
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from event_scheduler.events.digests import day_range
+from event_scheduler.events.digests import send_digests
+from event_scheduler.events.expansion import ExpansionExecutor
+from event_scheduler.events.models import Event
+from event_scheduler.events.tests.factories import EventFactory
+from event_scheduler.users.tests.factories import UserFactory
+
+DAY = date(2024, 3, 2)
+START, _END = day_range(DAY)
+
+
+class FailingConnection:
+    def __init__(self, fail_on_call):
+        self.calls = 0
+        self.fail_on_call = fail_on_call
+
+    def send_messages(self, messages):
+        self.calls += 1
+        if self.calls == self.fail_on_call:
+            msg = "SMTP connection lost"
+            raise OSError(msg)
+        return get_connection().send_messages(messages)
+
+
+@pytest.fixture
+def agendas(db):
+    meeting = EventFactory(start=START + timedelta(hours=9), title="Meeting")
+    standup = EventFactory(
+        start=START - timedelta(days=20, hours=-8),
+        title="Standup",
+        is_recurring=True,
+        recurrence_rule="FREQ=DAILY",
+    )
+    EventFactory(start=START + timedelta(days=1), title="Later")
+    UserFactory()
+    EventFactory(user=meeting.user, start=START + timedelta(hours=14), title="Review")
+    return [meeting.user, standup.user]
+
+
+def test_one_digest_per_user_with_events(agendas):
+    run = send_digests(DAY, get_connection(), ExpansionExecutor(), chunk_size=2)
+
+    assert run.users_sent == len(agendas)
+    assert run.finished_at is not None
+    by_recipient = {message.to[0]: message for message in mail.outbox}
+    assert set(by_recipient) == {user.email for user in agendas}
+    body = by_recipient[agendas[0].email].body
+    assert body.index("09:00-10:00 Meeting") < body.index("14:00-15:00 Review")
+    assert "08:00-09:00 Standup" in by_recipient[agendas[1].email].body
+
+
+def test_one_events_query_per_chunk(agendas):
+    with CaptureQueriesContext(connection) as queries:
+        send_digests(DAY, get_connection(), ExpansionExecutor(), chunk_size=2)
+
+    table = Event._meta.db_table  # noqa: SLF001
+    event_queries = [q for q in queries if f'FROM "{table}"' in q["sql"]]
+    # 4 users in chunks of 2
+    assert len(event_queries) == 2  # noqa: PLR2004
+
+
+def test_resumes_after_crash(agendas):
+    with pytest.raises(OSError, match="SMTP"):
+        send_digests(DAY, FailingConnection(2), ExpansionExecutor(), chunk_size=1)
+    assert len(mail.outbox) == 1
+
+    run = send_digests(DAY, get_connection(), ExpansionExecutor(), chunk_size=1)
+    assert run.users_sent == len(agendas)
+    assert sorted(m.to[0] for m in mail.outbox) == sorted(u.email for u in agendas)
+
+    # A finished day isn't sent again
+    send_digests(DAY, get_connection(), ExpansionExecutor())
+    assert len(mail.outbox) == len(agendas)
@@ -0,0 +1,181 @@
+import time
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+
+from event_scheduler.events.expansion import ExpansionExecutor
+from event_scheduler.events.expansion import check_rule_cost
+from event_scheduler.events.expansion import estimate_cost
+from event_scheduler.events.expansion import expand_rule
+from event_scheduler.events.expansion import fast_forward
+from event_scheduler.events.expansion import run_expansion_job
+
+START = datetime(2024, 1, 1, 9, tzinfo=UTC)
+
+
+def _job(rule, days_back=0, window_days=7, exceptions=()):
+    window_start = START
+    return (
+        rule,
+        START - timedelta(days=days_back),
+        timedelta(hours=1),
+        list(exceptions),
+        window_start,
+        window_start + timedelta(days=window_days),
+    )
+
+
+def test_run_expansion_job_applies_duration_and_exceptions():
+    spans, _seconds, error = run_expansion_job(
+        _job("FREQ=DAILY", exceptions=["2024-01-02T09:00:00+00:00"]),
+    )
+
+    assert error is None
+    assert len(spans) == 7  # noqa: PLR2004
+    assert START + timedelta(days=1) not in [start for start, _end in spans]
+    assert all(end - start == timedelta(hours=1) for start, end in spans)
+
+
+def test_run_expansion_job_reports_invalid_rules():
+    spans, _seconds, error = run_expansion_job(_job("RRULE:FREQ=SOMETIMES"))
+
+    assert spans == []
+    assert error
+
+
+def test_estimate_cost_counts_occurrences_since_dtstart():
+    assert estimate_cost(_job("RRULE:FREQ=DAILY", days_back=365)) == 372  # noqa: PLR2004
+    assert estimate_cost(_job("RRULE:FREQ=WEEKLY;BYDAY=MO,FR", days_back=70)) == 22  # noqa: PLR2004
+    assert estimate_cost(_job("RRULE:FREQ=DAILY;COUNT=5", days_back=365)) == 5  # noqa: PLR2004
+
+
+def test_chunks_balance_estimated_cost():
+    executor = ExpansionExecutor(workers=2, chunks_per_worker=1)
+    costs = [100, 1, 1, 60, 40]
+
+    chunks = executor.chunk(list("abcde"), costs)
+
+    assert sorted(sum(costs[i] for i, _job in chunk) for chunk in chunks) == [101, 101]
+
+
+def test_small_batches_stay_in_process(monkeypatch):
+    executor = ExpansionExecutor(workers=2, threshold=10_000)
+
+    def unexpected_pool():
+        raise AssertionError
+
+    monkeypatch.setattr(executor, "_get_pool", unexpected_pool)
+
+    results = executor.run([_job("FREQ=DAILY"), _job("FREQ=WEEKLY")])
+
+    assert [len(spans) for spans, _seconds, _error in results] == [8, 2]
+
+
+def test_single_expensive_job_goes_to_the_pool(monkeypatch):
+    executor = ExpansionExecutor(workers=2, threshold=100)
+    job = _job("FREQ=DAILY", days_back=365)
+    pooled = []
+
+    def run_in_pool(jobs, costs):
+        pooled.append(costs)
+        return [run_expansion_job(job) for job in jobs]
+
+    monkeypatch.setattr(executor, "_run_in_pool", run_in_pool)
+
+    results = executor.run([job])
+
+    assert pooled == [[372]]
+    assert [len(spans) for spans, _seconds, _error in results] == [8]
+
+
+def test_broken_pool_falls_back_to_in_process(monkeypatch):
+    executor = ExpansionExecutor(workers=2, threshold=0)
+
+    def broken_pool():
+        raise OSError
+
+    monkeypatch.setattr(executor, "_get_pool", broken_pool)
+
+    results = executor.run([_job("FREQ=DAILY"), _job("FREQ=WEEKLY")])
+
+    assert [len(spans) for spans, _seconds, _error in results] == [8, 2]
+
+
+def test_pool_returns_results_in_job_order():
+    executor = ExpansionExecutor(workers=1, threshold=0)
+    jobs = [_job("FREQ=DAILY", window_days=days) for days in (1, 5, 3)]
+    try:
+        results = executor.run(jobs)
+    finally:
+        executor.shutdown()
+
+    assert [len(spans) for spans, _seconds, _error in results] == [2, 6, 4]
+
+
+def test_fast_forward_keeps_occurrences():
+    window_start = START + timedelta(days=1000, hours=5)
+    window_end = window_start + timedelta(days=60)
+    for rule in (
+        "FREQ=DAILY;INTERVAL=3",
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR",
+        "FREQ=MONTHLY;BYDAY=1MO",
+        "FREQ=YEARLY",
+        "FREQ=HOURLY;INTERVAL=7",
+    ):
+        rebased = fast_forward(rule, START, window_start)
+        assert START < rebased <= window_start
+        args = (timedelta(hours=1), [], window_start, window_end)
+        assert expand_rule(rule, rebased, *args) == expand_rule(rule, START, *args)
+
+
+def test_fast_forward_leaves_count_and_late_month_days():
+    later = START + timedelta(days=400)
+    assert fast_forward("FREQ=DAILY;COUNT=500", START, later) == START
+    assert fast_forward("FREQ=DAILY;INTERVAL=x", START, later) == START
+    month_end = START.replace(day=31)
+    assert fast_forward("FREQ=MONTHLY", month_end, later) == month_end
+
+
+def test_expand_rule_stops_at_limit():
+    window_end = START + timedelta(days=365)
+
+    spans = expand_rule(
+        "FREQ=DAILY",
+        START,
+        timedelta(hours=1),
+        [],
+        START,
+        window_end,
+        limit=10,
+    )
+
+    assert len(spans) == 10  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=MONTHLY;BYDAY=MO;BYSETPOS=6",
+        "FREQ=DAILY;COUNT=100000",
+        "FREQ=HOURLY",
+        "FREQ=MONTHLY;BYMONTHDAY=99",
+        "FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30;COUNT=5",
+    ],
+)
+def test_check_rule_cost_rejects_pathological_rules(rule):
+    with pytest.raises(ValueError, match="occur"):
+        check_rule_cost(rule, START, max_per_year=366, max_count=5000)
+
+
+def test_check_rule_cost_rejects_empty_rules_without_scanning_to_9999():
+    started = time.perf_counter()
+    with pytest.raises(ValueError, match="never"):
+        check_rule_cost("FREQ=DAILY;BYMONTH=4;BYMONTHDAY=31", START, 366, 5000)
+    # Scanning the days up to year 9999 takes seconds
+    assert time.perf_counter() - started < 2  # noqa: PLR2004
+
+
+def test_check_rule_cost_accepts_sparse_rules():
+    check_rule_cost("FREQ=YEARLY;BYMONTH=2;BYMONTHDAY=29", START, 366, 5000)
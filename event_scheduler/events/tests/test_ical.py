@@ -0,0 +1,159 @@
+import io
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+from event_scheduler.events.cache import get_events_version
+from event_scheduler.events.ical import ICalendarImporter
+from event_scheduler.events.ical import VEventReader
+from event_scheduler.events.models import Event
+
+ICS = b"""BEGIN:VCALENDAR\r
+VERSION:2.0\r
+BEGIN:VEVENT\r
+UID:override@example.com\r
+RECURRENCE-ID;TZID=Europe/Paris:20240610T090000\r
+DTSTART;TZID=Europe/Paris:20240610T100000\r
+DTEND;TZID=Europe/Paris:20240610T110000\r
+SUMMARY:Standup (moved)\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:override@example.com\r
+DTSTART;TZID=Europe/Paris:20240603T090000\r
+DURATION:PT15M\r
+RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20240701\r
+EXDATE;TZID=Europe/Paris:20240617T090000,20240624T090000\r
+SUMMARY:Standup\r
+DESCRIPTION:Daily sync\\, be on time\\nThanks\r
+BEGIN:VALARM\r
+ACTION:DISPLAY\r
+DESCRIPTION:Not the event's\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:holiday@example.com\r
+DTSTART;VALUE=DATE:20240715\r
+SUMMARY:Long summary that is\r
+  folded\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:broken@example.com\r
+SUMMARY:No start\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+UID:noisy@example.com\r
+DTSTART:20240601T000000Z\r
+RRULE:FREQ=MINUTELY\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+
+def test_reader_unfolds_lines_and_skips_nested_components():
+    events = list(VEventReader(io.BytesIO(ICS)))
+
+    assert len(events) == 5  # noqa: PLR2004
+    assert events[1]["DESCRIPTION"] == [({}, "Daily sync\\, be on time\\nThanks")]
+    assert events[2]["SUMMARY"] == [({}, "Long summary that is folded")]
+
+
+def test_importer_maps_recurrence(user):
+    progress = []
+    importer = ICalendarImporter(user, batch_size=2, progress=progress.append)
+
+    importer.run(io.BytesIO(ICS))
+
+    assert (importer.imported, importer.skipped) == (3, 2)
+    assert len(progress) == 2  # noqa: PLR2004
+    series = Event.objects.get(title="Standup")
+    assert series.recurrence_rule == (
+        "RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20240701T215959Z"
+    )
+    assert series.description == "Daily sync, be on time\nThanks"
+    assert series.end - series.start == timedelta(minutes=15)
+    starts = [
+        occurrence["start"]
+        for occurrence in series.get_occurrences(
+            datetime(2024, 6, 1, tzinfo=UTC),
+            datetime(2024, 7, 31, tzinfo=UTC),
+        )
+    ]
+    # 10, 17 and 24 June are cancelled, the first by the moved occurrence
+    assert starts == [
+        datetime(2024, 6, 3, 7, tzinfo=UTC),
+        datetime(2024, 7, 1, 7, tzinfo=UTC),
+    ]
+    moved = Event.objects.get(title="Standup (moved)")
+    assert not moved.is_recurring
+    assert moved.start == datetime(2024, 6, 10, 8, tzinfo=UTC)
+    holiday = Event.objects.get(title="Long summary that is folded")
+    assert holiday.end - holiday.start == timedelta(days=1)
+
+
+def test_failed_import_still_invalidates_caches(user, monkeypatch):
+    version = get_events_version(user.pk)
+    importer = ICalendarImporter(user, batch_size=2)
+
+    def fail():
+        raise RuntimeError
+
+    monkeypatch.setattr(importer, "apply_pending", fail)
+    with pytest.raises(RuntimeError):
+        importer.run(io.BytesIO(ICS))
+
+    assert Event.objects.filter(user=user).count() == 3  # noqa: PLR2004
+    assert get_events_version(user.pk) != version
+
+
+def test_import_command(user, tmp_path):
+    path = tmp_path / "calendar.ics"
+    path.write_bytes(ICS)
+    out = io.StringIO()
+
+    call_command("import_ics", str(path), user=user.email, stdout=out)
+
+    assert "Imported 3 events (2 skipped)" in out.getvalue()
+
+
+def test_upload_runs_import_in_background(
+    user,
+    settings,
+    tmp_path,
+    django_capture_on_commit_callbacks,
+):
+    settings.TASKS_EAGER = True
+    settings.MEDIA_ROOT = str(tmp_path)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(
+            "/api/imports/",
+            {"file": SimpleUploadedFile("calendar.ics", ICS, "text/calendar")},
+            format="multipart",
+        )
+
+    assert response.status_code == 202  # noqa: PLR2004
+    record = client.get(f"/api/imports/{response.json()['id']}/").json()
+    assert record["status"] == "done"
+    assert record["progress"] == 100.0  # noqa: PLR2004
+    assert record["events_imported"] == 3  # noqa: PLR2004
+    assert Event.objects.filter(user=user).count() == 3  # noqa: PLR2004
+
+
+def test_upload_rejects_other_files(user):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.post(
+        "/api/imports/",
+        {"file": SimpleUploadedFile("notes.txt", b"hello")},
+        format="multipart",
+    )
+
+    assert response.status_code == 400  # noqa: PLR2004
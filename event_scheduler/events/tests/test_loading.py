@@ -0,0 +1,176 @@
+import io
+import json
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from event_scheduler.events.loading import read_rows
+from event_scheduler.events.models import Event
+from event_scheduler.events.models import EventTitleWord
+
+CSV = (
+    "user_email,title,start,end,description,recurrence_rule,exceptions\n"
+    "a@example.com,Standup,2024-06-03T09:00:00Z,2024-06-03T09:15:00Z,,"
+    "freq=weekly;byday=MO,\n"
+    '"b@example.com","Multi\nline",2024-06-03,2024-06-04,notes,,\n'
+)
+
+
+def test_read_rows_csv():
+    rows = list(read_rows(io.StringIO(CSV, newline=""), "csv"))
+
+    assert rows == [
+        (
+            2,
+            "a@example.com",
+            "Standup",
+            "2024-06-03T09:00:00Z",
+            "2024-06-03T09:15:00Z",
+            "",
+            "freq=weekly;byday=MO",
+            "",
+        ),
+        (
+            4,
+            "b@example.com",
+            "Multi\nline",
+            "2024-06-03",
+            "2024-06-04",
+            "notes",
+            "",
+            "",
+        ),
+    ]
+
+
+def test_read_rows_json_lines():
+    record = {
+        "user_email": "a@example.com",
+        "title": 42,
+        "start": "2024-06-03T09:00:00Z",
+        "end": "2024-06-03T09:15:00Z",
+        "exceptions": ["2024-06-10T09:00:00+00:00"],
+    }
+    text = f"{json.dumps(record)}\n\n{json.dumps({'title': 'Other'})}\n"
+
+    rows = list(read_rows(io.StringIO(text), "jsonl"))
+
+    assert rows == [
+        (
+            1,
+            "a@example.com",
+            "42",
+            "2024-06-03T09:00:00Z",
+            "2024-06-03T09:15:00Z",
+            None,
+            None,
+            '["2024-06-10T09:00:00+00:00"]',
+        ),
+        (3, None, "Other", None, None, None, None, None),
+    ]
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="COPY and set-wise validation need PostgreSQL",
+)
+def test_load_events_command(user, tmp_path):
+    lines = [
+        {
+            "user_email": user.email.upper(),
+            "title": "Standup",
+            "start": "2024-06-03T09:00:00Z",
+            "end": "2024-06-03T09:15:00Z",
+            "recurrence_rule": "rrule:freq=weekly;byday=MO;until=20240701",
+            "exceptions": ["2024-06-10T09:00:00+00:00"],
+        },
+        {"user_email": "nobody@example.com", "title": "Lost"},
+        {
+            "user_email": user.email,
+            "title": "Too often",
+            "start": "2024-06-03T09:00:00Z",
+            "end": "2024-06-03T09:15:00Z",
+            "recurrence_rule": "FREQ=MINUTELY",
+        },
+        {
+            "user_email": user.email,
+            "title": "Backwards",
+            "start": "2024-06-03T09:00:00Z",
+            "end": "2024-06-02T09:00:00Z",
+        },
+        {
+            "user_email": user.email,
+            "title": "Instant",
+            "start": "2024-06-03T09:00:00Z",
+            "end": "2024-06-03T09:00:00Z",
+        },
+        *(
+            {
+                "user_email": user.email,
+                "title": "Bad exceptions",
+                "start": "2024-06-03T09:00:00Z",
+                "end": "2024-06-03T09:15:00Z",
+                "recurrence_rule": "FREQ=DAILY",
+                "exceptions": [exception],
+            }
+            for exception in (20240610, "junk", "now")
+        ),
+        {
+            "user_email": user.email,
+            "title": "Local exceptions",
+            "start": "2024-06-03T09:00:00Z",
+            "end": "2024-06-03T09:15:00Z",
+            "recurrence_rule": "FREQ=DAILY",
+            "exceptions": [
+                "2024-06-04T09:00:00",
+                "2024-06-05T11:00:00.5+02:00",
+                "2024-06-06",
+            ],
+        },
+        *(
+            {
+                "user_email": user.email,
+                "title": "Never",
+                "start": "2024-06-03T09:00:00Z",
+                "end": "2024-06-03T09:15:00Z",
+                "recurrence_rule": rule,
+            }
+            for rule in (
+                "FREQ=DAILY;BYMONTH=2;BYMONTHDAY=30;COUNT=5",
+                "FREQ=MONTHLY;BYMONTHDAY=99",
+            )
+        ),
+    ]
+    path = tmp_path / "events.jsonl"
+    path.write_text("\n".join(json.dumps(line) for line in lines))
+    out = io.StringIO()
+
+    call_command("load_events", str(path), stdout=out)
+
+    event = Event.objects.get(user=user, title="Standup")
+    assert event.is_recurring
+    assert event.recurrence_rule == "RRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20240701T235959Z"
+    assert event.exceptions == ["2024-06-10T09:00:00+00:00"]
+    # Stamped at the end of the load, not when its transaction started
+    assert event.updated_at > event.created_at
+    local = Event.objects.get(user=user, title="Local exceptions")
+    # Stored as the API writes them, which expansion can parse
+    assert local.exceptions == [
+        "2024-06-04T09:00:00+00:00",
+        "2024-06-05T09:00:00.500000+00:00",
+        "2024-06-06T00:00:00+00:00",
+    ]
+    assert all(datetime.fromisoformat(e).tzinfo for e in local.exceptions)
+    # Words of the titles, for suggestions
+    assert set(
+        EventTitleWord.objects.filter(user=user).values_list("word", flat=True),
+    ) == {"standup", "local", "exceptions"}
+    output = out.getvalue()
+    assert "Loaded 2 of 11 events" in output
+    assert "unknown user: line 2" in output
+    assert "unsupported recurrence rule: line 3" in output
+    assert "end not after start: line 4, 5" in output
+    assert "invalid exceptions: line 6, 7, 8" in output
+    assert "never produces an occurrence: line 10, 11" in output
@@ -0,0 +1,165 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+
+from event_scheduler.events.changes import publish_change
+from event_scheduler.events.reminders import ReminderScheduler
+from event_scheduler.events.reminders import ReminderService
+from event_scheduler.events.reminders import Series
+from event_scheduler.events.reminders import leader_lock
+from event_scheduler.events.tasks import send_event_reminder
+from event_scheduler.events.tests.factories import EventFactory
+
+NOW = datetime(2024, 3, 1, 8, 0, tzinfo=UTC)
+LEAD = timedelta(minutes=10)
+
+
+def _series(event_id, start, rule=None, exceptions=()):
+    return Series(
+        event_id,
+        1,
+        start,
+        start + timedelta(hours=1),
+        rule is not None,
+        rule,
+        list(exceptions),
+    )
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now.timestamp()
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs).total_seconds()
+
+
+class Listener:
+    def __init__(self):
+        self.changed = set()
+
+    def poll(self, timeout):
+        changed, self.changed = self.changed, set()
+        return changed, None
+
+
+def test_scheduler_orders_reminders_by_fire_time():
+    scheduler = ReminderScheduler(LEAD)
+    window = (NOW, NOW + timedelta(days=1))
+    scheduler.add(_series(1, NOW - timedelta(days=30), "FREQ=DAILY"), *window)
+    scheduler.add(_series(2, NOW + timedelta(hours=3)), *window)
+
+    assert scheduler.next_at() == (NOW + timedelta(hours=3) - LEAD).timestamp()
+    due = scheduler.pop_due(window[1].timestamp())
+
+    # Today's 08:00 occurrence was due before the window started
+    assert [(r.event_id, r.occurrence) for r in due] == [
+        (2, NOW + timedelta(hours=3)),
+        (1, NOW + timedelta(days=1)),
+    ]
+
+
+def test_scheduler_skips_exceptions_and_discarded_events():
+    scheduler = ReminderScheduler(LEAD)
+    window = (NOW, NOW + timedelta(days=3))
+    series_start = NOW + timedelta(hours=1)
+    scheduler.add(
+        _series(1, series_start, "FREQ=DAILY", [series_start.isoformat()]),
+        *window,
+    )
+    scheduler.add(_series(2, NOW + timedelta(hours=2)), *window)
+    scheduler.discard(2)
+
+    due = scheduler.pop_due(window[1].timestamp())
+
+    assert [r.occurrence for r in due] == [
+        series_start + timedelta(days=1),
+        series_start + timedelta(days=2),
+    ]
+    assert scheduler.next_at() is None
+
+
+@pytest.mark.django_db
+def test_service_loads_fires_and_follows_changes():
+    cache.clear()
+    clock = Clock(NOW)
+    fired = []
+    listener = Listener()
+    service = ReminderService(
+        fired.extend,
+        listener,
+        lead=LEAD,
+        window=timedelta(hours=2),
+        chunk_size=2,
+        catch_up=0,
+        clock=clock,
+    )
+    events = [EventFactory(start=NOW + timedelta(minutes=30 * i)) for i in range(1, 4)]
+    moved, deleted, _kept = events
+
+    while service.loaded_until is None or service._loader is not None:  # noqa: SLF001
+        service.step()
+    assert service.loaded_until == NOW + timedelta(hours=2)
+
+    moved.start += timedelta(minutes=45)
+    moved.save()
+    deleted_id = deleted.pk
+    deleted.delete()
+    listener.changed = {moved.pk, deleted_id}
+    service.step()
+
+    clock.advance(hours=2)
+    service.step()
+    assert [(r.event_id, r.occurrence) for r in fired] == [
+        (moved.pk, NOW + timedelta(minutes=75)),
+        (events[2].pk, NOW + timedelta(minutes=90)),
+    ]
+    # Half a window before running out, the next one is loaded
+    assert service.loaded_until == NOW + timedelta(hours=4)
+
+
+@pytest.mark.django_db
+def test_send_event_reminder_checks_occurrence():
+    event = EventFactory(start=NOW, user__email="owner@example.com")
+
+    send_event_reminder(event.pk, (NOW + timedelta(hours=1)).isoformat())
+    assert mail.outbox == []
+
+    send_event_reminder(event.pk, NOW.isoformat())
+    [sent] = mail.outbox
+    assert sent.to == ["owner@example.com"]
+    assert event.title in sent.subject
+
+
+@pytest.mark.django_db
+def test_publish_change_after_commit(
+    settings,
+    monkeypatch,
+    django_capture_on_commit_callbacks,
+):
+    published = []
+    monkeypatch.setattr(
+        "event_scheduler.events.changes._publish",
+        published.append,
+    )
+    settings.EVENTS_CHANGES_ENABLED = True
+
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_change("saved", 1, 2)
+
+    assert [(m["op"], m["event_id"], m["user_id"]) for m in published] == [
+        ("saved", 1, 2),
+    ]
+
+
+@pytest.mark.django_db
+def test_leader_lock_without_postgres():
+    with leader_lock(1) as leader:
+        assert leader
@@ -0,0 +1,103 @@
+import time
+
+from asgiref.sync import async_to_sync
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event_scheduler.events.api.async_views import EventStreamView
+from event_scheduler.events.stream import ChangeHub
+from event_scheduler.events.stream import change_stream
+from event_scheduler.events.stream import parse_last_event_id
+from event_scheduler.events.tests.factories import EventFactory
+
+
+class LocalHub(ChangeHub):
+    """A hub fed by the test instead of Redis."""
+
+    def __init__(self, queue_size=100):
+        super().__init__("redis://unused", "events:changes", queue_size)
+
+    async def _listen(self):
+        pass
+
+
+def _read(user_id, count, since=None, hub=None, during=None):
+    """First ``count`` chunks of a stream, calling ``during(hub)`` once open."""
+    hub = hub or LocalHub()
+
+    async def read():
+        stream = change_stream(user_id, since, hub)
+        chunks = [await anext(stream)]
+        if during is not None:
+            during(hub)
+        chunks.extend([await anext(stream) for _ in range(count - 1)])
+        await stream.aclose()
+        return chunks
+
+    return async_to_sync(read)()
+
+
+def test_stream_sends_the_changes_of_its_user(user, settings):
+    settings.EVENTS_STREAM_HEARTBEAT_SECONDS = 0.05
+
+    def publish(hub):
+        hub.dispatch({"op": "saved", "event_id": 1, "user_id": user.pk + 1, "at": 1.0})
+        hub.dispatch({"op": "saved", "event_id": 2, "user_id": user.pk, "at": 2.5})
+
+    chunks = _read(user.pk, 3, during=publish)
+
+    assert chunks[0] == "retry: 3000\n\n"
+    assert chunks[1] == (
+        'id: 2.5\nevent: change\ndata: {"op": "saved", "event_id": 2}\n\n'
+    )
+    assert chunks[2] == ": heartbeat\n\n"
+
+
+def test_stream_replays_changes_after_last_event_id(user, settings):
+    settings.EVENTS_SYNC_OVERLAP_SECONDS = 0
+    since = time.time() - 1
+    saved = EventFactory(user=user)
+    deleted = EventFactory(user=user)
+    deleted_pk = deleted.pk
+    deleted.delete()
+
+    chunks = _read(user.pk, 3, since=since)
+
+    assert f'"op": "saved", "event_id": {saved.pk}' in chunks[1]
+    assert f'"op": "deleted", "event_id": {deleted_pk}' in chunks[2]
+
+
+def test_stream_resets_clients_that_missed_too_much(user, settings):
+    settings.EVENTS_STREAM_REPLAY_LIMIT = 1
+    EventFactory.create_batch(2, user=user)
+
+    def flood(hub):
+        for event_id in range(3):
+            message = {"op": "saved", "event_id": event_id, "user_id": user.pk}
+            hub.dispatch({**message, "at": time.time() - 60})
+
+    chunks = _read(user.pk, 2, hub=LocalHub(queue_size=2), during=flood)
+
+    assert "event: reset" in chunks[1]
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id("1700000000.5") == 1700000000.5  # noqa: PLR2004
+    assert parse_last_event_id("nope") is None
+    assert parse_last_event_id(str(time.time() + 3600)) is None
+    assert parse_last_event_id(None) is None
+
+
+def test_stream_view(user):
+    request = RequestFactory().get("/api/stream/")
+    request.COOKIES["auth_session"] = str(AccessToken.for_user(user))
+
+    response = async_to_sync(EventStreamView.as_view())(request)
+    anonymous = async_to_sync(EventStreamView.as_view())(
+        RequestFactory().get("/api/stream/"),
+    )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["Content-Type"] == "text/event-stream"
+    assert response["Cache-Control"] == "no-cache"
+    assert anonymous.status_code == 401  # noqa: PLR2004
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+from django.utils.translation import gettext_lazy as _
+
+
+class TasksConfig(AppConfig):
+    name = "event_scheduler.tasks"
+    verbose_name = _("Tasks")
+
+    def ready(self):
+        # Register the @task functions living in <app>/tasks.py modules
+        autodiscover_modules("tasks")
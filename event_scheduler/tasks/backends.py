@@ -0,0 +1,212 @@
+"""
+Job queue storage.
+
+``RedisBackend`` is used in production. Each queue is a Redis list; a worker
+atomically moves the job it takes into its own processing list and removes
+it once done, so jobs held by a worker that died are put back on the queue
+by the other workers, which look for them when they start and then every
+heartbeat period. Delayed jobs (retries) wait in a sorted set
+scored by their due time; failed jobs end up in a dead-letter list.
+
+``MemoryBackend`` implements the same interface in-process for tests.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from collections import deque
+
+import redis
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# Move due delayed jobs to their queue.
+# KEYS[1]: delayed sorted set, KEYS[2]: queue list, ARGV[1]: now
+PROMOTE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, raw in ipairs(due) do
+    redis.call('ZREM', KEYS[1], raw)
+    redis.call('RPUSH', KEYS[2], raw)
+end
+return #due
+"""
+
+
+class MemoryBackend:
+    """In-process queue with the same semantics as ``RedisBackend``."""
+
+    heartbeat_ttl = 60
+
+    def __init__(self):
+        self._ready = defaultdict(deque)
+        self._delayed = defaultdict(list)
+        self._dead = defaultdict(list)
+        self._processing = []
+        self._condition = threading.Condition()
+
+    def push(self, queue, raw):
+        with self._condition:
+            self._ready[queue].append(raw)
+            self._condition.notify()
+
+    def push_many(self, queue, raws):
+        with self._condition:
+            self._ready[queue].extend(raws)
+            self._condition.notify_all()
+
+    def pop(self, queues, timeout=1):
+        """Return the raw next job of ``queues`` or ``None`` after ``timeout``."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.time()
+                for queue in queues:
+                    due = [item for item in self._delayed[queue] if item[0] <= now]
+                    for item in due:
+                        self._delayed[queue].remove(item)
+                        self._ready[queue].append(item[1])
+                    if self._ready[queue]:
+                        raw = self._ready[queue].popleft()
+                        self._processing.append(raw)
+                        return raw
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(min(remaining, 0.1))
+
+    def ack(self, queue, raw):
+        with self._condition:
+            self._processing.remove(raw)
+
+    def retry(self, queue, raw, job, eta):
+        with self._condition:
+            self._processing.remove(raw)
+            self._delayed[queue].append((eta, json.dumps(job)))
+
+    def dead_letter(self, queue, raw, job):
+        with self._condition:
+            self._processing.remove(raw)
+            self._dead[queue].append(json.dumps(job))
+
+    def dead_letters(self, queue):
+        return [json.loads(raw) for raw in self._dead[queue]]
+
+    def size(self, queue):
+        return len(self._ready[queue]) + len(self._delayed[queue])
+
+    def recover(self, queues):
+        return 0
+
+    def heartbeat(self):
+        pass
+
+
+class RedisBackend:
+    def __init__(self, url, prefix="tasks", heartbeat_ttl=60):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.heartbeat_ttl = heartbeat_ttl
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._promote = self.client.register_script(PROMOTE_SCRIPT)
+
+    def _key(self, queue, *parts):
+        return ":".join((self.prefix, queue, *parts))
+
+    def _processing_key(self, queue):
+        return self._key(queue, "processing", self.worker_id)
+
+    def push(self, queue, raw):
+        self.client.rpush(self._key(queue), raw)
+
+    def push_many(self, queue, raws, batch_size=1000):
+        with self.client.pipeline(transaction=False) as pipe:
+            for i in range(0, len(raws), batch_size):
+                pipe.rpush(self._key(queue), *raws[i : i + batch_size])
+            pipe.execute()
+
+    def pop(self, queues, timeout=1):
+        now = time.time()
+        for queue in queues:
+            self._promote(
+                keys=[self._key(queue, "delayed"), self._key(queue)],
+                args=[now],
+            )
+            raw = self.client.lmove(self._key(queue), self._processing_key(queue))
+            if raw is not None:
+                return raw
+        # Nothing ready anywhere: block on the first queue for a while
+        return self.client.blmove(
+            self._key(queues[0]),
+            self._processing_key(queues[0]),
+            timeout,
+        )
+
+    def ack(self, queue, raw):
+        self.client.lrem(self._processing_key(queue), 1, raw)
+
+    def retry(self, queue, raw, job, eta):
+        with self.client.pipeline() as pipe:
+            pipe.lrem(self._processing_key(queue), 1, raw)
+            pipe.zadd(self._key(queue, "delayed"), {json.dumps(job): eta})
+            pipe.execute()
+
+    def dead_letter(self, queue, raw, job):
+        with self.client.pipeline() as pipe:
+            pipe.lrem(self._processing_key(queue), 1, raw)
+            pipe.rpush(self._key(queue, "dead"), json.dumps(job))
+            pipe.execute()
+
+    def dead_letters(self, queue):
+        return [
+            json.loads(raw)
+            for raw in self.client.lrange(self._key(queue, "dead"), 0, -1)
+        ]
+
+    def size(self, queue):
+        return self.client.llen(self._key(queue)) + self.client.zcard(
+            self._key(queue, "delayed"),
+        )
+
+    def heartbeat(self):
+        self.client.set(
+            f"{self.prefix}:workers:{self.worker_id}",
+            1,
+            ex=self.heartbeat_ttl,
+        )
+
+    def recover(self, queues):
+        """Requeue the jobs held by workers whose heartbeat expired."""
+        recovered = 0
+        for queue in queues:
+            pattern = self._key(queue, "processing", "*")
+            for key in self.client.scan_iter(match=pattern):
+                worker_id = key.decode().rsplit(":processing:", 1)[1]
+                if self.client.exists(f"{self.prefix}:workers:{worker_id}"):
+                    continue
+                while self.client.lmove(key, self._key(queue), "RIGHT", "LEFT"):
+                    recovered += 1
+        return recovered
+
+
+_backend = None
+
+
+def get_backend():
+    """Process-wide backend configured by ``TASKS_BACKEND``."""
+    global _backend  # noqa: PLW0603
+    if _backend is None:
+        backend = settings.TASKS_BACKEND
+        if backend == "memory":
+            _backend = MemoryBackend()
+        elif backend == "redis":
+            _backend = RedisBackend(
+                settings.TASKS_REDIS_URL,
+                prefix=settings.TASKS_PREFIX,
+            )
+        else:
+            _backend = import_string(backend)()
+    return _backend
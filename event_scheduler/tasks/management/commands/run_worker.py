@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from event_scheduler.tasks.worker import Worker
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the task queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queues",
+            nargs="+",
+            default=["default"],
+            help="Queues to consume, in priority order.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.TASKS_CONCURRENCY,
+            help="Number of jobs run in parallel.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once the queues are empty.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Worker consuming {', '.join(options['queues'])} "
+            f"with concurrency {options['concurrency']}",
+        )
+        Worker(queues=options["queues"], concurrency=options["concurrency"]).run(
+            burst=options["burst"],
+        )
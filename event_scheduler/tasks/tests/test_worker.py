@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+
+import pytest
+
+from event_scheduler.tasks.backends import MemoryBackend
+from event_scheduler.tasks.registry import Task
+from event_scheduler.tasks.registry import registry
+from event_scheduler.tasks.registry import task
+from event_scheduler.tasks.worker import Worker
+
+calls = []
+
+
+@task(max_retries=2, backoff=0)
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        msg = "boom"
+        raise RuntimeError(msg)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = MemoryBackend()
+    monkeypatch.setattr("event_scheduler.tasks.registry.get_backend", lambda: backend)
+    calls.clear()
+    return backend
+
+
+def run(backend):
+    Worker(backend=backend, poll_timeout=0.05).run(burst=True)
+
+
+def test_task_registered():
+    assert registry[flaky.name] is flaky
+    assert flaky.name == "event_scheduler.tasks.tests.test_worker.flaky"
+
+
+@pytest.mark.django_db(transaction=True)
+def test_job_runs(backend):
+    flaky.delay(0)
+    run(backend)
+    assert calls == [0]
+    assert backend.size("default") == 0
+
+
+@pytest.mark.django_db
+def test_enqueued_on_commit(backend, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        flaky.delay(0)
+    assert backend.size("default") == 0
+    callbacks[0]()
+    assert backend.size("default") == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_job_retried(backend):
+    flaky.delay(2)
+    run(backend)
+    assert calls == [2, 2, 2]
+    assert backend.dead_letters("default") == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_exhausted_job_dead_lettered(backend):
+    flaky.delay(5)
+    run(backend)
+    # The first run and both retries
+    assert calls == [5, 5, 5]
+    [dead] = backend.dead_letters("default")
+    assert dead["attempts"] == len(calls)
+    assert "boom" in dead["error"]
+
+
+def test_unknown_task_dead_lettered(backend):
+    backend.push("default", json.dumps({"id": "x", "task": "nope", "queue": "default"}))
+    run(backend)
+    [dead] = backend.dead_letters("default")
+    assert dead["error"] == "Unknown task nope"
+
+
+class DeadWorkerBackend(MemoryBackend):
+    """Also holds the jobs of a dead worker until its heartbeat expires."""
+
+    heartbeat_ttl = 0.3
+
+    def __init__(self, expires_at):
+        super().__init__()
+        self.expires_at = expires_at
+        self.held = []
+
+    def recover(self, queues):
+        if time.monotonic() < self.expires_at:
+            return 0
+        for raw in self.held:
+            self.push("default", raw)
+        recovered, self.held = len(self.held), []
+        return recovered
+
+
+@pytest.mark.django_db(transaction=True)
+def test_jobs_of_a_worker_dying_later_recovered(monkeypatch):
+    # The dead worker's heartbeat is still alive when this one starts
+    backend = DeadWorkerBackend(expires_at=time.monotonic() + 0.5)
+    monkeypatch.setattr("event_scheduler.tasks.registry.get_backend", lambda: backend)
+    calls.clear()
+    flaky.delay(0)
+    backend.held.append(backend.pop(["default"]))
+    worker = Worker(backend=backend, poll_timeout=0.05)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.05)
+    worker.stop()
+    thread.join()
+
+    assert calls == [0]
+    assert backend.held == []
+
+
+def test_retry_delay_backoff():
+    t = Task(lambda: None, backoff=10, backoff_max=60)
+    assert 8 <= t.retry_delay(1) <= 12  # noqa: PLR2004
+    assert 32 <= t.retry_delay(3) <= 48  # noqa: PLR2004
+    # Capped at backoff_max
+    assert 48 <= t.retry_delay(10) <= 72  # noqa: PLR2004
@@ -0,0 +1,127 @@
+import json
+import logging
+import signal
+import threading
+import time
+
+from django.db import close_old_connections
+
+from .backends import get_backend
+from .registry import registry
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """
+    Run jobs from ``queues`` with ``concurrency`` threads.
+
+    A failing job is retried with exponential backoff until its task's
+    ``max_retries`` is exhausted, then moved to the queue's dead-letter list.
+    """
+
+    def __init__(
+        self,
+        queues=("default",),
+        concurrency=1,
+        backend=None,
+        poll_timeout=1,
+    ):
+        self.queues = list(queues)
+        self.concurrency = concurrency
+        self.backend = backend or get_backend()
+        self.poll_timeout = poll_timeout
+        self._stop = threading.Event()
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def run(self, *, burst=False):
+        """
+        Process jobs until stopped (SIGINT/SIGTERM), or until the queues are
+        empty when ``burst`` is set.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+
+        self.backend.heartbeat()
+        self.recover()
+
+        threads = [
+            threading.Thread(target=self._loop, args=(burst,), name=f"task-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        ttl = self.backend.heartbeat_ttl
+        last_heartbeat = last_recovery = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=min(1, ttl / 3))
+            now = time.monotonic()
+            if now - last_heartbeat > ttl / 3:
+                self.backend.heartbeat()
+                last_heartbeat = now
+            # A worker that died after we started is only seen dead once its
+            # heartbeat expires: look again every heartbeat period
+            if now - last_recovery > ttl:
+                self.recover()
+                last_recovery = now
+
+    def recover(self):
+        recovered = self.backend.recover(self.queues)
+        if recovered:
+            logger.warning("Requeued %d jobs abandoned by dead workers", recovered)
+
+    def _loop(self, burst):
+        while not self._stop.is_set():
+            raw = self.backend.pop(self.queues, timeout=self.poll_timeout)
+            if raw is None:
+                if burst:
+                    return
+                continue
+            self.process(raw)
+
+    def process(self, raw):
+        job = json.loads(raw)
+        queue = job["queue"]
+        task = registry.get(job["task"])
+        if task is None:
+            job["error"] = f"Unknown task {job['task']}"
+            logger.error("Dead-lettering job %s: %s", job["id"], job["error"])
+            self.backend.dead_letter(queue, raw, job)
+            return
+
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            task.func(*job["args"], **job["kwargs"])
+        except Exception as e:
+            job["attempts"] += 1
+            job["error"] = repr(e)
+            if job["attempts"] > job["max_retries"]:
+                logger.exception("Job %s (%s) failed for good", job["id"], task.name)
+                self.backend.dead_letter(queue, raw, job)
+            else:
+                delay = task.retry_delay(job["attempts"])
+                logger.warning(
+                    "Job %s (%s) failed, retry %d/%d in %.0fs: %r",
+                    job["id"],
+                    task.name,
+                    job["attempts"],
+                    job["max_retries"],
+                    delay,
+                    e,
+                )
+                self.backend.retry(queue, raw, job, time.time() + delay)
+        else:
+            logger.info(
+                "Job %s (%s) done in %.3fs",
+                job["id"],
+                task.name,
+                time.perf_counter() - started,
+            )
+            self.backend.ack(queue, raw)
+        finally:
+            close_old_connections()
@@ -73,4 +73,6 @@ class UserAdmin(BaseUserAdmin):
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ("user", "updated_at")
+    list_select_related = ("user",)
+    ordering = ("-user__date_joined",)
     raw_id_fields = ("user",)
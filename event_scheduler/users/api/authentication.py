@@ -0,0 +1,55 @@
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from event_scheduler.users.cache import get_cached_user
+
+
+class CachedJWTCookieAuthentication(JWTCookieAuthentication):
+    """
+    ``JWTCookieAuthentication`` resolving the token's user through
+    ``event_scheduler.users.cache`` instead of a query per request.
+
+    The cached copy may be a few seconds stale, so unsafe requests, which
+    may ``save()`` the user (password change, profile update), load it from
+    the database instead: a full save of a stale copy would write back its
+    old ``password``, ``is_active`` or ``last_login``.
+    """
+
+    use_cache = True
+
+    def authenticate(self, request):
+        self.use_cache = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if not self.use_cache:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification"),
+            ) from e
+
+        user = get_cached_user(user_id, field=api_settings.USER_ID_FIELD)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM,
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+
+        return user
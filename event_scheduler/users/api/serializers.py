@@ -2,10 +2,12 @@ import logging
 from typing import Any
 
 from allauth.socialaccount.providers.oauth2.client import OAuth2Error
+from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
 from dj_rest_auth.registration.serializers import RegisterSerializer
 from dj_rest_auth.registration.serializers import SocialLoginSerializer
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import IntegrityError
 from django.http import HttpResponseBadRequest
 from django.utils.translation import gettext_lazy as _
@@ -14,6 +16,7 @@ from requests.exceptions import HTTPError
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
+from event_scheduler.users.api.tokens import BlacklistRefreshToken
 from event_scheduler.users.models import User
 from event_scheduler.users.models import UserProfile
 
@@ -24,6 +27,8 @@ logger = logging.getLogger(__name__)
 
 try:
     from allauth.account import app_settings as allauth_account_settings
+    from allauth.account.adapter import get_adapter
+    from allauth.account.utils import setup_user_email
     from allauth.socialaccount.helpers import complete_social_login
 except ImportError as err:
     ALLAUTH_MISSING_ERROR = "allauth needs to be added to INSTALLED_APPS."
@@ -40,9 +45,27 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "bio",
+            "share_freebusy",
             "updated_at",
         )
 
+    def update(self, instance, validated_data):
+        """
+        Save only the fields whose value changes, and nothing at all when
+        none does.
+        """
+        changed = [
+            field
+            for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        if not changed:
+            return instance
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        instance.save(update_fields=[*changed, "updated_at"])
+        return instance
+
 
 class UserDetailsSerializer(serializers.ModelSerializer[User]):
     """
@@ -63,6 +86,9 @@ class UserDetailsSerializer(serializers.ModelSerializer[User]):
             "is_staff",
             "profile",
         )
+        # The account itself isn't the user's to edit, and the flags gate
+        # access to staff-only data
+        read_only_fields = ("id", "email", "date_joined", "is_active", "is_staff")
 
     def get_profile(self, obj: User) -> dict[str, Any] | None:
         """
@@ -132,22 +158,34 @@ class UserRegisterSerializer(RegisterSerializer):
 
         return cleaned_data
 
-    # Override the save method to include first_name, last_name and other fields
+    # Override the save method to validate the whole model before its INSERT
     def save(self, request):
         """
         Custom save method with enhanced validation and error handling for:
         - Data integrity checks
+
+        Same steps as ``RegisterSerializer.save``; first_name and last_name
+        are set by the adapter from ``get_cleaned_data``, so the user is
+        written once.
         """
+        adapter = get_adapter()
         try:
-            # Create user instance with initial data
-            user = super().save(request)
-
-            user.first_name = self.validated_data.get("first_name", "")
-            user.last_name = self.validated_data.get("last_name", "")
+            user = adapter.new_user(request)
+            self.cleaned_data = self.get_cleaned_data()
+            user = adapter.save_user(request, user, self, commit=False)
+            try:
+                adapter.clean_password(self.cleaned_data["password1"], user=user)
+            except DjangoValidationError as exc:
+                raise serializers.ValidationError(
+                    detail=serializers.as_serializer_error(exc),
+                ) from exc
 
-            # Full model validation before saving # Validate and save ALL fields
-            user.full_clean()
+            # Full model validation before saving; the email's uniqueness was
+            # checked by the field validator and is enforced by the database.
+            user.full_clean(validate_unique=False)
             user.save()
+            self.custom_signup(request, user)
+            setup_user_email(request, user, [])
 
         except IntegrityError as e:
             if isinstance(e.__cause__, errors.UniqueViolation):
@@ -349,3 +387,12 @@ class UserSocialLoginSerializer(SocialLoginSerializer):
         attrs["user"] = login.account.user
 
         return attrs
+
+
+class UserTokenRefreshSerializer(CookieTokenRefreshSerializer):
+    """
+    Rotate the refresh token read from the request or its cookie, checking
+    and blacklisting it in ``event_scheduler.users.blacklist``.
+    """
+
+    token_class = BlacklistRefreshToken
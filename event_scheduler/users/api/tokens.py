@@ -0,0 +1,28 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from event_scheduler.users.blacklist import get_blacklist_store
+
+
+class BlacklistRefreshToken(RefreshToken):
+    """
+    ``RefreshToken`` checked against ``event_scheduler.users.blacklist``
+    rather than simplejwt's ``token_blacklist`` app.
+    """
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if get_blacklist_store().contains(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if not get_blacklist_store().add(jti, self.payload["exp"]):
+            # Refreshed concurrently with the same token
+            raise TokenError(_("Token is blacklisted"))
@@ -4,8 +4,12 @@ from django.urls import include
 from django.urls import path
 
 from event_scheduler.users.api.views import GoogleLogin
+from event_scheduler.users.api.views import UserDetailsAPIView
+from event_scheduler.users.api.views import UserLoginAPIView
+from event_scheduler.users.api.views import UserLogoutAPIView
 from event_scheduler.users.api.views import UserProfileAPIView
 from event_scheduler.users.api.views import UserRedirectView
+from event_scheduler.users.api.views import UserTokenRefreshAPIView
 
 # Non-viewset URLs for users
 urlpatterns = [
@@ -14,6 +18,15 @@ urlpatterns = [
         "registration/account-confirm-email/<str:key>/",
         ConfirmEmailView.as_view(),
     ),  # Needs to be defined before the registration path
+    # Needs to be defined before the dj_rest_auth urls
+    path("auth/login/", UserLoginAPIView.as_view(), name="rest_login"),
+    path("auth/logout/", UserLogoutAPIView.as_view(), name="rest_logout"),
+    path(
+        "auth/token/refresh/",
+        UserTokenRefreshAPIView.as_view(),
+        name="token_refresh",
+    ),
+    path("auth/user/", UserDetailsAPIView.as_view(), name="rest_user_details"),
     path("auth/", include("dj_rest_auth.urls")),
     path("user/registration/", include("dj_rest_auth.registration.urls")),
     # Email verification
@@ -5,35 +5,47 @@ Module for user-related API views.
 # Standard library imports
 
 # Third-party imports
+import contextlib
 import logging
 
 from allauth.account.adapter import DefaultAccountAdapter
+from allauth.core import context as allauth_context
 from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
+from dj_rest_auth.app_settings import api_settings as rest_auth_settings
+from dj_rest_auth.jwt_auth import get_refresh_view
 from dj_rest_auth.registration.views import RegisterView
 from dj_rest_auth.registration.views import SocialLoginView
 from dj_rest_auth.views import LoginView
+from dj_rest_auth.views import LogoutView
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.sites.shortcuts import get_current_site
 from django.utils.translation import gettext as _
 from django.views.generic import RedirectView
 from rest_framework import status
-from rest_framework.generics import RetrieveAPIView
 from rest_framework.generics import RetrieveUpdateAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
 
 from event_scheduler.users.api.permissions import IsUserProfileOwner
+from event_scheduler.users.api.tokens import BlacklistRefreshToken
+from event_scheduler.users.cache import bump_user_version
+from event_scheduler.users.cache import get_cached_representation
 
 # Local imports
 from event_scheduler.users.models import UserProfile
+from event_scheduler.users.tasks import send_email_message
+from event_scheduler.users.tasks import serialize_email
 
 from .serializers import UserDetailsSerializer
 from .serializers import UserLoginSerializer
 from .serializers import UserProfileSerializer
 from .serializers import UserRegisterSerializer
 from .serializers import UserSocialLoginSerializer
+from .serializers import UserTokenRefreshSerializer
 
 User = get_user_model()
 
@@ -41,11 +53,33 @@ User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-class UserProfileAPIView(RetrieveUpdateAPIView):
+class CachedRetrieveMixin:
+    """
+    Serve GET of the requesting user's own data from
+    ``event_scheduler.users.cache``, invalidated when the user or their
+    profile is saved.
+    """
+
+    representation_name = None
+
+    def retrieve(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return super().retrieve(request, *args, **kwargs)
+        data = get_cached_representation(
+            request.user.pk,
+            self.representation_name,
+            lambda: dict(self.get_serializer(self.get_object()).data),
+        )
+        return Response(data)
+
+
+class UserProfileAPIView(CachedRetrieveMixin, RetrieveUpdateAPIView):
     """
     Get, Update user profile
     """
 
+    representation_name = "profile"
+
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = (IsUserProfileOwner,)
@@ -86,13 +120,44 @@ class UserLoginAPIView(LoginView):
     """
 
     serializer_class = UserLoginSerializer
+    throttle_scope = "login"
 
 
-class UserDetailsAPIView(RetrieveAPIView):
+class UserLogoutAPIView(LogoutView):
     """
-    Get user details
+    Log out, dropping the user from the authentication cache and
+    blacklisting the refresh token.
+    With JWT cookies and no session, dj-rest-auth sends no logout signal.
     """
 
+    def logout(self, request):
+        if request.user.is_authenticated:
+            bump_user_version(request.user.pk)
+        raw_token = request.data.get("refresh") or request.COOKIES.get(
+            rest_auth_settings.JWT_AUTH_REFRESH_COOKIE,
+        )
+        if raw_token:
+            # Invalid, expired or already blacklisted: nothing to revoke
+            with contextlib.suppress(TokenError):
+                BlacklistRefreshToken(raw_token).blacklist()
+        return super().logout(request)
+
+
+class UserTokenRefreshAPIView(get_refresh_view()):
+    """
+    Refresh the access token, rotating the refresh token.
+    """
+
+    serializer_class = UserTokenRefreshSerializer
+
+
+class UserDetailsAPIView(CachedRetrieveMixin, RetrieveUpdateAPIView):
+    """
+    Get, Update user details
+    """
+
+    representation_name = "details"
+
     queryset = User.objects.all()
     serializer_class = UserDetailsSerializer
     permission_classes = (IsAuthenticated,)
@@ -130,6 +195,21 @@ class UserRedirectView(LoginRequiredMixin, RedirectView):
 
 
 class CustomAccountAdapter(DefaultAccountAdapter):
+    def send_mail(self, template_prefix, email, context):
+        """
+        Render the email in the request, but hand the delivery over to the
+        task queue so the response doesn't wait on the SMTP/ESP round-trip.
+        """
+        request = allauth_context.request
+        ctx = {
+            "request": request,
+            "email": email,
+            "current_site": get_current_site(request),
+        }
+        ctx.update(context)
+        msg = self.render_mail(template_prefix, email, ctx)
+        send_email_message.delay(serialize_email(msg))
+
     def get_email_confirmation_url(self, request, emailconfirmation):
         """
         Changing the confirmation URL to fit the domain that we are working on
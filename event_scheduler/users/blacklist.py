@@ -0,0 +1,185 @@
+"""
+Refresh token blacklist.
+
+Refresh tokens are rotated on every refresh and the old one is blacklisted
+(``BLACKLIST_AFTER_ROTATION``). Instead of simplejwt's ``token_blacklist``
+tables, which get two INSERTs per refresh and are never pruned, blacklisted
+JTIs go to the store configured by ``JWT_BLACKLIST_BACKEND``:
+
+- ``RedisBlacklistStore`` keeps one key per JTI, expiring with the token.
+  Every process mirrors the JTIs in an in-process bloom filter, synced
+  every ``JWT_BLACKLIST_SYNC_INTERVAL`` seconds from a Redis sorted set, so
+  checking a token that isn't blacklisted (nearly every refresh) costs no
+  round-trip. Only bloom filter hits are confirmed in Redis. A token
+  blacklisted by another process is recognised once this process synced.
+- ``MemoryBlacklistStore`` keeps them in process, for tests and local
+  development.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Set membership with false positives only, sized for ``capacity`` items
+    at ``error_rate``.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class MemoryBlacklistStore:
+    def __init__(self):
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def add(self, jti, exp):
+        with self._lock:
+            if self.contains(jti):
+                return False
+            self._expires[jti] = exp
+            return True
+
+    def contains(self, jti):
+        exp = self._expires.get(jti)
+        return exp is not None and exp > time.time()
+
+
+class RedisBlacklistStore:
+    def __init__(  # noqa: PLR0913
+        self,
+        url,
+        *,
+        lifetime,
+        prefix="jwt:blacklist",
+        sync_interval=1.0,
+        capacity=1_000_000,
+        error_rate=0.001,
+    ):
+        self.client = redis.Redis.from_url(url)
+        self.lifetime = lifetime
+        self.prefix = prefix
+        self.sync_interval = sync_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._log_key = f"{prefix}:log"
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._synced_at = 0.0
+        self._built_at = 0.0
+
+    def add(self, jti, exp):
+        """
+        Blacklist ``jti`` until ``exp``; returns ``False`` if it already was,
+        so only one of two concurrent refreshes of a token succeeds.
+        """
+        now = time.time()
+        ttl = max(1, math.ceil(exp - now))
+        with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(f"{self.prefix}:{jti}", 1, ex=ttl, nx=True)
+            pipe.zadd(self._log_key, {jti: now})
+            pipe.zremrangebyscore(self._log_key, "-inf", now - self.lifetime)
+            added, _zadd, _pruned = pipe.execute()
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        return bool(added)
+
+    def contains(self, jti):
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        return bool(self.client.exists(f"{self.prefix}:{jti}"))
+
+    def _is_fresh(self, now):
+        return self._bloom is not None and now - self._synced_at < self.sync_interval
+
+    def sync(self, *, force=False):
+        """
+        Add the JTIs blacklisted since the last sync to the bloom filter.
+        The filter is rebuilt from scratch once per token lifetime, dropping
+        expired JTIs, or sooner when it fills up.
+        """
+        now = time.time()
+        if not force and self._is_fresh(now):
+            return
+        with self._lock:
+            if not force and self._is_fresh(now):
+                return
+            rebuild = (
+                self._bloom is None
+                or now - self._built_at > self.lifetime
+                or self._bloom.count > self.capacity
+            )
+            # Overlap with the previous sync so entries written with a
+            # slightly skewed clock aren't missed
+            since = now - self.lifetime if rebuild else self._synced_at - 5
+            try:
+                jtis = self.client.zrangebyscore(self._log_key, since, "+inf")
+            except redis.RedisError:
+                if self._bloom is None:
+                    raise
+                logger.warning("Could not sync the token blacklist", exc_info=True)
+                return
+            if rebuild:
+                self._bloom = BloomFilter(self.capacity, self.error_rate)
+                self._built_at = now
+            for jti in jtis:
+                self._bloom.add(jti.decode())
+            self._synced_at = now
+
+
+_store = None
+
+
+def get_blacklist_store():
+    """Process-wide store configured by ``JWT_BLACKLIST_BACKEND``."""
+    global _store  # noqa: PLW0603
+    if _store is None:
+        backend = settings.JWT_BLACKLIST_BACKEND
+        if backend == "memory":
+            _store = MemoryBlacklistStore()
+        elif backend == "redis":
+            _store = RedisBlacklistStore(
+                settings.JWT_BLACKLIST_REDIS_URL,
+                lifetime=settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds(),
+                sync_interval=settings.JWT_BLACKLIST_SYNC_INTERVAL,
+                capacity=settings.JWT_BLACKLIST_BLOOM_CAPACITY,
+                error_rate=settings.JWT_BLACKLIST_BLOOM_ERROR_RATE,
+            )
+        else:
+            _store = import_string(backend)()
+    return _store
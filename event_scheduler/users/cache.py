@@ -0,0 +1,103 @@
+"""
+Two-tier cache of ``User`` rows for request authentication.
+
+Users are cached in the shared cache (Redis in production) under
+``users:<id>:<version>`` for ``USER_CACHE_TIMEOUT`` seconds, and for
+``USER_CACHE_LOCAL_TIMEOUT`` seconds in process memory. The version is
+replaced whenever the user changes (password change, deactivation, any
+save), is deleted or logs out, so the shared tier is never stale; another
+process' memory tier may be, for at most its short timeout.
+
+Entries are stored pickled, so every request gets its own ``User`` instance. Only
+safe requests use the cache; the others, which may save the user, query it.
+
+API representations of the user's own data (``/api/auth/user/``,
+``/api/user/profile/``) are cached under the same version, so they are
+invalidated along with the user; profile saves bump the version too.
+Updates bypassing ``save()`` (``QuerySet.update()``) must bump it themselves.
+"""
+
+import pickle
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+LOCAL_MAX_SIZE = 10_000
+
+_local = {}
+_lock = threading.Lock()
+
+
+def _version_key(user_id):
+    return f"users:{user_id}:version"
+
+
+def get_user_version(user_id):
+    return cache.get_or_set(_version_key(user_id), uuid.uuid4().hex, None)
+
+
+def bump_user_version(user_id):
+    """
+    Invalidate the cached ``user_id`` now and again once the transaction
+    commits: a concurrent request may cache the row as it was before the
+    commit in between.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    cache.set(_version_key(user_id), uuid.uuid4().hex, None)
+    with _lock:
+        _local.pop(user_id, None)
+
+
+def clear_local():
+    with _lock:
+        _local.clear()
+
+
+def get_cached_user(user_id, field="pk"):
+    """
+    Return the user whose ``field`` is ``user_id``, or ``None`` if there is
+    none. Hits of either tier run no query.
+    """
+    now = time.monotonic()
+    entry = _local.get(user_id)
+    if entry is not None and entry[0] > now:
+        return pickle.loads(entry[1])  # noqa: S301
+
+    key = f"users:{user_id}:{get_user_version(user_id)}"
+    data = cache.get(key)
+    if data is None:
+        user = get_user_model().objects.filter(**{field: user_id}).first()
+        if user is None:
+            return None
+        data = pickle.dumps(user)
+        cache.set(key, data, settings.USER_CACHE_TIMEOUT)
+    else:
+        user = pickle.loads(data)  # noqa: S301
+
+    with _lock:
+        if len(_local) >= LOCAL_MAX_SIZE:
+            _local.clear()
+        _local[user_id] = (now + settings.USER_CACHE_LOCAL_TIMEOUT, data)
+    return user
+
+
+def get_cached_representation(user_id, name, build):
+    """
+    Return the ``name`` representation of ``user_id``'s data from the shared
+    cache, calling ``build`` to compute it on a miss.
+    """
+    key = f"users:{user_id}:{get_user_version(user_id)}:{name}"
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.USER_CACHE_TIMEOUT)
+    return data
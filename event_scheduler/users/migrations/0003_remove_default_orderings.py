@@ -0,0 +1,21 @@
+# Generated by Django 5.1.9 on 2026-10-19 11:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_options_remove_user_name_user_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='user',
+            options={'verbose_name': 'user', 'verbose_name_plural': 'users'},
+        ),
+        migrations.AlterModelOptions(
+            name='userprofile',
+            options={},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.9 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_remove_default_orderings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='share_freebusy',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -32,7 +32,6 @@ class User(AbstractUser):
     class Meta:
         verbose_name = _("user")
         verbose_name_plural = _("users")
-        ordering = ("-date_joined",)
 
     def clean(self):
         super().clean()
@@ -62,11 +61,11 @@ class UserProfile(models.Model):
         on_delete=models.CASCADE,
     )
     bio = models.TextField(max_length=500, blank=True)
+    # Lets other users see when this user is busy, never what for (see
+    # event_scheduler.events.freebusy)
+    share_freebusy = models.BooleanField(default=False)
     updated_at = models.DateTimeField(auto_now=True)
 
-    class Meta:
-        ordering = ("-user__date_joined",)
-
     def __str__(self):
         return self.user.email
 
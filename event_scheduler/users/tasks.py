@@ -0,0 +1,31 @@
+from django.core.mail import EmailMultiAlternatives
+
+from event_scheduler.tasks.registry import task
+
+
+def serialize_email(message):
+    """JSON-friendly form of an ``EmailMessage`` (attachments aren't supported)."""
+    return {
+        "subject": message.subject,
+        "body": message.body,
+        "from_email": message.from_email,
+        "to": message.to,
+        "cc": message.cc,
+        "bcc": message.bcc,
+        "reply_to": message.reply_to,
+        "headers": message.extra_headers,
+        "alternatives": [list(alt) for alt in getattr(message, "alternatives", [])],
+        "content_subtype": message.content_subtype,
+    }
+
+
+@task(queue="email", max_retries=5, backoff=30)
+def send_email_message(message):
+    """Send a message serialized by ``serialize_email``."""
+    alternatives = message.pop("alternatives")
+    content_subtype = message.pop("content_subtype")
+    email = EmailMultiAlternatives(**message)
+    for content, mimetype in alternatives:
+        email.attach_alternative(content, mimetype)
+    email.content_subtype = content_subtype
+    email.send()
@@ -0,0 +1,109 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from event_scheduler.users.api.authentication import CachedJWTCookieAuthentication
+from event_scheduler.users.cache import clear_local
+from event_scheduler.users.models import User
+from event_scheduler.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+OLD, NEW = "old-Secret-42", "new-Secret-42"
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    cache.clear()
+    clear_local()
+
+
+def _authenticate(user, method="get"):
+    request = getattr(APIRequestFactory(), method)(
+        "/api/events/",
+        HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}",
+    )
+    authenticated, _token = CachedJWTCookieAuthentication().authenticate(request)
+    return authenticated
+
+
+def test_cache_hits_run_no_query(user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        _authenticate(user)
+    with django_assert_num_queries(0):
+        assert _authenticate(user) == user
+
+    # Shared tier only, as seen by another process
+    clear_local()
+    with django_assert_num_queries(0):
+        assert _authenticate(user).email == user.email
+
+
+def test_each_request_gets_its_own_instance(user):
+    first = _authenticate(user)
+    first.first_name = "Changed"
+    assert _authenticate(user).first_name == user.first_name
+
+
+def test_deactivation_invalidates(user):
+    _authenticate(user)
+    user.is_active = False
+    user.save()
+
+    with pytest.raises(AuthenticationFailed, match="inactive"):
+        _authenticate(user)
+
+
+def test_password_change_invalidates(user, django_assert_num_queries):
+    _authenticate(user)
+    user.set_password("another-Secret-42")
+    user.save()
+
+    with django_assert_num_queries(1):
+        assert _authenticate(user).password == user.password
+
+
+def test_logout_invalidates(user, django_assert_num_queries):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    client.post("/api/auth/logout/")
+
+    with django_assert_num_queries(1):
+        _authenticate(user)
+
+
+def test_unsafe_requests_bypass_the_cache(user, django_assert_num_queries):
+    _authenticate(user)
+    # Changed by another process, whose version bump this one missed
+    User.objects.filter(pk=user.pk).update(first_name="Elsewhere")
+
+    with django_assert_num_queries(0):
+        assert _authenticate(user).first_name == user.first_name
+    with django_assert_num_queries(1):
+        assert _authenticate(user, "patch").first_name == "Elsewhere"
+
+
+def test_password_change_keeps_fields_changed_elsewhere():
+    user = UserFactory(password=OLD)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+    client.get("/api/auth/user/")
+    # Deactivated by another process: the cached copy is stale
+    User.objects.filter(pk=user.pk).update(is_active=False)
+
+    response = client.post(
+        "/api/auth/password/change/",
+        {
+            "old_password": OLD,
+            "new_password1": NEW,
+            "new_password2": NEW,
+        },
+    )
+
+    assert response.status_code == 401  # noqa: PLR2004
+    user.refresh_from_db()
+    assert not user.is_active
+    assert user.check_password(OLD)
@@ -0,0 +1,74 @@
+import time
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from event_scheduler.users import blacklist
+from event_scheduler.users.blacklist import BloomFilter
+from event_scheduler.users.blacklist import MemoryBlacklistStore
+
+pytestmark = pytest.mark.django_db
+
+REFRESH_URL = "/api/auth/token/refresh/"
+
+
+@pytest.fixture(autouse=True)
+def _empty_blacklist(monkeypatch):
+    monkeypatch.setattr(blacklist, "_store", MemoryBlacklistStore())
+
+
+def _refresh(token):
+    return APIClient().post(REFRESH_URL, {"refresh": str(token)}, format="json")
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    items = [f"jti-{i}" for i in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300  # noqa: PLR2004
+
+
+def test_memory_store_expires_entries():
+    store = MemoryBlacklistStore()
+    assert store.add("a", time.time() + 60)
+    assert not store.add("a", time.time() + 60)
+    assert store.contains("a")
+
+    store.add("b", time.time() - 1)
+    assert not store.contains("b")
+
+
+def test_refresh_rotates_and_blacklists(user):
+    token = RefreshToken.for_user(user)
+
+    response = _refresh(token)
+    assert response.status_code == 200  # noqa: PLR2004
+    assert "auth_refresh_session" in response.cookies
+
+    # The rotated token can't be used again
+    response = _refresh(token)
+    assert response.status_code == 401  # noqa: PLR2004
+
+
+def test_refresh_from_cookie(user):
+    client = APIClient()
+    client.cookies["auth_refresh_session"] = str(RefreshToken.for_user(user))
+
+    response = client.post(REFRESH_URL)
+    assert response.status_code == 200  # noqa: PLR2004
+    assert "access" in response.data
+
+
+def test_logout_blacklists_refresh_token(user):
+    token = RefreshToken.for_user(user)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    client.post("/api/auth/logout/", {"refresh": str(token)}, format="json")
+
+    assert _refresh(token).status_code == 401  # noqa: PLR2004
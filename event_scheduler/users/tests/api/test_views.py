@@ -1,4 +1,130 @@
+import pytest
+from django.contrib.auth.signals import user_logged_in
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from event_scheduler.users.models import User
+
+PASSWORD = "correct-Horse-battery-9"  # noqa: S105
+
+
+def _writes(queries):
+    return [
+        q["sql"].split()[:3]
+        for q in queries
+        if q["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+    ]
+
+
 def test_example3():
     result = 2 + 2
     expected = 4
     assert result == expected
+
+
+@pytest.mark.django_db
+def test_registration_inserts_once(client):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post(
+            "/api/user/registration/",
+            {
+                "email": "new@example.com",
+                "password1": PASSWORD,
+                "password2": PASSWORD,
+                "first_name": "Ada",
+                "last_name": "Lovelace",
+            },
+            content_type="application/json",
+        )
+
+    assert response.status_code == 201  # noqa: PLR2004
+    user = User.objects.get(email="new@example.com")
+    assert (user.first_name, user.last_name) == ("Ada", "Lovelace")
+    writes = [sql for sql in _writes(queries) if '"django_session"' not in sql]
+    # One row per table; the login that follows registration sets last_login
+    assert writes == [
+        ["INSERT", "INTO", '"users_user"'],
+        ["INSERT", "INTO", '"users_userprofile"'],
+        ["INSERT", "INTO", '"account_emailaddress"'],
+        ["UPDATE", '"users_user"', "SET"],
+    ]
+
+
+def test_login_updates_last_login_only(user, django_assert_num_queries):
+    with django_assert_num_queries(1):
+        user_logged_in.send(sender=User, request=None, user=user)
+
+
+def test_unchanged_profile_not_saved(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    user.profile.bio = "Hello"
+    user.profile.save()
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.patch(
+            "/api/user/profile/",
+            {"bio": "Hello"},
+            format="json",
+        )
+    assert response.status_code == 200  # noqa: PLR2004
+    assert _writes(queries) == []
+
+    with CaptureQueriesContext(connection) as queries:
+        client.patch(
+            "/api/user/profile/",
+            {"bio": "Bye"},
+            format="json",
+        )
+    assert _writes(queries) == [["UPDATE", '"users_userprofile"', "SET"]]
+    user.profile.refresh_from_db()
+    assert user.profile.bio == "Bye"
+
+
+@pytest.mark.django_db
+def test_user_and_profile_are_cached(user):
+    cache.clear()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    first = client.get("/api/auth/user/").data
+    client.get("/api/user/profile/")
+    with CaptureQueriesContext(connection) as queries:
+        assert client.get("/api/auth/user/").data == first
+        client.get("/api/user/profile/")
+    # Only the ATOMIC_REQUESTS savepoints
+    assert not [q for q in queries if q["sql"].startswith("SELECT")]
+
+    client.patch("/api/user/profile/", {"bio": "Updated"}, format="json")
+    assert client.get("/api/user/profile/").data["bio"] == "Updated"
+    assert client.get("/api/auth/user/").data["profile"]["bio"] == "Updated"
+
+    client.patch("/api/auth/user/", {"first_name": "Renamed"}, format="json")
+    assert client.get("/api/auth/user/").data["first_name"] == "Renamed"
+
+
+@pytest.mark.django_db
+def test_user_cannot_change_their_account_flags(user):
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.patch(
+        "/api/auth/user/",
+        {
+            "first_name": "Renamed",
+            "email": "other@example.com",
+            "is_active": False,
+            "is_staff": True,
+        },
+        format="json",
+    )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    user.refresh_from_db()
+    assert user.first_name == "Renamed"
+    assert user.email != "other@example.com"
+    assert user.is_active
+    assert not user.is_staff
+    assert response.data["is_staff"] is False
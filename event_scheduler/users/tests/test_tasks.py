@@ -0,0 +1,24 @@
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+
+from event_scheduler.users.tasks import send_email_message
+from event_scheduler.users.tasks import serialize_email
+
+
+def test_send_email_message_round_trip():
+    message = EmailMultiAlternatives(
+        subject="Confirm",
+        body="text",
+        from_email="noreply@example.com",
+        to=["user@example.com"],
+        headers={"X-Tag": "confirm"},
+    )
+    message.attach_alternative("<p>html</p>", "text/html")
+
+    send_email_message(serialize_email(message))
+
+    [sent] = mail.outbox
+    assert sent.subject == "Confirm"
+    assert sent.to == ["user@example.com"]
+    assert sent.extra_headers == {"X-Tag": "confirm"}
+    assert sent.alternatives[0][0] == "<p>html</p>"
@@ -0,0 +1,40 @@
+"""
+Metrics of the psycopg connection pools (``DJANGO_DATABASE_POOL``).
+
+Pools are per process, so the metrics describe the worker serving the
+request. ``saturation`` is the share of ``max_size`` connections checked
+out; requests wait once it reaches 1, see ``queued`` and ``mean_wait_ms``.
+"""
+
+from django.db import connections
+
+
+def pool_metrics():
+    """Return the metrics of each pooled database alias, ``{}`` without pools."""
+    metrics = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is None:
+            continue
+        stats = pool.get_stats()
+        size = stats.get("pool_size", 0)
+        in_use = size - stats.get("pool_available", 0)
+        queued = stats.get("requests_queued", 0)
+        metrics[alias] = {
+            "min_size": pool.min_size,
+            "max_size": pool.max_size,
+            "size": size,
+            "in_use": in_use,
+            "saturation": round(in_use / pool.max_size, 3),
+            "waiting": stats.get("requests_waiting", 0),
+            "requests": stats.get("requests_num", 0),
+            "queued": queued,
+            "mean_wait_ms": round(stats.get("requests_wait_ms", 0) / queued, 3)
+            if queued
+            else 0,
+            "timeouts": stats.get("requests_errors", 0),
+            "connections_opened": stats.get("connections_num", 0),
+            "connections_lost": stats.get("connections_lost", 0),
+            "bad_returns": stats.get("returns_bad", 0),
+        }
+    return metrics
@@ -0,0 +1,178 @@
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextlib import nullcontext
+
+from asgiref.sync import iscoroutinefunction
+from asgiref.sync import markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.deprecation import MiddlewareMixin
+
+from event_scheduler.utils.db_pool import pool_metrics
+from event_scheduler.utils.replicas import replica_reads
+from event_scheduler.utils.request_stats import RequestStats
+
+slow_request_logger = logging.getLogger("event_scheduler.slow_requests")
+
+
+class SlowRequestMiddleware:
+    """
+    Log a structured record for every request slower than
+    ``SLOW_REQUEST_THRESHOLD_MS``.
+
+    The record carries the user, endpoint, requested calendar range, number of
+    events loaded and occurrences generated, the slowest recurrence rules with
+    their expansion times and a summary of the SQL executed. It is emitted on
+    the ``event_scheduler.slow_requests`` logger, so it can be routed on its
+    own without turning on debug logging globally.
+
+    Disabled when the threshold is 0.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.threshold = settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+        if self.threshold <= 0:
+            raise MiddlewareNotUsed
+        self.top_rules = settings.SLOW_REQUEST_TOP_RULES
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        stats = RequestStats()
+        token = stats.activate()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.record_query))
+                response = self.get_response(request)
+        finally:
+            RequestStats.deactivate(token)
+
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.log(request, response, stats, duration)
+        return response
+
+    async def __acall__(self, request):
+        # Async ORM queries run in other threads, on other connections, so the
+        # SQL summary is only collected for sync requests.
+        stats = RequestStats()
+        token = stats.activate()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            RequestStats.deactivate(token)
+
+        duration = time.perf_counter() - started
+        if duration >= self.threshold:
+            self.log(request, response, stats, duration)
+        return response
+
+    def log(self, request, response, stats, duration):
+        user = getattr(request, "user", None)
+        match = request.resolver_match
+        record = {
+            "user_id": user.pk if user is not None and user.is_authenticated else None,
+            "method": request.method,
+            "endpoint": match.view_name if match else None,
+            "path": request.path,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 3),
+            **stats.as_dict(top_rules=self.top_rules),
+        }
+        if db_pool := pool_metrics():
+            record["db_pool"] = db_pool
+        slow_request_logger.warning(
+            "Slow request %s",
+            json.dumps(record, default=str),
+            extra={"slow_request": record},
+        )
+
+
+class RateLimitHeadersMiddleware(MiddlewareMixin):
+    """
+    Add the ``RateLimit-*`` headers of the most depleted token bucket the
+    request went through (see ``event_scheduler.utils.throttling``).
+    """
+
+    def process_response(self, request, response):
+        rate_limit = getattr(request, "rate_limit", None)
+        if rate_limit is not None:
+            limit, remaining, reset = rate_limit
+            response["RateLimit-Limit"] = str(limit)
+            response["RateLimit-Remaining"] = str(remaining)
+            response["RateLimit-Reset"] = str(reset)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Read from the replicas during safe-method API requests (see
+    ``event_scheduler.utils.replicas``).
+
+    Replicas lag behind the primary, so a successful unsafe request sets a
+    cookie keeping the client on the primary for the next
+    ``DATABASE_REPLICA_PIN_SECONDS``: it reads its own writes.
+
+    Disabled when no replica is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ("GET", "HEAD", "OPTIONS")
+    cookie_name = "db_primary"
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with self.routing(request):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        with self.routing(request):
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def routing(self, request):
+        if (
+            request.method in self.safe_methods
+            and request.path.startswith("/api/")
+            and self.cookie_name not in request.COOKIES
+        ):
+            return replica_reads()
+        return nullcontext()
+
+    def pin(self, request, response):
+        if request.method not in self.safe_methods and response.status_code < 400:  # noqa: PLR2004
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=self.pin_seconds,
+                httponly=True,
+                secure=settings.JWT_AUTH_SECURE,
+                samesite=settings.JWT_AUTH_SAMESITE,
+            )
+        return response
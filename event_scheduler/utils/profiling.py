@@ -0,0 +1,171 @@
+"""
+Always-on statistical sampling profiler.
+
+A daemon thread wakes up every ``interval`` seconds, grabs the stacks of the
+threads that are currently serving a request through ``sys._current_frames``
+and folds them into collapsed-stack lines (``frame;frame;frame count``), the
+format understood by flamegraph.pl, speedscope and inferno.
+
+Samples are flushed to one file per worker process per ``rotate_interval``
+seconds, so hotspots such as ``rrulestr`` parsing or DRF field serialization
+show up from real traffic without attaching an external profiler.
+
+The sampler measures its own cost and stretches the sampling interval whenever
+that cost would exceed ``max_overhead`` of the wall-clock time.
+"""
+
+import atexit
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """
+    Sample the stacks of request threads and write collapsed-stack files.
+
+    Usage (see ``config/wsgi.py``):
+        application = StackSampler.from_settings().track(application)
+    """
+
+    def __init__(
+        self,
+        output_dir,
+        interval=0.01,
+        rotate_interval=300,
+        max_overhead=0.01,
+        max_depth=128,
+    ):
+        self.output_dir = Path(output_dir)
+        self.interval = interval
+        self.rotate_interval = rotate_interval
+        self.max_overhead = max_overhead
+        self.max_depth = max_depth
+
+        self._active = set()
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._sample_cost = 0.0
+        self._period_started = time.monotonic()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            output_dir=settings.SAMPLING_PROFILER_OUTPUT_DIR,
+            interval=settings.SAMPLING_PROFILER_INTERVAL,
+            rotate_interval=settings.SAMPLING_PROFILER_ROTATE_SECONDS,
+            max_overhead=settings.SAMPLING_PROFILER_MAX_OVERHEAD,
+        )
+
+    def track(self, application):
+        """
+        Wrap a WSGI application so the threads serving it get sampled.
+        The sampler thread is (re)started lazily in every worker process,
+        which keeps it working with ``gunicorn --preload``.
+        """
+
+        def tracked_application(environ, start_response):
+            self.ensure_started()
+            ident = threading.get_ident()
+            self._active.add(ident)
+            try:
+                return application(environ, start_response)
+            finally:
+                self._active.discard(ident)
+
+        return tracked_application
+
+    def ensure_started(self):
+        pid = os.getpid()
+        if self._pid == pid and self._thread is not None:
+            return
+        with self._lock:
+            if self._pid == pid and self._thread is not None:
+                return
+            # A forked child inherits the parent's counters but not its thread.
+            self._pid = pid
+            self._stacks.clear()
+            self._active.clear()
+            self._stop.clear()
+            self._period_started = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="stack-sampler",
+                daemon=True,
+            )
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def sample(self):
+        """Record one sample of every active request thread."""
+        frames = sys._current_frames()  # noqa: SLF001
+        idents = [ident for ident in tuple(self._active) if ident in frames]
+        folded = [self._fold(frames[ident]) for ident in idents]
+        if folded:
+            with self._lock:
+                self._stacks.update(folded)
+
+    def flush(self):
+        """Write the collected samples to a new collapsed-stack file."""
+        with self._lock:
+            stacks, self._stacks = self._stacks, Counter()
+            started, self._period_started = self._period_started, time.monotonic()
+        if not stacks:
+            return None
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(time.time()))
+        path = self.output_dir / f"{socket.gethostname()}-{os.getpid()}-{stamp}.folded"
+        with path.open("w") as fh:
+            fh.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+        logger.info(
+            "Wrote %d samples covering %.0fs to %s",
+            stacks.total(),
+            time.monotonic() - started,
+            path,
+        )
+        return path
+
+    def _fold(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}:{code.co_qualname}")
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
+
+    def _next_delay(self, cost):
+        # Exponentially smoothed cost of one sample; keep cost / (cost + delay)
+        # under max_overhead by stretching the delay when sampling gets pricey.
+        self._sample_cost = 0.9 * self._sample_cost + 0.1 * cost
+        return max(self.interval, self._sample_cost / self.max_overhead)
+
+    def _run(self):
+        delay = self.interval
+        while not self._stop.wait(delay):
+            started = time.perf_counter()
+            try:
+                self.sample()
+                if time.monotonic() - self._period_started >= self.rotate_interval:
+                    self.flush()
+            except Exception:
+                logger.exception("Stack sampler failed")
+            delay = self._next_delay(time.perf_counter() - started)
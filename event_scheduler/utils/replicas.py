@@ -0,0 +1,50 @@
+"""
+Read replica routing.
+
+Replicas are configured with ``DATABASE_REPLICA_URLS`` and listed in
+``DATABASE_REPLICAS``. ``ReplicaRouter`` sends reads to a random replica
+only inside ``replica_reads()``, which ``ReplicaRoutingMiddleware`` enters
+for safe-method API requests, and never inside a transaction, so a request
+that wrote reads its own writes. Everything else uses the primary.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db import connections
+
+_use_replica = ContextVar("use_replica", default=False)
+
+
+@contextmanager
+def replica_reads():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not _use_replica.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(replicas)  # noqa: S311
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,100 @@
+"""
+Per-request performance counters.
+
+``SlowRequestMiddleware`` (see ``event_scheduler.utils.middleware``) opens a
+``RequestStats`` for every request. Code on the hot path reports what it did
+through ``current_stats()``, which returns ``None`` when nothing is recording,
+so instrumentation costs a single context variable lookup otherwise.
+"""
+
+import time
+from contextvars import ContextVar
+
+_current_stats = ContextVar("request_stats", default=None)
+
+
+def current_stats():
+    """Return the ``RequestStats`` of the running request, if any."""
+    return _current_stats.get()
+
+
+class RequestStats:
+    """Counters collected while serving a single request."""
+
+    def __init__(self):
+        self.range = None
+        self.events_loaded = 0
+        self.occurrences = 0
+        self.expansions = []
+        self.queries = 0
+        self.query_time = 0.0
+        self.slowest_queries = []
+
+    def activate(self):
+        return _current_stats.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _current_stats.reset(token)
+
+    def record_range(self, start, end):
+        self.range = (start, end)
+
+    def record_events(self, count, occurrences):
+        self.events_loaded += count
+        self.occurrences += occurrences
+
+    def record_expansion(self, event_id, rule, seconds, occurrences):
+        self.expansions.append((seconds, event_id, rule, occurrences))
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database ``execute_wrapper`` counting queries and their duration."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.query_time += elapsed
+            self.slowest_queries.append((elapsed, sql))
+            if len(self.slowest_queries) > 10:  # noqa: PLR2004
+                self.slowest_queries.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest_queries[3:]
+
+    def slowest_expansions(self, limit):
+        return sorted(self.expansions, key=lambda item: item[0], reverse=True)[:limit]
+
+    def as_dict(self, top_rules=5):
+        """Structured summary suitable for a log record."""
+        return {
+            "range": (
+                {"start": self.range[0].isoformat(), "end": self.range[1].isoformat()}
+                if self.range
+                else None
+            ),
+            "events_loaded": self.events_loaded,
+            "occurrences": self.occurrences,
+            "slowest_rules": [
+                {
+                    "event_id": event_id,
+                    "rule": rule,
+                    "ms": round(seconds * 1000, 3),
+                    "occurrences": occurrences,
+                }
+                for seconds, event_id, rule, occurrences in self.slowest_expansions(
+                    top_rules,
+                )
+            ],
+            "sql": {
+                "count": self.queries,
+                "ms": round(self.query_time * 1000, 3),
+                "slowest": [
+                    {"ms": round(elapsed * 1000, 3), "sql": sql[:500]}
+                    for elapsed, sql in sorted(
+                        self.slowest_queries,
+                        key=lambda item: item[0],
+                        reverse=True,
+                    )[:3]
+                ],
+            },
+        }
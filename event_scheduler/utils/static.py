@@ -0,0 +1,75 @@
+"""
+Static files for the ASGI application.
+
+``WhiteNoiseMiddleware`` is sync-only: with it in ``MIDDLEWARE``, Django
+adapts the whole middleware chain to sync under ASGI and every request
+holds a thread for its full duration. In ``DJANGO_SERVER_MODE=asgi`` it is
+left out of ``MIDDLEWARE`` and ``StaticFilesApp`` serves ``STATIC_URL`` in
+front of Django instead (see ``config.asgi``), with WhiteNoise's file index,
+headers and compressed variants. Only opening and reading files runs in a
+thread.
+"""
+
+from asgiref.sync import sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFilesApp:
+    """ASGI application serving static files, passing anything else on."""
+
+    def __init__(self, application):
+        self.application = application
+        self.whitenoise = WhiteNoiseMiddleware()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(
+            self.whitenoise.static_prefix,
+        ):
+            static_file = await self.find(scope["path"])
+            if static_file is not None:
+                await self.serve(static_file, scope, send)
+                return
+        await self.application(scope, receive, send)
+
+    async def find(self, path):
+        if self.whitenoise.autorefresh:
+            return await sync_to_async(self.whitenoise.find_file)(path)
+        return self.whitenoise.files.get(path)
+
+    @staticmethod
+    async def serve(static_file, scope, send):
+        # WhiteNoise reads the request headers WSGI-style
+        request_headers = {
+            "HTTP_" + name.decode("latin1").upper().replace("-", "_"): value.decode(
+                "latin1",
+            )
+            for name, value in scope["headers"]
+        }
+        get_response = sync_to_async(static_file.get_response, thread_sensitive=False)
+        response = await get_response(scope["method"], request_headers)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(response.status),
+                "headers": [
+                    (key.lower().encode("latin1"), value.encode("latin1"))
+                    for key, value in response.headers
+                ],
+            },
+        )
+        if response.file is not None:
+            read = sync_to_async(response.file.read, thread_sensitive=False)
+            try:
+                while chunk := await read(CHUNK_SIZE):
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": True,
+                        },
+                    )
+            finally:
+                response.file.close()
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,50 @@
+import logging
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+from rest_framework.test import APIClient
+
+from event_scheduler.events.tests.factories import EventFactory
+
+
+def test_slow_request_record_includes_recurrence_context(user, settings, caplog):
+    settings.SLOW_REQUEST_THRESHOLD_MS = 0.001
+    start = datetime(2024, 1, 1, 9, tzinfo=UTC)
+    event = EventFactory(
+        user=user,
+        start=start,
+        end=start + timedelta(hours=1),
+        is_recurring=True,
+        recurrence_rule="RRULE:FREQ=DAILY;INTERVAL=1",
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+
+    with caplog.at_level(logging.WARNING, logger="event_scheduler.slow_requests"):
+        response = client.get(
+            "/api/calendar/",
+            {"start": "2024-01-01T00:00:00", "end": "2024-01-10T00:00:00"},
+        )
+
+    assert response.status_code == 200  # noqa: PLR2004
+    [record] = [r.slow_request for r in caplog.records if hasattr(r, "slow_request")]
+    assert record["user_id"] == user.pk
+    assert record["endpoint"] == "calendar-view"
+    assert record["range"]["start"].startswith("2024-01-01")
+    assert record["events_loaded"] == 1
+    assert record["occurrences"] == 9  # noqa: PLR2004
+    assert record["slowest_rules"][0]["event_id"] == event.pk
+    assert record["slowest_rules"][0]["rule"] == event.recurrence_rule
+    assert record["sql"]["count"] >= 1
+
+
+def test_fast_requests_are_not_logged(user, settings, caplog):
+    settings.SLOW_REQUEST_THRESHOLD_MS = 60_000
+    client = APIClient()
+    client.force_authenticate(user)
+
+    with caplog.at_level(logging.WARNING, logger="event_scheduler.slow_requests"):
+        client.get("/api/upcoming/")
+
+    assert not [r for r in caplog.records if hasattr(r, "slow_request")]
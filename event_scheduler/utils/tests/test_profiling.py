@@ -0,0 +1,51 @@
+import threading
+
+from event_scheduler.utils.profiling import StackSampler
+
+
+def _busy_handler(ready, release):
+    ready.set()
+    release.wait(5)
+
+
+def test_sampler_folds_active_request_threads(tmp_path):
+    # A long interval keeps the background thread out of the way.
+    sampler = StackSampler(output_dir=tmp_path, interval=60)
+    ready, release = threading.Event(), threading.Event()
+
+    def app(environ, start_response):
+        _busy_handler(ready, release)
+        return []
+
+    worker = threading.Thread(target=sampler.track(app), args=({}, None))
+    worker.start()
+    ready.wait(5)
+    sampler.sample()
+    sampler.sample()
+    release.set()
+    worker.join()
+
+    path = sampler.flush()
+    sampler.stop()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    stack, count = lines[0].rsplit(" ", 1)
+    assert count == "2"
+    assert "test_profiling:_busy_handler" in stack
+    assert stack.index("tracked_application") < stack.index("_busy_handler")
+
+
+def test_sampler_ignores_idle_threads(tmp_path):
+    sampler = StackSampler(output_dir=tmp_path)
+    sampler.sample()
+    assert sampler.flush() is None
+
+
+def test_delay_backs_off_to_respect_overhead_budget(tmp_path):
+    interval = 0.01
+    sampler = StackSampler(output_dir=tmp_path, interval=interval, max_overhead=0.01)
+    assert sampler._next_delay(0.00001) == interval  # noqa: SLF001
+    for _ in range(100):
+        delay = sampler._next_delay(0.001)  # noqa: SLF001
+    assert delay > 0.09  # noqa: PLR2004
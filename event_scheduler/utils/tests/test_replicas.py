@@ -0,0 +1,68 @@
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from event_scheduler.events.api.async_views import AsyncCalendarView
+from event_scheduler.users.models import User
+from event_scheduler.utils.middleware import ReplicaRoutingMiddleware
+from event_scheduler.utils.replicas import ReplicaRouter
+from event_scheduler.utils.replicas import replica_reads
+
+
+def _routed_alias():
+    return ReplicaRouter().db_for_read(User)
+
+
+def test_router_reads_from_replicas_only_when_asked(settings):
+    settings.DATABASE_REPLICAS = ["replica_0"]
+
+    assert _routed_alias() is None
+    with replica_reads():
+        assert _routed_alias() == "replica_0"
+    assert ReplicaRouter().db_for_write(User) == "default"
+    assert ReplicaRouter().allow_migrate("replica_0", "users") is False
+
+
+def test_router_keeps_transactions_on_the_primary(settings, db):
+    # pytest-django runs the test in a transaction
+    settings.DATABASE_REPLICAS = ["replica_0"]
+
+    with replica_reads():
+        assert _routed_alias() is None
+
+
+def test_middleware_pins_clients_after_a_write(settings):
+    settings.DATABASE_REPLICAS = ["replica_0"]
+    routed = []
+
+    def view(request):
+        routed.append(_routed_alias())
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(view)
+    factory = RequestFactory()
+
+    middleware(factory.get("/api/calendar/"))
+    response = middleware(factory.post("/api/events/"))
+    pinned = factory.get("/api/calendar/")
+    pinned.COOKIES = {name: morsel.value for name, morsel in response.cookies.items()}
+    middleware(pinned)
+    middleware(factory.get("/admin/"))
+
+    assert routed == ["replica_0", None, None, None]
+    assert (
+        response.cookies["db_primary"]["max-age"]
+        == settings.DATABASE_REPLICA_PIN_SECONDS
+    )
+
+
+def test_read_views_are_not_atomic():
+    views = [
+        resolve(path).func
+        for path in ["/api/calendar/", "/api/upcoming/", "/api/dashboard/"]
+    ]
+    views.append(AsyncCalendarView.as_view())
+
+    for view in views:
+        assert view._non_atomic_requests == {"default"}  # noqa: SLF001
+    assert not getattr(resolve("/api/events/").func, "_non_atomic_requests", None)
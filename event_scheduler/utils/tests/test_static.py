@@ -0,0 +1,46 @@
+from asgiref.sync import async_to_sync
+
+from event_scheduler.utils.static import StaticFilesApp
+
+
+async def _django(scope, receive, send):
+    await send({"type": "http.response.start", "status": 404, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def _get(app, path, headers=()):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": list(headers)}
+    async_to_sync(app)(scope, None, send)
+    return messages[0], b"".join(m.get("body", b"") for m in messages[1:])
+
+
+def test_serves_collected_static_files(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path)
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "app.css").write_bytes(b"body{}" * 20_000)
+    app = StaticFilesApp(_django)
+
+    start, body = _get(app, "/static/css/app.css")
+
+    assert start["status"] == 200  # noqa: PLR2004
+    assert body == b"body{}" * 20_000
+    headers = dict(start["headers"])
+    assert headers[b"content-type"].startswith(b"text/css")
+    etag = headers[b"etag"]
+    start, body = _get(app, "/static/css/app.css", [(b"if-none-match", etag)])
+    assert start["status"] == 304  # noqa: PLR2004
+    assert body == b""
+
+
+def test_passes_other_requests_on(settings, tmp_path):
+    settings.STATIC_ROOT = str(tmp_path)
+    app = StaticFilesApp(_django)
+
+    for path in ("/static/missing.css", "/api/calendar/"):
+        start, _body = _get(app, path)
+        assert start["status"] == 404  # noqa: PLR2004
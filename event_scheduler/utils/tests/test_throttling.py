@@ -0,0 +1,122 @@
+import pytest
+import redis
+from rest_framework.test import APIClient
+
+from event_scheduler.utils import throttling
+from event_scheduler.utils.throttling import MemoryBuckets
+
+YEAR = {"start": "2024-01-01T00:00:00", "end": "2024-12-31T00:00:00"}
+
+
+@pytest.fixture(autouse=True)
+def _buckets(monkeypatch):
+    monkeypatch.setattr(throttling, "_buckets", MemoryBuckets())
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**rates):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+
+    return set_rates
+
+
+def test_memory_bucket_refills():
+    buckets = MemoryBuckets()
+    assert buckets.take("k", 10, 1000, 10)[0]
+
+    allowed, _tokens, wait = buckets.take("k", 10, 0.001, 5)
+    assert not allowed
+    assert wait > 0
+
+
+def test_calendar_cost_grows_with_range(user, rates):
+    rates(calendar="24/min")
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.get("/api/calendar/", YEAR)
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["RateLimit-Limit"] == "24"
+    assert response["RateLimit-Remaining"] == "12"
+
+    assert client.get("/api/calendar/", YEAR).status_code == 200  # noqa: PLR2004
+    response = client.get("/api/calendar/", YEAR)
+    assert response.status_code == 429  # noqa: PLR2004
+    assert int(response["Retry-After"]) > 0
+
+
+def test_ip_bucket_is_shared_between_users(user, rates):
+    rates(calendar_ip="1/min")
+    client = APIClient()
+    client.force_authenticate(user)
+    assert client.get("/api/upcoming/").status_code == 200  # noqa: PLR2004
+
+    other = APIClient()
+    other.force_authenticate(user.__class__.objects.create(email="o@example.com"))
+    assert other.get("/api/upcoming/").status_code == 429  # noqa: PLR2004
+
+
+def test_login_attempts_are_throttled(db, rates):
+    rates(login_ip="2/min")
+    client = APIClient()
+    credentials = {"email": "nobody@example.com", "password": "wrong"}
+
+    for _ in range(2):
+        assert client.post("/api/auth/login/", credentials).status_code == 401  # noqa: PLR2004
+    assert client.post("/api/auth/login/", credentials).status_code == 429  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ("num_proxies", "forwarded_for"),
+    [
+        # As configured by default: the header is ignored
+        (None, "198.51.100.{}"),
+        # Behind one proxy, which appends the address it saw
+        (1, "198.51.100.{}, 203.0.113.7"),
+    ],
+)
+def test_spoofed_forwarded_for_gets_no_fresh_bucket(
+    db,
+    settings,
+    rates,
+    num_proxies,
+    forwarded_for,
+):
+    rates(login_ip="2/min")
+    if num_proxies is not None:
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "NUM_PROXIES": num_proxies,
+        }
+    client = APIClient()
+    credentials = {"email": "nobody@example.com", "password": "wrong"}
+
+    statuses = [
+        client.post(
+            "/api/auth/login/",
+            credentials,
+            HTTP_X_FORWARDED_FOR=forwarded_for.format(attempt),
+        ).status_code
+        for attempt in range(3)
+    ]
+
+    assert statuses == [401, 401, 429]
+
+
+def test_unthrottled_when_redis_is_down(user, rates, monkeypatch):
+    rates(calendar="1/min")
+
+    class Unreachable:
+        def take(self, *args):
+            raise redis.ConnectionError
+
+    monkeypatch.setattr(throttling, "_buckets", Unreachable())
+    client = APIClient()
+    client.force_authenticate(user)
+
+    for _ in range(3):
+        assert client.get("/api/calendar/", YEAR).status_code == 200  # noqa: PLR2004
@@ -0,0 +1,15 @@
+from rest_framework.test import APIClient
+
+
+def test_db_pool_metrics_are_for_staff(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    assert client.get("/api/health/db-pool/").status_code == 403  # noqa: PLR2004
+
+    user.is_staff = True
+    user.save()
+    response = client.get("/api/health/db-pool/")
+
+    assert response.status_code == 200  # noqa: PLR2004
+    # The test database isn't pooled
+    assert response.json() == {}
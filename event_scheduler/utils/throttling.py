@@ -0,0 +1,209 @@
+"""
+Token-bucket throttling of expensive endpoints.
+
+Views opt in with a ``throttle_scope``; ``UserTokenBucketThrottle`` keeps a
+bucket per user (per IP for anonymous requests) at the rate configured for
+``<scope>`` in ``DEFAULT_THROTTLE_RATES``, ``IPTokenBucketThrottle`` one per
+client IP at the ``<scope>_ip`` rate. A rate of ``"120/min"`` is a bucket of
+120 tokens refilled over a minute. Scopes without a rate aren't throttled.
+
+A request takes ``view.get_throttle_cost(request)`` tokens (1 by default),
+so e.g. calendar requests cost more the wider the range they expand.
+
+Buckets live in Redis and are updated by one Lua script call per bucket,
+atomic across workers, with the Redis clock so app servers' clocks don't
+matter. When Redis can't be reached the request is let through: throttling
+must not take the API down with it.
+
+The state of the most depleted bucket is exposed in ``RateLimit-Limit``,
+``RateLimit-Remaining`` and ``RateLimit-Reset`` headers by
+``RateLimitHeadersMiddleware``; throttled requests also get ``Retry-After``.
+"""
+
+import logging
+import math
+import threading
+import time
+
+import redis
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket hash; ARGV[1]: capacity, ARGV[2]: tokens per second,
+# ARGV[3]: cost. Returns {allowed, tokens left, seconds until allowed}.
+BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(wait)}
+"""
+
+
+class MemoryBuckets:
+    """In-process buckets with the same semantics, for tests."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost):
+        with self._lock:
+            now = time.monotonic()
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0, now - ts) * rate)
+            allowed = tokens >= cost
+            wait = 0 if allowed else (cost - tokens) / rate
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            return allowed, tokens, wait
+
+
+class RedisBuckets:
+    def __init__(self, url, timeout=0.1):
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout,
+        )
+        self._take = self.client.register_script(BUCKET_SCRIPT)
+
+    def take(self, key, capacity, rate, cost):
+        allowed, tokens, wait = self._take(keys=[key], args=[capacity, rate, cost])
+        return bool(allowed), float(tokens), float(wait)
+
+
+_buckets = None
+
+
+def get_buckets():
+    """Process-wide bucket store configured by ``THROTTLE_BACKEND``."""
+    global _buckets  # noqa: PLW0603
+    if _buckets is None:
+        if settings.THROTTLE_BACKEND == "memory":
+            _buckets = MemoryBuckets()
+        else:
+            _buckets = RedisBuckets(
+                settings.THROTTLE_REDIS_URL,
+                timeout=settings.THROTTLE_REDIS_TIMEOUT,
+            )
+    return _buckets
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Base class: like DRF's ``ScopedRateThrottle``, the scope is read from the
+    view, and the bucket key from ``get_ident_key``.
+    """
+
+    cache_format = "throttle:%(scope)s:%(ident)s"
+    rate_suffix = ""
+
+    def __init__(self):
+        # The rate depends on the view, see allow_request
+        pass
+
+    def get_rate(self):
+        # Read at request time rather than import time, unlike DRF
+        rates = api_settings.DEFAULT_THROTTLE_RATES
+        return rates.get(f"{self.scope}{self.rate_suffix}")
+
+    def get_ident_key(self, request):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": f"{self.scope}{self.rate_suffix}",
+            "ident": self.get_ident_key(request),
+        }
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, "throttle_scope", None)
+        self.rate = self.get_rate() if self.scope else None
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        cost = 1
+        if hasattr(view, "get_throttle_cost"):
+            cost = view.get_throttle_cost(request)
+        # A request costing more than the bucket holds takes all of it
+        cost = min(max(cost, 1), self.num_requests)
+        refill = self.num_requests / self.duration
+        try:
+            allowed, tokens, self.wait_seconds = get_buckets().take(
+                self.get_cache_key(request, view),
+                self.num_requests,
+                refill,
+                cost,
+            )
+        except redis.RedisError:
+            logger.warning("Throttling unavailable, letting request through")
+            return True
+
+        reset = math.ceil((self.num_requests - tokens) / refill)
+        record_rate_limit(request, self.num_requests, int(tokens), reset)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Bucket per authenticated user, per client IP otherwise."""
+
+    def get_ident_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f"user:{request.user.pk}"
+        return f"ip:{self.get_ident(request)}"
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Bucket per client IP, whoever is authenticated."""
+
+    rate_suffix = "_ip"
+
+    def get_ident_key(self, request):
+        return self.get_ident(request)
+
+
+def record_rate_limit(request, limit, remaining, reset):
+    """Keep the most depleted bucket for ``RateLimitHeadersMiddleware``."""
+    django_request = getattr(request, "_request", request)
+    current = getattr(django_request, "rate_limit", None)
+    if current is None or remaining < current[1]:
+        django_request.rate_limit = (limit, remaining, reset)
+
+
+def check_throttles(request, view):
+    """
+    Run the default throttle classes outside of a DRF view (the async
+    event views), raising ``Throttled`` like ``APIView.check_throttles``.
+    """
+    waits = [
+        throttle.wait()
+        for throttle in (cls() for cls in api_settings.DEFAULT_THROTTLE_CLASSES)
+        if not throttle.allow_request(request, view)
+    ]
+    if waits:
+        raise exceptions.Throttled(max(waits))
@@ -0,0 +1,20 @@
+from drf_spectacular.utils import extend_schema
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from event_scheduler.utils.db_pool import pool_metrics
+
+
+@extend_schema(tags=["health"])
+class DatabasePoolView(APIView):
+    """
+    Connection pool metrics of the worker serving the request, for staff.
+
+    Example: /api/health/db-pool/
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(pool_metrics())